@@ -1,12 +1,16 @@
 # agentic/manage.py
 import asyncio
 from pathlib import Path
+from typing import Optional
 
 import typer
 from rich.console import Console
 
-from agentic.database import close_db_pool, get_db_pool
+from src.agentic.database import close_db_pool, get_db_pool
 from cli.managers import AgentManager, DatabaseManager, UtilityManager
+from src.agentic.config import config
+from src.agentic.profiling import profile_to_file
+from src.agentic.tracing import setup_tracing
 
 # --- Setup ---
 console = Console()
@@ -22,6 +26,33 @@ db_app = typer.Typer(
     rich_markup_mode="rich",
 )
 app.add_typer(db_app)
+sessions_app = typer.Typer(
+    name="sessions",
+    help="💬 Commands for chat session management (count, export, purge).",
+    rich_markup_mode="rich",
+)
+app.add_typer(sessions_app)
+setup_tracing(config.tracing)
+
+PROFILE_HELP = (
+    "Write a profile of the command to this file: sampled collapsed stacks for "
+    ".txt/.collapsed/.folded, otherwise a cProfile pstats file."
+)
+# Units accepted by `--older-than`, in seconds.
+AGE_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def _parse_age(value: str) -> float:
+    """Parses an age such as '90', '30m', '12h' or '7d' into seconds."""
+    value = value.strip().lower()
+    unit = AGE_UNITS.get(value[-1:]) if value else None
+    try:
+        return float(value[:-1]) * unit if unit else float(value)
+    except ValueError:
+        raise typer.BadParameter(
+            f"'{value}' is not an age; use seconds or a number followed by "
+            f"one of {', '.join(AGE_UNITS)}."
+        )
 
 
 # --- Database ---
@@ -63,24 +94,34 @@ def db_clear():
         await close_db_pool()
     asyncio.run(run())
 
+@db_app.command("slow-queries", short_help="🐢 Reports slow statements and their plans.")
+def db_slow_queries(
+    limit: int = typer.Option(20, "--limit", "-n", help="Statements to show."),
+    alerts: bool = typer.Option(False, "--alerts", help="Only statements with a sequential scan alert."),
+):
+    manager = UtilityManager(console)
+    manager.slow_queries(limit, alerts)
+
 
 # --- Agent ---
 @app.command("ingest", short_help="⚡ Ingests a code repository into the vector DB.")
 def ingest(
     repo_path: Path = typer.Argument(..., help="Path to the code repository."),
-    batch_size: int = typer.Option(10, "--batch-size", "-b", help="Concurrent chunks."),
+    batch_size: int = typer.Option(10, "--batch-size", "-b", help="Chunks embedded and inserted per batch."),
+    profile: Optional[Path] = typer.Option(None, "--profile", help=PROFILE_HELP),
 ):
     async def run():
         pool = await get_db_pool()
         manager = AgentManager(pool, console)
         await manager.ingest(repo_path, batch_size)
         await close_db_pool()
-    asyncio.run(run())
+    with profile_to_file(profile):
+        asyncio.run(run())
 
 @app.command("reindex", short_help="♻️ Re-indexes a repository.")
 def reindex(
     repo_path: Path = typer.Argument(..., help="Path to the repository to re-index."),
-    batch_size: int = typer.Option(10, "--batch-size", "-b", help="Concurrent chunks."),
+    batch_size: int = typer.Option(10, "--batch-size", "-b", help="Chunks embedded and inserted per batch."),
 ):
     async def run():
         pool = await get_db_pool()
@@ -90,13 +131,36 @@ def reindex(
     asyncio.run(run())
 
 @app.command("query", short_help="💬 Asks a question to the RAG agent.")
-def query(question: str):
+def query(
+    question: str,
+    profile: Optional[Path] = typer.Option(None, "--profile", help=PROFILE_HELP),
+):
     async def run():
         pool = await get_db_pool()
         manager = AgentManager(pool, console)
         await manager.query(question)
         await close_db_pool()
-    asyncio.run(run())
+    with profile_to_file(profile):
+        asyncio.run(run())
+
+
+# --- Sessions ---
+@sessions_app.command("count", short_help="🔢 Counts the stored chat sessions.")
+def sessions_count():
+    manager = UtilityManager(console)
+    asyncio.run(manager.count_sessions())
+
+@sessions_app.command("export", short_help="📤 Exports all chat sessions to a JSONL file.")
+def sessions_export(outfile: Path = typer.Argument("sessions.jsonl", help="Output file path.")):
+    manager = UtilityManager(console)
+    asyncio.run(manager.export_sessions(outfile))
+
+@sessions_app.command("purge", short_help="🗑️ Deletes chat sessions inactive for longer than an age.")
+def sessions_purge(
+    older_than: str = typer.Option(..., "--older-than", help="Inactivity age, e.g. '7d', '12h', '30m' or seconds."),
+):
+    manager = UtilityManager(console)
+    asyncio.run(manager.purge_sessions(_parse_age(older_than)))
 
 
 # --- Utility ---
@@ -3,7 +3,6 @@ import asyncio
 import json
 from pathlib import Path
 
-import redis.asyncio as redis
 import asyncpg
 import typer
 
@@ -12,14 +11,16 @@ from rich.table import Table
 from rich.progress import Progress
 
 
-from agentic.config import config
-from agentic.embeddings.ollama import get_ollama_embedding
-from agentic.ingestor import CodeIngestor
-from agentic.models import Message
-from agentic.agents.rag_agent import RAGAgent
-from agentic.utils import get_project_name
-from agentic.formatting import writer
-from agentic.formatting.console import console
+from src.agentic.config import config
+from src.agentic.embeddings.base import get_embedder
+from src.agentic.ingestor import CodeIngestor
+from src.agentic.models import Message
+from src.agentic.session_store import SessionStore
+from src.agentic.slow_queries import SlowQueryLog
+from src.agentic.agents.rag_agent import RAGAgent
+from src.agentic.utils import get_project_name
+from src.agentic.formatting import writer
+from src.agentic.formatting.console import console
 
 def _format_bytes(size: float) -> str:
     """Helper function to format bytes into KB, MB, etc."""
@@ -113,7 +114,8 @@ class DatabaseManager:
         rows = await self.pool.fetch(
             "SELECT id, repo_name, file_path, chunk, embedding FROM code_chunks"
         )
-        data = [dict(row) for row in rows]
+        # Embeddings come back as NumPy arrays, which JSON cannot hold as-is.
+        data = [{**row, "embedding": row["embedding"].tolist()} for row in rows]
         with outfile.open("w", encoding="utf-8") as f:
             json.dump(data, f, ensure_ascii=False, indent=2)
         self.console.print(
@@ -184,23 +186,106 @@ class UtilityManager:
     def __init__(self, console: Console):
         self.console = console
 
+    def _session_store(self) -> SessionStore:
+        return SessionStore(config.db.redis_url, config.db.session)
+
     async def clear_sessions(self):
-        client = redis.from_url(config.db.redis_url, decode_responses=True)
-        count = 0
-        async for key in client.scan_iter("*"):
-            await client.delete(key)
-            count += 1
-        await client.close()
+        store = self._session_store()
+        count = await store.clear()
+        await store.close()
         writer.write(
-            f"[bold green]Deleted {count} session keys from Redis.[/bold green]"
+            f"[bold green]Deleted {count} sessions from Redis.[/bold green]"
+        )
+
+    async def count_sessions(self):
+        store = self._session_store()
+        count = await store.count()
+        await store.close()
+        self.console.print(
+            f"[bold]{count}[/bold] sessions under '{config.db.session.key_prefix}'."
+        )
+
+    async def export_sessions(self, outfile: Path):
+        store = self._session_store()
+        count = 0
+        # One JSON object per line, so exports of any size stream to disk.
+        with outfile.open("w", encoding="utf-8") as f:
+            async for session in store.export():
+                f.write(json.dumps(session, ensure_ascii=False) + "\n")
+                count += 1
+        await store.close()
+        self.console.print(
+            f"[bold green]Exported {count} sessions to '{outfile}'.[/bold green]"
+        )
+
+    async def purge_sessions(self, older_than: float):
+        store = self._session_store()
+        with self.console.status("[bold cyan]Purging sessions...", spinner="dots"):
+            count = await store.purge(older_than)
+        await store.close()
+        self.console.print(
+            f"[bold green]Deleted {count} inactive sessions.[/bold green]"
         )
 
+    def slow_queries(self, limit: int, alerts_only: bool):
+        settings = config.db.slow_queries
+        records = SlowQueryLog(
+            settings.log_path, settings.max_bytes, settings.backups
+        ).read()
+        if alerts_only:
+            records = [r for r in records if r["alert"]]
+        if not records:
+            self.console.print(f"No slow queries recorded in '{settings.log_path}'.")
+            return
+
+        # One row per statement, slowest first.
+        statements: dict[str, dict] = {}
+        for record in records:
+            entry = statements.setdefault(
+                record["query"], {"samples": 0, "max_ms": 0.0, "alert": False}
+            )
+            entry["samples"] += 1
+            entry["max_ms"] = max(entry["max_ms"], record["duration_ms"])
+            entry["alert"] = entry["alert"] or record["alert"]
+            # Records are oldest first, so this ends with the latest plan.
+            entry["last"] = record
+
+        table = Table(
+            "Statement",
+            "Samples",
+            "Max (ms)",
+            "Last EXPLAIN (ms)",
+            "Seq Scans",
+            "Alert",
+            title="🐢 Slow Queries",
+        )
+        ranked = sorted(statements.items(), key=lambda item: -item[1]["max_ms"])
+        for query, entry in ranked[:limit]:
+            last = entry["last"]
+            execution = last.get("execution_ms")
+            table.add_row(
+                query if len(query) <= 80 else query[:77] + "...",
+                str(entry["samples"]),
+                f"{entry['max_ms']:.1f}",
+                f"{execution:.1f}" if execution is not None else "N/A",
+                ", ".join(last["seq_scans"]) or "-",
+                "[bold red]SEQ SCAN[/]" if entry["alert"] else "",
+            )
+        self.console.print(table)
+        alerts = sum(1 for entry in statements.values() if entry["alert"])
+        if alerts:
+            self.console.print(
+                f"[bold red]{alerts} statements were planned with a sequential scan "
+                f"on {', '.join(settings.alert_tables)}.[/bold red]"
+            )
+
     async def test_embedding(self):
+        embedder = get_embedder()
         self.console.print(
-            f"Pinging Ollama at [bold]{config.llm.ollama.embedding_url}[/]..."
+            f"Testing the [bold]{embedder.backend.name}[/] embedding backend..."
         )
         try:
-            emb = await get_ollama_embedding("hello world")
+            emb = await embedder.embed("hello world")
             self.console.print(
                 f"[bold green]Success![/] Embedding vector received (dimension: {len(emb)})."
             )
@@ -1,20 +1,18 @@
 import asyncio
-from agentic.config import Config
-import aioredis
+from agentic.config import config
+from agentic.session_store import SessionStore
 
 
 async def clear_sessions():
-    redis_url = Config.get("redis_url")
+    redis_url = config.db.redis_url
     if not redis_url:
         print("No redis_url found in config.")
         return
 
-    redis = aioredis.from_url(redis_url, decode_responses=True)
-    count = 0
-    async for key in redis.scan_iter("*"):
-        await redis.delete(key)
-        count += 1
-    print(f"Deleted {count} session keys.")
+    store = SessionStore(redis_url, config.db.session)
+    count = await store.clear()
+    await store.close()
+    print(f"Deleted {count} sessions.")
 
 
 if __name__ == "__main__":
@@ -408,17 +408,14 @@ def query_alias(question: str):
 # ------------------------------
 # --- Clear Sessions ---
 def _clear_sessions_logic():
-    import aioredis
+    from agentic.session_store import SessionStore
 
     async def run():
-        redis = aioredis.from_url(config.db.redis_url, decode_responses=True)
-        count = 0
-        async for key in redis.scan_iter("*"):
-            await redis.delete(key)
-            count += 1
-        await redis.close()
+        store = SessionStore(config.db.redis_url, config.db.session)
+        count = await store.clear()
+        await store.close()
         console.print(
-            f"[bold green]Deleted {count} session keys from Redis.[/bold green]"
+            f"[bold green]Deleted {count} sessions from Redis.[/bold green]"
         )
 
     asyncio.run(run())
@@ -427,7 +424,7 @@ def _clear_sessions_logic():
 @app.command(
     "clear-sessions",
     short_help="cs: Clears all chat histories from Redis.",
-    help="Deletes all keys from the Redis database, effectively clearing all persisted chat sessions and conversation histories.",
+    help="Deletes every key under the session key prefix in Redis, clearing all persisted chat sessions and conversation histories. Other keys are left alone.",
 )
 def clear_sessions():
     _clear_sessions_logic()
@@ -444,9 +441,8 @@ def _test_embedding_logic():
     from agentic.embeddings.ollama import get_ollama_embedding
 
     async def run():
-        console.print(
-            f"Pinging Ollama at [bold]{config.llm.ollama.embedding_url}[/]..."
-        )
+        hosts = ", ".join(s.embedding_url for s in config.llm.ollama_backends)
+        console.print(f"Pinging Ollama at [bold]{hosts}[/]...")
         try:
             emb = await get_ollama_embedding("hello world")
             console.print(
@@ -0,0 +1,184 @@
+import asyncio
+import heapq
+import itertools
+from typing import Optional
+
+from loguru import logger
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src.agentic.config import AdmissionSettings, RouteLimit, config
+
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted in time."""
+
+
+class AdmissionGate:
+    """
+    Limits how many requests to a route are handled at once.
+
+    Requests beyond `max_concurrency` wait in a bounded queue. When the
+    queue is full, or a request has waited `queue_timeout` seconds, it is
+    rejected instead, so admitted requests keep their latency while the
+    excess fails fast.
+
+    Waiting requests are served by weighted fair queuing between clients:
+    each gets a virtual finish time of `1 / weight` after the later of its
+    client's previous one and the current virtual time, and freed slots go
+    to the earliest. A client with many queued requests is thus interleaved
+    with the others in proportion to their weights instead of being served
+    ahead of them; requests of a single client keep their order.
+    """
+
+    def __init__(self, limit: RouteLimit):
+        """
+        Args:
+            limit: The concurrency, queue size and queue timeout of the route.
+        """
+        self.max_concurrency = limit.max_concurrency
+        self.max_queue = limit.max_queue
+        self.queue_timeout = limit.queue_timeout
+        self.in_flight = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self.queued = 0
+        # Heap of (virtual finish time, arrival, future); entries whose
+        # future is already done are skipped when popped.
+        self._waiters: list[tuple[float, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+        self._virtual_time = 0.0
+        self._finish_times: dict[str, float] = {}
+
+    async def acquire(self, client: str = "", weight: float = 1.0):
+        """
+        Waits for a slot and takes it.
+
+        Args:
+            client: Identifies the caller for fair queuing.
+            weight: The caller's relative share of the slots while queuing.
+
+        Raises:
+            Overloaded: If the queue is full or the wait timed out.
+        """
+        if self.in_flight < self.max_concurrency and not self.queued:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise Overloaded("The admission queue is full.")
+
+        finish = (
+            max(self._virtual_time, self._finish_times.get(client, 0.0)) + 1 / weight
+        )
+        self._finish_times[client] = finish
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (finish, next(self._arrivals), future))
+        self.queued += 1
+        try:
+            await asyncio.wait_for(future, self.queue_timeout)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if not future.done() or future.cancelled():
+                self.queued -= 1
+            else:
+                # The slot was handed over just as the wait ended.
+                self.release()
+            if isinstance(e, asyncio.TimeoutError):
+                self.timed_out += 1
+                raise Overloaded("Timed out waiting for admission.") from None
+            raise
+        self.admitted += 1
+
+    def release(self):
+        """Frees a slot, handing it straight to the next waiting request."""
+        while self._waiters:
+            finish, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                self._virtual_time = finish
+                self.queued -= 1
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+        # Nobody is waiting, so later arrivals start afresh.
+        self._virtual_time = 0.0
+        self._finish_times.clear()
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class AdmissionController:
+    """Holds the admission gate of each limited route."""
+
+    def __init__(self, settings: AdmissionSettings):
+        self.gates = {
+            path: AdmissionGate(limit) for path, limit in settings.routes.items()
+        }
+        self.retry_after = settings.retry_after
+
+    def stats(self) -> dict:
+        """Reports in-flight, queued and rejected requests per route."""
+        return {path: gate.stats() for path, gate in self.gates.items()}
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware that admits requests to limited routes through their gate.
+
+    Requests are queued fairly by the API client stored in their state by
+    the ApiKeyMiddleware, if any. Rejected requests get a 503 response with a Retry-After header. An
+    admitted request holds its slot until its response has been sent.
+    """
+
+    def __init__(self, app: ASGIApp, controller: Optional[AdmissionController] = None):
+        """
+        Args:
+            app: The application to wrap.
+            controller: The route gates; defaults to `admission_controller`.
+        """
+        self.app = app
+        self.controller = controller or admission_controller
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        gate = (
+            self.controller.gates.get(scope["path"])
+            if scope["type"] == "http"
+            else None
+        )
+        if gate is None:
+            await self.app(scope, receive, send)
+            return
+
+        client = scope.get("state", {}).get("api_client")
+        try:
+            if client is None:
+                await gate.acquire()
+            else:
+                await gate.acquire(client.name, client.weight)
+        except Overloaded as e:
+            logger.debug("Shedding request to {}: {}", scope["path"], e)
+            response = JSONResponse(
+                {"detail": "The server is overloaded. Please retry later."},
+                status_code=503,
+                headers={"Retry-After": str(self.controller.retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            gate.release()
+
+
+# Shared by every request this worker serves.
+admission_controller = AdmissionController(config.server.admission)
@@ -1,4 +1,8 @@
-from src.agentic.models import Message
+from typing import Optional
+
+from src.agentic.history import history_manager
+from src.agentic.metrics import stage_timer
+from src.agentic.models import Message, SessionSummary
 from src.agentic.config import AppConfig, config as default_config
 from src.agentic.chat.azure import azure_chat
 
@@ -10,12 +14,22 @@ class ConversationalAgent:
     def __init__(self, config_obj: AppConfig = default_config):
         self.config = config_obj
 
-    async def run_chat(self, messages: list[Message]) -> str:
+    async def run_chat(
+        self,
+        messages: list[Message],
+        summary: Optional[SessionSummary] = None,
+        offset: int = 0,
+    ) -> str:
         """
         Conducts a chat turn using Azure OpenAI (no RAG).
 
+        Only the most recent messages are sent, preceded by the summary of
+        older ones.
+
         Args:
             messages: The history of the conversation.
+            summary: The rolling summary of the older part of the conversation.
+            offset: The position of the first of `messages` in the session.
 
         Returns:
             The assistant's generated reply.
@@ -27,8 +41,9 @@ class ConversationalAgent:
         formatted_messages = []
         if self.config.rag.system_prompt:
             formatted_messages.append({"role": "system", "content": self.config.rag.system_prompt})
-        for msg in messages:
+        for msg in history_manager.window(messages, summary, offset):
             formatted_messages.append({"role": msg.role, "content": msg.content})
 
-        reply = await azure_chat(formatted_messages, temperature=self.config.llm.temperature)
+        with stage_timer("llm"):
+            reply = await azure_chat(formatted_messages, temperature=self.config.llm.temperature)
         return reply
@@ -1,11 +1,48 @@
+import json
+import time
 import asyncpg
-from typing import Optional
+from typing import AsyncIterator, Optional
 from loguru import logger
 
-from src.agentic.embeddings.ollama import get_ollama_embedding
-from src.agentic.models import Message
+from src.agentic.diagnostics import current_diagnostics
+from src.agentic.embeddings.base import get_embedder
+from src.agentic.history import history_manager
+from src.agentic.logger import user_text
+from src.agentic.metrics import stage_timer
+from src.agentic.models import ChatDiagnostics, Message, RetrievedChunk, SessionSummary
+from src.agentic.ratelimit import message_tokens
+from src.agentic.tracing import span
 from src.agentic.config import AppConfig, config as default_config
-from src.agentic.chat.azure import azure_chat
+from src.agentic.chat.azure import azure_chat, azure_chat_stream
+
+
+def _retrieval_stats(rows: list) -> dict:
+    # Span attributes describing how close the retrieved chunks were.
+    distances = [row["distance"] for row in rows]
+    if not distances:
+        return {"rows": 0}
+    return {
+        "rows": len(distances),
+        "distance.min": min(distances),
+        "distance.max": max(distances),
+        "distance.mean": sum(distances) / len(distances),
+    }
+
+
+def _plan_index(plan: list) -> Optional[str]:
+    # The first index scanned anywhere in an EXPLAIN (FORMAT JSON) plan.
+    nodes = [plan[0]["Plan"]]
+    while nodes:
+        node = nodes.pop(0)
+        if "Index Name" in node:
+            return node["Index Name"]
+        nodes.extend(node.get("Plans", []))
+    return None
+
+
+def _int_setting(value: Optional[str]) -> Optional[int]:
+    # current_setting(..., true) gives NULL for settings pgvector has not defined.
+    return int(value) if value else None
 
 
 class RAGAgent:
@@ -38,53 +75,84 @@ class RAGAgent:
         Returns:
             A string containing the concatenated relevant code chunks.
         """
-        embedding = await get_ollama_embedding(search_query)
+        with stage_timer("embedding"), span("embed query", chars=len(search_query)):
+            embedding = await get_embedder().embed(search_query)
 
+        top_k = self.config.llm.retriever_top_k
         if repo_name:
-            logger.info(f"Retrieving chunks for query in repo: '{repo_name}'")
-            rows = await self.db_pool.fetch(
-                "SELECT file_path, chunk FROM code_chunks WHERE repo_name = $3 ORDER BY embedding <-> $1 LIMIT $2",
-                embedding,
-                self.config.llm.retriever_top_k,
-                repo_name,
-            )
+            logger.info("Retrieving chunks for query in repo: '{}'", repo_name)
+            query = "SELECT id, file_path, chunk, embedding <-> $1 AS distance FROM code_chunks WHERE repo_name = $3 ORDER BY embedding <-> $1 LIMIT $2"
+            args = (embedding, top_k, repo_name)
         else:
             logger.info("Retrieving chunks for query across all repos.")
-            rows = await self.db_pool.fetch(
-                "SELECT file_path, chunk FROM code_chunks ORDER BY embedding <-> $1 LIMIT $2",
-                embedding,
-                self.config.llm.retriever_top_k,
-            )
+            query = "SELECT id, file_path, chunk, embedding <-> $1 AS distance FROM code_chunks ORDER BY embedding <-> $1 LIMIT $2"
+            args = (embedding, top_k)
+        with stage_timer("vector_search"), span(
+            "sql retrieval", repo_name=repo_name, top_k=top_k
+        ) as s:
+            rows = await self.db_pool.fetch(query, *args)
+            s.set_attributes(_retrieval_stats(rows))
+
+        diagnostics = current_diagnostics.get()
+        if diagnostics is not None:
+            await self._diagnose_retrieval(diagnostics, rows, query, args)
 
         if not rows:
-            logger.warning(f"No code chunks found for query: '{search_query}'")
+            logger.warning("No code chunks found for query: '{}'", user_text(search_query))
             return "No relevant code chunks were found."
 
         return "\n\n".join(
             [f"File: {row['file_path']}\n---\n{row['chunk']}" for row in rows]
         )
 
-    async def run_rag_chat(self, messages: list[Message]) -> str:
+    async def _diagnose_retrieval(
+        self, diagnostics: ChatDiagnostics, rows: list, query: str, args: tuple
+    ):
         """
-        Conducts a RAG-powered chat turn.
+        Records the retrieved chunks, and the index and search settings the
+        retrieval query runs with, for a debug-mode request.
 
-        It retrieves context based on the latest user message and injects it
-        into the prompt for the Azure OpenAI model.
+        The query is planned again with EXPLAIN, without running it.
+        """
+        started = time.perf_counter()
+        diagnostics.chunks = [
+            RetrievedChunk(
+                id=str(row["id"]), file_path=row["file_path"], distance=row["distance"]
+            )
+            for row in rows
+        ]
+        async with self.db_pool.acquire() as conn:
+            plan = await conn.fetchval(f"EXPLAIN (FORMAT JSON) {query}", *args)
+            settings = await conn.fetchrow(
+                "SELECT current_setting('ivfflat.probes', true) AS probes, "
+                "current_setting('hnsw.ef_search', true) AS ef_search"
+            )
+        diagnostics.index = _plan_index(json.loads(plan))
+        diagnostics.probes = _int_setting(settings["probes"])
+        diagnostics.ef_search = _int_setting(settings["ef_search"])
+        diagnostics.timings["explain"] = (time.perf_counter() - started) * 1000
+
+    async def _build_prompt(
+        self, messages: list[Message], context: Optional[str] = None
+    ) -> list[dict]:
+        """
+        Retrieves context for the latest user message and formats the
+        conversation for the Azure OpenAI API.
 
         Args:
             messages: The history of the conversation.
+            context: Code chunks already retrieved for the latest user
+                message; retrieved here if not given.
 
         Returns:
-            The assistant's generated reply.
+            The message dictionaries to send to the chat API.
         """
-        if not messages or messages[-1].role != "user":
-            return "Please provide a user message."
-
-        last_user_message = messages[-1].content
-        logger.info(f"Retrieving context for: '{last_user_message}'")
-
         # 1. Retrieve context
-        retrieved_context = await self.retrieve_code_chunks(last_user_message)
+        retrieved_context = context
+        if retrieved_context is None:
+            last_user_message = messages[-1].content
+            logger.info("Retrieving context for: '{}'", user_text(last_user_message))
+            retrieved_context = await self.retrieve_code_chunks(last_user_message)
 
         # 2. Construct a new system prompt including the retrieved context
         contextual_system_prompt = f"""
@@ -98,10 +166,88 @@ Here is some relevant code context from the codebase. Use this to inform your an
 
         # 3. Format messages for the API
         # We replace the original system prompt with our new contextual one
-        formatted_messages = [{"role": "system", "content": contextual_system_prompt}]
-        for msg in messages:
-            formatted_messages.append({"role": msg.role, "content": msg.content})
+        with span("prompt assembly", messages=len(messages)) as s:
+            formatted_messages = [
+                {"role": "system", "content": contextual_system_prompt}
+            ]
+            for msg in messages:
+                formatted_messages.append({"role": msg.role, "content": msg.content})
+            tokens = {
+                "context_tokens": message_tokens(contextual_system_prompt),
+                "prompt_tokens": sum(
+                    message_tokens(msg["content"]) for msg in formatted_messages
+                ),
+            }
+            s.set_attributes(tokens)
+        diagnostics = current_diagnostics.get()
+        if diagnostics is not None:
+            diagnostics.context_tokens = tokens["context_tokens"]
+            diagnostics.prompt_tokens = tokens["prompt_tokens"]
+        return formatted_messages
+
+    async def run_rag_chat(
+        self,
+        messages: list[Message],
+        summary: Optional[SessionSummary] = None,
+        context: Optional[str] = None,
+        offset: int = 0,
+    ) -> str:
+        """
+        Conducts a RAG-powered chat turn.
+
+        It retrieves context based on the latest user message and injects it
+        into the prompt for the Azure OpenAI model. Only the most recent
+        messages are sent, preceded by the summary of older ones.
+
+        Args:
+            messages: The history of the conversation.
+            summary: The rolling summary of the older part of the conversation.
+            context: The result of `retrieve_code_chunks` for the latest user
+                message, if the caller already fetched it, e.g. while the
+                session was loading.
+            offset: The position of the first of `messages` in the session.
+
+        Returns:
+            The assistant's generated reply.
+        """
+        if not messages or messages[-1].role != "user":
+            return "Please provide a user message."
+
+        formatted_messages = await self._build_prompt(
+            history_manager.window(messages, summary, offset), context
+        )
 
         logger.info("Sending request to Azure OpenAI...")
-        reply = await azure_chat(formatted_messages)
+        with stage_timer("llm"):
+            reply = await azure_chat(formatted_messages)
         return reply
+
+    async def stream_rag_chat(
+        self,
+        messages: list[Message],
+        summary: Optional[SessionSummary] = None,
+        offset: int = 0,
+    ) -> AsyncIterator[str]:
+        """
+        Conducts a RAG-powered chat turn, streaming the reply as it is generated.
+
+        Args:
+            messages: The history of the conversation.
+            summary: The rolling summary of the older part of the conversation.
+            offset: The position of the first of `messages` in the session.
+
+        Yields:
+            Fragments of the assistant's reply.
+        """
+        if not messages or messages[-1].role != "user":
+            yield "Please provide a user message."
+            return
+
+        formatted_messages = await self._build_prompt(
+            history_manager.window(messages, summary, offset)
+        )
+
+        logger.info("Streaming request to Azure OpenAI...")
+        with stage_timer("llm"):
+            async for token in azure_chat_stream(formatted_messages):
+                yield token
@@ -1,4 +1,13 @@
 from .general import general_router
 from .chat import chat_router
+from .ws import ws_router
+from .sessions import sessions_router
+from .debug import debug_router
 
-__all__ = ["general_router", "chat_router"]
+__all__ = [
+    "general_router",
+    "chat_router",
+    "ws_router",
+    "sessions_router",
+    "debug_router",
+]
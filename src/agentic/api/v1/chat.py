@@ -1,10 +1,16 @@
-from fastapi import HTTPException, Depends, APIRouter
+import asyncio
+
+from fastapi import HTTPException, Depends, APIRouter, Response
+from typing import Optional
 from uuid import uuid4
 from loguru import logger
 
 from src.agentic.agents.rag_agent import RAGAgent
-from src.agentic.models import Message, ChatRequest, ChatResponse
+from src.agentic.diagnostics import debug_mode
+from src.agentic.history import history_manager
+from src.agentic.models import ChatDiagnostics, Message, ChatRequest, ChatResponse
 from src.agentic.session_store import SessionStore
+from src.agentic.tracing import span
 from src.agentic.api.v1.deps import get_rag_agent, get_session_store
 from src.agentic.agents.conversational_agent import ConversationalAgent
 from src.agentic.api.v1.deps import get_conversational_agent
@@ -12,6 +18,53 @@ from src.agentic.api.v1.deps import get_conversational_agent
 chat_router = APIRouter(tags=["Chat"])
 
 
+async def _older_messages(
+    store: SessionStore, session_id: str, offset: int, delta: bool
+) -> list[Message]:
+    """
+    Reads the messages before the loaded window for a response that returns
+    the whole conversation; none are needed in delta mode.
+    """
+    if delta or not offset:
+        return []
+    return await store.get_range(session_id, 0, offset)
+
+
+def _chat_response(
+    session_id: str,
+    reply: str,
+    messages: list[Message],
+    offset: int,
+    turn: list[Message],
+    delta: bool,
+    older: list[Message],
+    diagnostics: Optional[ChatDiagnostics] = None,
+) -> ChatResponse:
+    """
+    Builds the response to a chat turn.
+
+    Args:
+        session_id: The session identifier.
+        reply: The agent's reply.
+        messages: The loaded history, ending with the new turn.
+        offset: The position in the session of the first of `messages`.
+        turn: The new user message and reply.
+        delta: Whether to return only the new turn instead of the history.
+        older: The messages before `messages`, unless `delta` is set.
+        diagnostics: The details collected in debug mode, if requested.
+
+    Returns:
+        The ChatResponse, with the position of the new turn in the session.
+    """
+    return ChatResponse(
+        session_id=session_id,
+        reply=reply,
+        history=turn if delta else older + messages,
+        turn_index=offset + len(messages) - len(turn),
+        debug=diagnostics,
+    )
+
+
 @chat_router.post(
     "/chat",
     response_model=ChatResponse,
@@ -21,6 +74,7 @@ chat_router = APIRouter(tags=["Chat"])
 )
 async def chat(
     request_data: ChatRequest,
+    response: Response,
     agent: RAGAgent = Depends(get_rag_agent),
     store: SessionStore = Depends(get_session_store),
 ):
@@ -28,45 +82,81 @@ async def chat(
     Handles a chat interaction with the RAG agent.
 
     Maintains conversation history using a session ID.  
-    Returns the agent's reply and the full conversation history.
+    Returns the agent's reply and the full conversation history, or only the
+    new turn if `delta` is set. Only the recent part of the history is sent
+    to the model either way.
 
     - **message**: The user's message/question.
     - **session_id**: (Optional) The session to continue. If not provided, a new session is started.
+    - **delta**: (Optional) Return only the new turn in `history`. Older
+      messages can be paged with `GET /sessions/{session_id}/messages`.
+    - **debug**: (Optional) Return per-stage durations in a `Server-Timing`
+      header and retrieval diagnostics in `debug`.
 
     Returns:
         - **session_id**: The session identifier.
         - **reply**: The agent's reply.
-        - **history**: The full conversation history as a list of Message objects.
+        - **history**: The conversation history as a list of Message objects,
+          or only the new turn in delta mode.
+        - **turn_index**: The position in the session of the new user message.
+        - **debug**: In debug mode, the stage timings, the retrieved chunk ids
+          and distances, the index and pgvector settings the retrieval ran
+          with, and the estimated prompt tokens.
     """
     try:
-        user_message = request_data.message
-        if not user_message:
-            raise HTTPException(
-                status_code=400, detail="Missing 'message' in request body."
+        with span("chat turn", delta=request_data.delta) as turn_span, debug_mode(
+            request_data.debug, response
+        ) as diagnostics:
+            user_message = request_data.message
+            if not user_message:
+                raise HTTPException(
+                    status_code=400, detail="Missing 'message' in request body."
+                )
+
+            # Retrieval only needs the new message, so it runs while the
+            # session loads.
+            session_id = request_data.session_id
+            if not session_id:
+                session_id = str(uuid4())
+                messages, offset, summary = [], 0, None
+                context = await agent.retrieve_code_chunks(user_message)
+            else:
+                (messages, offset, summary), context = await asyncio.gather(
+                    history_manager.load(store, session_id),
+                    agent.retrieve_code_chunks(user_message),
+                )
+
+            turn_span.set_attribute("session_id", session_id)
+            turn = [Message(role="user", content=user_message)]
+            messages.extend(turn)
+
+            # Get the reply from the agent, reading any older messages the
+            # response needs meanwhile
+            assistant_reply, older = await asyncio.gather(
+                agent.run_rag_chat(
+                    messages, summary=summary, context=context, offset=offset
+                ),
+                _older_messages(store, session_id, offset, request_data.delta),
             )
 
-        session_id = request_data.session_id
-        if not session_id:
-            session_id = str(uuid4())
-            messages = []
-        else:
-            messages = await store.get(session_id)
-
-        messages.append(Message(role="user", content=user_message))
-
-        # Get the reply from the agent
-        assistant_reply = await agent.run_rag_chat(messages)
-
-        messages.append(Message(role="assistant", content=assistant_reply))
-
-        # Save the updated conversation history
-        await store.set(session_id, messages)
-
-        return ChatResponse(
-            session_id=session_id,
-            reply=assistant_reply,
-            history=messages,
-        )
+            turn.append(Message(role="assistant", content=assistant_reply))
+            messages.append(turn[-1])
+
+            # Only the new turn is written; earlier messages are already stored.
+            # The write does not hold up the response.
+            store.append_in_background(session_id, *turn)
+            history_manager.schedule_summary(store, session_id, messages, offset, summary)
+
+            return _chat_response(
+                session_id,
+                assistant_reply,
+                messages,
+                offset,
+                turn,
+                request_data.delta,
+                older,
+                diagnostics,
+            )
     except HTTPException:
         raise
     except Exception as e:
@@ -83,6 +173,7 @@ async def chat(
 )
 async def conversational_chat(
     request_data: ChatRequest,
+    response: Response,
     agent: ConversationalAgent = Depends(get_conversational_agent),
     store: SessionStore = Depends(get_session_store),
 ):
@@ -90,37 +181,58 @@ async def conversational_chat(
     Handles a chat interaction with the Conversational AI agent (Azure OpenAI, no retrieval).
 
     Maintains conversation history using a session ID.  
-    Returns the agent's reply and the full conversation history.
+    Returns the agent's reply and the full conversation history, or only the
+    new turn if `delta` is set. Only the recent part of the history is sent
+    to the model either way.
     """
     try:
-        user_message = request_data.message
-        if not user_message:
-            raise HTTPException(
-                status_code=400, detail="Missing 'message' in request body."
+        with span(
+            "conversational chat turn", delta=request_data.delta
+        ) as turn_span, debug_mode(request_data.debug, response) as diagnostics:
+            user_message = request_data.message
+            if not user_message:
+                raise HTTPException(
+                    status_code=400, detail="Missing 'message' in request body."
+                )
+
+            session_id = request_data.session_id
+            if not session_id:
+                session_id = str(uuid4())
+                messages, offset, summary = [], 0, None
+            else:
+                messages, offset, summary = await history_manager.load(
+                    store, session_id
+                )
+
+            turn_span.set_attribute("session_id", session_id)
+            turn = [Message(role="user", content=user_message)]
+            messages.extend(turn)
+
+            # Get the reply from the agent, reading any older messages the
+            # response needs meanwhile
+            assistant_reply, older = await asyncio.gather(
+                agent.run_chat(messages, summary=summary, offset=offset),
+                _older_messages(store, session_id, offset, request_data.delta),
             )
 
-        session_id = request_data.session_id
-        if not session_id:
-            session_id = str(uuid4())
-            messages = []
-        else:
-            messages = await store.get(session_id)
-
-        messages.append(Message(role="user", content=user_message))
-
-        # Get the reply from the agent
-        assistant_reply = await agent.run_chat(messages)
-
-        messages.append(Message(role="assistant", content=assistant_reply))
-
-        # Save the updated conversation history
-        await store.set(session_id, messages)
-
-        return ChatResponse(
-            session_id=session_id,
-            reply=assistant_reply,
-            history=messages,
-        )
+            turn.append(Message(role="assistant", content=assistant_reply))
+            messages.append(turn[-1])
+
+            # Only the new turn is written; earlier messages are already stored.
+            # The write does not hold up the response.
+            store.append_in_background(session_id, *turn)
+            history_manager.schedule_summary(store, session_id, messages, offset, summary)
+
+            return _chat_response(
+                session_id,
+                assistant_reply,
+                messages,
+                offset,
+                turn,
+                request_data.delta,
+                older,
+                diagnostics,
+            )
     except HTTPException:
         raise
     except Exception as e:
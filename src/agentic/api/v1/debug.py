@@ -0,0 +1,66 @@
+import asyncio
+import cProfile
+import threading
+from typing import Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse, Response
+
+from src.agentic.api.v1.deps import require_admin
+from src.agentic.profiling import SamplingProfiler, pstats_bytes
+
+debug_router = APIRouter(tags=["Debug"], dependencies=[Depends(require_admin)])
+
+# Only one profile runs at a time; cProfile cannot be nested.
+_profile_lock = asyncio.Lock()
+
+
+@debug_router.get(
+    "/debug/profile",
+    tags=["Debug"],
+    summary="Profile the running server",
+    response_description="Collapsed stacks, or a pstats file.",
+)
+async def profile(
+    seconds: float = Query(10.0, gt=0, le=300, description="How long to profile."),
+    format: Literal["collapsed", "pstats"] = Query(
+        "collapsed", description="The artifact to return."
+    ),
+):
+    """
+    Profiles whatever the server's event loop runs for `seconds`.
+
+    Requires an admin API key.
+
+    - **collapsed**: Stacks sampled 200 times a second, one line per stack
+      with its sample count, for flamegraph.pl or speedscope. Sampling adds
+      next to no overhead, so this is safe under production load. Time the
+      loop spends waiting for I/O shows up under `select`.
+    - **pstats**: A cProfile run, for `python -m pstats` or snakeviz. It
+      records every call, so it slows the server down while it runs.
+
+    Returns 409 if another profile is running.
+    """
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running.")
+    async with _profile_lock:
+        if format == "collapsed":
+            sampler = SamplingProfiler(threading.get_ident())
+            sampler.start()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                sampler.stop()
+            return PlainTextResponse(sampler.collapsed())
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profiler.disable()
+        return Response(
+            pstats_bytes(profiler),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": 'attachment; filename="profile.pstats"'},
+        )
@@ -1,16 +1,23 @@
-from fastapi import Request
+from fastapi import HTTPException
+from fastapi.requests import HTTPConnection
 from src.agentic.agents.rag_agent import RAGAgent
 from src.agentic.session_store import SessionStore
 from src.agentic.agents.conversational_agent import ConversationalAgent
 
-def get_rag_agent(request: Request) -> RAGAgent:
+def get_rag_agent(request: HTTPConnection) -> RAGAgent:
     """Dependency to get the shared RAGAgent instance."""
     return request.app.state.rag_agent
 
-def get_conversational_agent(request: Request) -> ConversationalAgent:
+def get_conversational_agent(request: HTTPConnection) -> ConversationalAgent:
     """Dependency to get the shared ConversationalAgent instance."""
     return request.app.state.conversational_agent
 
-def get_session_store(request: Request) -> SessionStore:
+def get_session_store(request: HTTPConnection) -> SessionStore:
     """Dependency to get the shared SessionStore instance."""
     return request.app.state.session_store
+
+def require_admin(request: HTTPConnection):
+    """Dependency rejecting callers without an admin API key."""
+    client = getattr(request.state, "api_client", None)
+    if client is None or not client.admin:
+        raise HTTPException(status_code=403, detail="An admin API key is required.")
@@ -1,4 +1,21 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import Response
+
+from src.agentic.admission import admission_controller
+from src.agentic.api.v1.deps import get_session_store, require_admin
+from src.agentic.auth import api_keys
+from src.agentic.chat.azure import chat_balancer
+from src.agentic.embeddings.base import get_embedder
+from src.agentic.embeddings.ollama import embedding_balancer
+from src.agentic.metrics import (
+    BACKEND_ERRORS,
+    BACKEND_REQUESTS,
+    CONTENT_TYPE,
+    DB_POOL_CONNECTIONS,
+    REDIS_POOL_CONNECTIONS,
+    REGISTRY,
+)
+from src.agentic.session_store import SessionStore
 
 general_router = APIRouter(tags=["General"])
 
@@ -11,3 +28,54 @@ def root():
 @general_router.get("/health", tags=["General"])
 def health():
     return {"status": "ok"}
+
+
+@general_router.get("/backends", tags=["General"])
+def backends():
+    """Reports routing statistics for each chat and embedding backend."""
+    return {
+        "chat": chat_balancer.stats(),
+        "embedding": embedding_balancer.stats(),
+        "embedding_queue": get_embedder().scheduler.stats(),
+    }
+
+
+@general_router.get("/sessions/stats", tags=["General"])
+def session_stats(store: SessionStore = Depends(get_session_store)):
+    """Reports how session values are encoded and how much they shrink."""
+    return store.stats()
+
+
+@general_router.get("/admission", tags=["General"])
+def admission():
+    """Reports in-flight, queued and rejected requests for each limited route."""
+    return admission_controller.stats()
+
+
+@general_router.get(
+    "/usage", tags=["General"], dependencies=[Depends(require_admin)]
+)
+def usage():
+    """Reports requests, throttling and chat tokens for each API key; admin only."""
+    return api_keys.stats()
+
+
+@general_router.get("/metrics", tags=["General"], response_class=Response)
+def metrics(request: Request):
+    """Exports the process's metrics in the Prometheus text format."""
+    # Values the app already tracks are copied in at scrape time, which keeps
+    # the request path free of extra bookkeeping.
+    for balancer in (chat_balancer, embedding_balancer):
+        for backend in balancer.backends:
+            BACKEND_REQUESTS.labels(balancer.role, backend.name).set(backend.requests)
+            BACKEND_ERRORS.labels(balancer.role, backend.name).set(backend.errors)
+    db_pool = getattr(request.app.state, "db_pool", None)
+    if db_pool is not None:
+        DB_POOL_CONNECTIONS.labels("in_use").set(db_pool.get_size() - db_pool.get_idle_size())
+        DB_POOL_CONNECTIONS.labels("idle").set(db_pool.get_idle_size())
+        DB_POOL_CONNECTIONS.labels("max").set(db_pool.get_max_size())
+    session_store = getattr(request.app.state, "session_store", None)
+    if session_store is not None:
+        for state, value in session_store.pool_stats().items():
+            REDIS_POOL_CONNECTIONS.labels(state).set(value)
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from src.agentic.api.v1.deps import get_session_store
+from src.agentic.models import MessagePage
+from src.agentic.session_store import SessionStore
+
+sessions_router = APIRouter(tags=["Sessions"])
+
+
+@sessions_router.get(
+    "/sessions/{session_id}/messages",
+    response_model=MessagePage,
+    tags=["Sessions"],
+    summary="Page through the messages of a session",
+    response_description="The requested messages and the size of the session.",
+)
+async def session_messages(
+    session_id: str,
+    offset: int = Query(0, ge=0, description="Position of the first message."),
+    limit: int = Query(50, ge=1, le=500, description="Most messages to return."),
+    store: SessionStore = Depends(get_session_store),
+):
+    """
+    Returns up to `limit` messages of a session, starting at `offset`.
+
+    Clients using delta chat responses fetch older history from here instead
+    of receiving it with every turn.
+    """
+    messages, total = await store.get_page(session_id, offset, limit)
+    if not total:
+        raise HTTPException(status_code=404, detail="Session not found.")
+    return MessagePage(
+        session_id=session_id, offset=offset, total=total, messages=messages
+    )
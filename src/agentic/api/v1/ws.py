@@ -0,0 +1,219 @@
+import asyncio
+from typing import Optional
+from uuid import uuid4
+
+from fastapi import APIRouter, Depends, WebSocket, WebSocketDisconnect
+from loguru import logger
+from pydantic import ValidationError
+
+from src.agentic.agents.rag_agent import RAGAgent
+from src.agentic.api.v1.deps import get_rag_agent, get_session_store
+from src.agentic.auth import ws_subprotocol
+from src.agentic.config import config
+from src.agentic.history import history_manager
+from src.agentic.models import ChatRequest, Message, SessionSummary
+from src.agentic.session_store import SessionStore
+
+ws_router = APIRouter(tags=["Chat"])
+
+
+class WriteBehindSession:
+    """
+    Keeps a chat session's history in memory for the life of a connection.
+
+    New messages are appended to the SessionStore periodically in the
+    background and once more when the session is closed, instead of on
+    every turn. Once saved, messages the rolling summary covers are dropped
+    from memory beyond `max_messages`.
+    """
+
+    def __init__(
+        self,
+        store: SessionStore,
+        session_id: str,
+        messages: list[Message],
+        flush_interval: float,
+        offset: int = 0,
+        summary: Optional[SessionSummary] = None,
+        max_messages: int = 0,
+    ):
+        """
+        Args:
+            store: The session store to persist the history to.
+            session_id: The unique identifier for the chat session.
+            messages: The history loaded when the connection was opened.
+            flush_interval: Seconds between background flushes.
+            offset: The position of the first of `messages` in the session.
+            summary: The rolling summary of the older part of the session.
+            max_messages: The messages to keep in memory; 0 keeps them all.
+        """
+        self.store = store
+        self.session_id = session_id
+        self.messages = messages
+        self.flush_interval = flush_interval
+        self.offset = offset
+        self.summary = summary
+        self.max_messages = max_messages
+        # Messages before this index are already in the store.
+        self._persisted = len(messages)
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Starts the periodic background flush."""
+        self._task = asyncio.create_task(self._flush_periodically())
+
+    def append(self, message: Message):
+        """Appends a message to the in-memory history."""
+        self.messages.append(message)
+
+    async def flush(self):
+        """Appends messages added since the last flush to the store."""
+        async with self._lock:
+            pending = self.messages[self._persisted :]
+            if not pending:
+                return
+            try:
+                await self.store.append(self.session_id, *pending)
+            except Exception as e:
+                logger.error(f"Failed to persist session {self.session_id}: {e}")
+                return
+            self._persisted += len(pending)
+            self._trim()
+
+    async def close(self):
+        """Stops the background flush and writes any pending changes."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def _trim(self):
+        excess = len(self.messages) - self.max_messages
+        if not self.max_messages or excess <= 0:
+            return
+        # Only saved messages are dropped, and while summaries are enabled only
+        # those the summary covers, so the prompt can still be built in full.
+        drop = min(excess, self._persisted)
+        if history_manager.settings.summarize_after:
+            covered = self.summary.covered if self.summary else 0
+            drop = min(drop, covered - self.offset)
+        if drop <= 0:
+            return
+        # A new list, as a summary in progress may still hold the old one.
+        self.messages = self.messages[drop:]
+        self.offset += drop
+        self._persisted -= drop
+
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+
+@ws_router.websocket("/ws/chat")
+async def ws_chat(
+    websocket: WebSocket,
+    session_id: Optional[str] = None,
+    agent: RAGAgent = Depends(get_rag_agent),
+    store: SessionStore = Depends(get_session_store),
+):
+    """
+    Handles a long-lived chat with the RAG agent over a WebSocket.
+
+    The session history is loaded once when the connection opens and kept in
+    memory; it is persisted in the background and when the client disconnects.
+    Connections that stay idle for `ws_idle_timeout` seconds are closed.
+
+    Protocol:
+        - The server first sends `{"type": "session", "session_id": ..., "turns": ...}`.
+        - The client sends `{"message": "..."}` for each turn.
+        - The server streams `{"type": "token", "content": ...}` frames, followed
+          by `{"type": "done", "reply": ...}` once the reply is complete.
+        - Invalid or failed turns produce `{"type": "error", "detail": ...}`.
+    """
+    await websocket.accept(subprotocol=ws_subprotocol(websocket.scope))
+
+    if session_id:
+        messages, offset, summary = await history_manager.load(store, session_id)
+    else:
+        session_id = str(uuid4())
+        messages, offset, summary = [], 0, None
+
+    session = WriteBehindSession(
+        store,
+        session_id,
+        messages,
+        config.server.ws_flush_interval,
+        offset=offset,
+        summary=summary,
+        max_messages=config.server.ws_max_messages,
+    )
+    session.start()
+    await websocket.send_json(
+        {"type": "session", "session_id": session_id, "turns": offset + len(messages)}
+    )
+
+    idle_timeout = config.server.ws_idle_timeout or None
+    try:
+        while True:
+            try:
+                payload = await asyncio.wait_for(
+                    websocket.receive_json(), idle_timeout
+                )
+            except asyncio.TimeoutError:
+                logger.info("WebSocket session {} closed after idling.", session_id)
+                await websocket.close(code=1000)
+                break
+            try:
+                request_data = ChatRequest(**payload)
+            except (TypeError, ValidationError):
+                await websocket.send_json(
+                    {"type": "error", "detail": "Missing 'message' in request body."}
+                )
+                continue
+            if not request_data.message:
+                await websocket.send_json(
+                    {"type": "error", "detail": "Missing 'message' in request body."}
+                )
+                continue
+
+            turn = session.messages + [
+                Message(role="user", content=request_data.message)
+            ]
+            parts = []
+            try:
+                async for token in agent.stream_rag_chat(
+                    turn, summary=session.summary, offset=session.offset
+                ):
+                    parts.append(token)
+                    await websocket.send_json({"type": "token", "content": token})
+            except WebSocketDisconnect:
+                raise
+            except Exception as e:
+                logger.error(f"WebSocket chat error: {e}")
+                await websocket.send_json(
+                    {"type": "error", "detail": "Internal server error"}
+                )
+                continue
+
+            assistant_reply = "".join(parts)
+            session.append(turn[-1])
+            session.append(Message(role="assistant", content=assistant_reply))
+            await websocket.send_json({"type": "done", "reply": assistant_reply})
+            history_manager.schedule_summary(
+                store,
+                session_id,
+                session.messages,
+                session.offset,
+                session.summary,
+                on_summary=lambda s: setattr(session, "summary", s),
+            )
+    except WebSocketDisconnect:
+        logger.info("WebSocket session {} disconnected.", session_id)
+    finally:
+        await session.close()
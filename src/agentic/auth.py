@@ -0,0 +1,217 @@
+import hmac
+import math
+from contextvars import ContextVar
+from typing import Optional
+
+from loguru import logger
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.websockets import WebSocketClose
+
+from src.agentic.config import ApiKeySettings, AuthSettings, config
+from src.agentic.ratelimit import TokenBucket
+
+API_KEY_HEADER = b"x-api-key"
+# Browsers cannot set headers on WebSockets, so those offer the key as a
+# subprotocol, next to WS_SUBPROTOCOL for the server to select. Unlike a query
+# parameter, it does not end up in access logs.
+WS_SUBPROTOCOL = "agentic"
+WS_KEY_SUBPROTOCOL_PREFIX = "api-key."
+
+
+class ApiClient:
+    """
+    A caller of the API, identified by its key.
+
+    Each client has its own request and token buckets. Requests are refused
+    while either is empty; tokens are charged after the fact with the usage
+    the chat service reports, so a client that overspends waits until its
+    debt is repaid.
+    """
+
+    def __init__(self, settings: ApiKeySettings):
+        self.name = settings.name
+        self.key = settings.key
+        self.weight = settings.weight
+        self.admin = settings.admin
+        self.requests = (
+            TokenBucket(settings.requests_per_minute, settings.requests_per_minute / 60)
+            if settings.requests_per_minute
+            else None
+        )
+        self.tokens = (
+            TokenBucket(settings.tokens_per_minute, settings.tokens_per_minute / 60)
+            if settings.tokens_per_minute
+            else None
+        )
+        self.admitted = 0
+        self.throttled = 0
+        self.tokens_used = 0
+
+    def admit(self) -> float:
+        """
+        Takes one request from the client's quota if it has one left.
+
+        Returns:
+            0 if the request is admitted, otherwise the seconds until it
+            would be.
+        """
+        delay = max(
+            self.requests.delay_for(1) if self.requests else 0.0,
+            self.tokens.delay_for(1) if self.tokens else 0.0,
+        )
+        if delay > 0:
+            self.throttled += 1
+            return delay
+        if self.requests is not None:
+            self.requests.consume(1)
+        self.admitted += 1
+        return 0.0
+
+    def charge(self, tokens: int):
+        """Records the chat tokens spent on the client's behalf."""
+        self.tokens_used += tokens
+        if self.tokens is not None:
+            self.tokens.consume(tokens)
+
+    def stats(self) -> dict:
+        return {
+            "weight": self.weight,
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "tokens_used": self.tokens_used,
+            "requests_available": (
+                math.floor(self.requests.level) if self.requests else None
+            ),
+            "tokens_available": math.floor(self.tokens.level) if self.tokens else None,
+        }
+
+
+class ApiKeyRegistry:
+    """The clients allowed to call the API, looked up by key."""
+
+    def __init__(self, settings: AuthSettings, default_key: Optional[str] = None):
+        """
+        Args:
+            settings: The accepted keys and the public routes.
+            default_key: The only key accepted when `settings.keys` is empty;
+                it is an admin key.
+        """
+        keys = settings.keys
+        if not keys and default_key:
+            keys = [ApiKeySettings(name="default", key=default_key, admin=True)]
+        self.enabled = settings.enabled
+        self.public_paths = set(settings.public_paths)
+        self.clients = [ApiClient(key) for key in keys]
+
+    def authenticate(self, key: Optional[str]) -> Optional[ApiClient]:
+        """Returns the client with the given key, or None."""
+        if not key:
+            return None
+        found = None
+        # Every key is compared, in constant time, so timing reveals nothing.
+        for client in self.clients:
+            if hmac.compare_digest(client.key.encode(), key.encode()):
+                found = client
+        return found
+
+    def stats(self) -> dict:
+        """Reports the usage of each client, by name."""
+        return {client.name: client.stats() for client in self.clients}
+
+
+# The client on whose behalf the current request runs, if any.
+current_client: ContextVar[Optional[ApiClient]] = ContextVar(
+    "current_client", default=None
+)
+
+
+def _request_key(scope: Scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == API_KEY_HEADER:
+            return value.decode("latin-1")
+    if scope["type"] == "websocket":
+        for protocol in scope.get("subprotocols", []):
+            if protocol.startswith(WS_KEY_SUBPROTOCOL_PREFIX):
+                return protocol[len(WS_KEY_SUBPROTOCOL_PREFIX) :]
+    return None
+
+
+def ws_subprotocol(scope: Scope) -> Optional[str]:
+    """
+    Returns the subprotocol to accept a WebSocket with: WS_SUBPROTOCOL if the
+    client offered it, as browsers passing their key as a subprotocol must.
+    """
+    return WS_SUBPROTOCOL if WS_SUBPROTOCOL in scope.get("subprotocols", []) else None
+
+
+class ApiKeyMiddleware:
+    """
+    ASGI middleware that requires a valid API key and enforces its quota.
+
+    Requests without a known key get a 401 response, and those over the
+    key's quota a 429 with a Retry-After header; WebSockets are closed with
+    a policy violation instead. The client is stored in the request state as
+    `api_client` and in `current_client` for the rest of the request.
+    """
+
+    def __init__(self, app: ASGIApp, registry: Optional[ApiKeyRegistry] = None):
+        """
+        Args:
+            app: The application to wrap.
+            registry: The accepted keys; defaults to `api_keys`.
+        """
+        self.app = app
+        self.registry = registry or api_keys
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if (
+            scope["type"] not in ("http", "websocket")
+            or not self.registry.enabled
+            or scope["path"] in self.registry.public_paths
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        client = self.registry.authenticate(_request_key(scope))
+        if client is None:
+            await self._reject(scope, receive, send, 401, "Invalid or missing API key.")
+            return
+        delay = client.admit()
+        if delay > 0:
+            logger.debug("Throttling API client '{}' for {:.1f}s", client.name, delay)
+            await self._reject(
+                scope,
+                receive,
+                send,
+                429,
+                "Rate limit exceeded for this API key.",
+                {"Retry-After": str(math.ceil(delay))},
+            )
+            return
+
+        scope.setdefault("state", {})["api_client"] = client
+        token = current_client.set(client)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_client.reset(token)
+
+    async def _reject(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+        status_code: int,
+        detail: str,
+        headers: Optional[dict] = None,
+    ):
+        if scope["type"] == "websocket":
+            await WebSocketClose(code=1008, reason=detail)(scope, receive, send)
+            return
+        response = JSONResponse({"detail": detail}, status_code=status_code, headers=headers)
+        await response(scope, receive, send)
+
+
+# The keys accepted by this server.
+api_keys = ApiKeyRegistry(config.server.auth, config.server.api_key)
@@ -0,0 +1,162 @@
+import asyncio
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Generic, Optional, TypeVar
+
+from loguru import logger
+
+S = TypeVar("S")
+
+# Weight given to the newest sample in the latency moving average.
+EWMA_ALPHA = 0.3
+
+
+class Backend(Generic[S]):
+    """A model host and its live routing statistics."""
+
+    def __init__(self, name: str, settings: S, weight: float = 1.0):
+        self.name = name
+        self.settings = settings
+        self.weight = weight
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.healthy = True
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.errors = 0
+
+    def stats(self) -> dict:
+        return {
+            "name": self.name,
+            "weight": self.weight,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "ewma_latency_ms": (
+                round(self.ewma_latency * 1000, 1)
+                if self.ewma_latency is not None
+                else None
+            ),
+            "requests": self.requests,
+            "errors": self.errors,
+        }
+
+
+class LoadBalancer(Generic[S]):
+    """
+    Routes requests across several backends serving the same role.
+
+    Backends are scored by outstanding requests ("least_outstanding") or by
+    latency EWMA scaled by outstanding requests ("ewma"), both divided by the
+    backend's weight. A backend that fails `eject_after` times in a row is
+    ejected and re-probed in the background until it answers again. If every
+    backend is ejected, requests are still spread across all of them rather
+    than failing outright.
+    """
+
+    def __init__(
+        self,
+        role: str,
+        backends: list[Backend[S]],
+        strategy: str = "least_outstanding",
+        eject_after: int = 3,
+        probe_interval: float = 10.0,
+        probe: Optional[Callable[[S], Awaitable[None]]] = None,
+        is_failure: Callable[[BaseException], bool] = lambda exc: True,
+    ):
+        """
+        Args:
+            role: A label for logging, e.g. "chat" or "embedding".
+            backends: The backends to route across.
+            strategy: "least_outstanding" or "ewma".
+            eject_after: Consecutive failures before a backend is ejected.
+            probe_interval: Seconds between health probes of ejected backends.
+            probe: Checks a backend's health, raising if it is still down.
+                Without one, ejected backends rejoin after `probe_interval`.
+            is_failure: Decides whether an error counts against the backend.
+        """
+        if not backends:
+            raise ValueError(f"No backends configured for {role}.")
+        if strategy not in ("least_outstanding", "ewma"):
+            raise ValueError(f"Unknown load balancing strategy '{strategy}'.")
+        self.role = role
+        self.backends = backends
+        self.strategy = strategy
+        self.eject_after = eject_after
+        self.probe_interval = probe_interval
+        self.probe = probe
+        self.is_failure = is_failure
+        self._probes: dict[str, asyncio.Task] = {}
+
+    def _score(self, backend: Backend[S]) -> float:
+        load = backend.outstanding + 1
+        if self.strategy == "ewma" and backend.ewma_latency is not None:
+            load *= backend.ewma_latency
+        return load / backend.weight
+
+    def pick(self, exclude: frozenset = frozenset()) -> Backend[S]:
+        """
+        Chooses the backend to send the next request to.
+
+        Args:
+            exclude: Names of backends to avoid if any alternative exists,
+                e.g. ones that already failed this request.
+
+        Returns:
+            The backend with the lowest score.
+        """
+        candidates = [b for b in self.backends if b.healthy] or self.backends
+        preferred = [b for b in candidates if b.name not in exclude] or candidates
+        best = min(self._score(b) for b in preferred)
+        return random.choice([b for b in preferred if self._score(b) == best])
+
+    @asynccontextmanager
+    async def track(self, backend: Backend[S]) -> AsyncIterator[Backend[S]]:
+        """Records the outcome and latency of a request sent to `backend`."""
+        backend.outstanding += 1
+        backend.requests += 1
+        started = time.monotonic()
+        try:
+            yield backend
+        except Exception as e:
+            backend.errors += 1
+            if self.is_failure(e):
+                backend.consecutive_failures += 1
+                if backend.healthy and backend.consecutive_failures >= self.eject_after:
+                    self._eject(backend)
+            raise
+        else:
+            elapsed = time.monotonic() - started
+            if backend.ewma_latency is None:
+                backend.ewma_latency = elapsed
+            else:
+                backend.ewma_latency += EWMA_ALPHA * (elapsed - backend.ewma_latency)
+            backend.consecutive_failures = 0
+        finally:
+            backend.outstanding -= 1
+
+    def stats(self) -> list[dict]:
+        return [backend.stats() for backend in self.backends]
+
+    def _eject(self, backend: Backend[S]):
+        logger.warning(f"Ejecting {self.role} backend '{backend.name}'.")
+        backend.healthy = False
+        if backend.name not in self._probes:
+            task = asyncio.create_task(self._reprobe(backend))
+            self._probes[backend.name] = task
+            task.add_done_callback(lambda _: self._probes.pop(backend.name, None))
+
+    async def _reprobe(self, backend: Backend[S]):
+        while not backend.healthy:
+            await asyncio.sleep(self.probe_interval)
+            if self.probe is not None:
+                try:
+                    await self.probe(backend.settings)
+                except Exception as e:
+                    logger.debug(
+                        f"Probe of {self.role} backend '{backend.name}' failed: {e}"
+                    )
+                    continue
+            logger.info(f"Restoring {self.role} backend '{backend.name}'.")
+            backend.healthy = True
+            backend.consecutive_failures = 0
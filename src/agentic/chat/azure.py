@@ -1,34 +1,191 @@
+import json
+from typing import AsyncIterator, Optional
+
 import httpx
-from src.agentic.config import config
+from src.agentic.auth import current_client
+from src.agentic.balancer import Backend, LoadBalancer
+from src.agentic.config import AzureSettings, config
+from src.agentic.ratelimit import QuotaLimiter, estimate_tokens
+from src.agentic.resilience import ResilientClient, is_retryable
+from src.agentic.singleflight import SingleFlight
+from src.agentic.tracing import span
+
+
+def _sum_quota(values: list[Optional[int]]) -> Optional[int]:
+    # A deployment without a quota leaves the pool as a whole unlimited.
+    return None if any(v is None for v in values) else sum(values)
+
+
+async def _probe_deployment(settings: AzureSettings):
+    # Any answer short of a server error means the endpoint is reachable again.
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        response = await client.get(settings.endpoint)
+        if response.status_code >= 500:
+            response.raise_for_status()
 
 
-async def azure_chat(messages: list[dict], temperature: float = 0.0) -> str:
+# Identical chat requests that are in flight at the same time share a call.
+chat_flight = SingleFlight("chat")
+# Retries, hedging and circuit breaking for the chat deployments.
+chat_client = ResilientClient(config.llm.resilience, config.llm.request_timeout)
+# Spreads requests across the configured deployments.
+chat_balancer = LoadBalancer(
+    "chat",
+    [
+        Backend(f"{s.endpoint}{s.chat_deployment}", s, s.weight)
+        for s in config.llm.azure_backends
+    ],
+    strategy=config.llm.routing.strategy,
+    eject_after=config.llm.routing.eject_after_failures,
+    probe_interval=config.llm.routing.probe_interval,
+    probe=_probe_deployment,
+    is_failure=is_retryable,
+)
+# Client-side scheduling against the deployments' combined TPM/RPM quotas.
+chat_limiter = QuotaLimiter(
+    tokens_per_minute=_sum_quota(
+        [s.tokens_per_minute for s in config.llm.azure_backends]
+    ),
+    requests_per_minute=_sum_quota(
+        [s.requests_per_minute for s in config.llm.azure_backends]
+    ),
+)
+
+
+def _chat_request(settings: AzureSettings) -> tuple[str, dict]:
+    url = (
+        f"{settings.endpoint}openai/deployments/"
+        f"{settings.chat_deployment}/chat/completions"
+        f"?api-version={settings.api_version}"
+    )
+    headers = {
+        "api-key": settings.api_key,
+        "Content-Type": "application/json",
+    }
+    return url, headers
+
+
+async def azure_chat(
+    messages: list[dict], temperature: float = 0.0, priority: str = "interactive"
+) -> str:
     """
     Sends a chat completion request to the Azure OpenAI service.
 
+    Concurrent requests with identical messages and temperature in the same
+    lane are coalesced into a single call to the service.
+
     Args:
         messages: A list of message dictionaries for the chat.
-        llm_config: The LLM configuration object containing endpoint details.
         temperature: The sampling temperature for the model.
+        priority: The quota lane, "interactive" or "bulk".
 
     Returns:
         The content of the assistant's reply.
     """
-    url = (
-        f"{config.llm.azure.endpoint}openai/deployments/"
-        f"{config.llm.azure.chat_deployment}/chat/completions"
-        f"?api-version={config.llm.azure.api_version}"
+    # Lanes never share a call, so interactive callers never wait on bulk work.
+    key = json.dumps(
+        {"messages": messages, "temperature": temperature, "priority": priority},
+        sort_keys=True,
+        separators=(",", ":"),
     )
-    headers = {
-        "api-key": config.llm.azure.api_key,
-        "Content-Type": "application/json",
-    }
+    return await chat_flight.do(
+        key, lambda: _request_chat(messages, temperature, priority)
+    )
+
 
-    async with httpx.AsyncClient(timeout=config.llm.request_timeout) as client:
-        response = await client.post(
-            url,
-            json={"messages": messages, "temperature": temperature},
-            headers=headers,
+async def _request_chat(messages: list[dict], temperature: float, priority: str) -> str:
+    completion_estimate = config.llm.azure_backends[0].completion_tokens_estimate
+    estimated = estimate_tokens(messages, completion_estimate)
+    sent = 0
+
+    async def request(backend: Backend[AzureSettings]) -> dict:
+        nonlocal sent
+        # The first request uses the reservation acquired below; retries and
+        # hedges are requests too, and are charged to the quotas as sent.
+        if sent:
+            chat_limiter.charge(estimated)
+        sent += 1
+        url, headers = _chat_request(backend.settings)
+        timeout = config.llm.resilience.attempt_timeout
+        with span("azure attempt", deployment=backend.name):
+            async with httpx.AsyncClient(timeout=timeout) as client:
+                response = await client.post(
+                    url,
+                    json={"messages": messages, "temperature": temperature},
+                    headers=headers,
+                )
+                response.raise_for_status()
+                return response.json()
+
+    with span("azure chat", estimated_tokens=estimated, priority=priority) as s:
+        await chat_limiter.acquire(estimated, priority)
+        data = await chat_client.call_balanced("azure:chat", chat_balancer, request)
+        usage = data.get("usage") or {}
+        s.set_attributes(
+            {
+                f"usage.{name}": value
+                for name, value in usage.items()
+                if isinstance(value, int)
+            }
         )
-        response.raise_for_status()
-        return response.json()["choices"][0]["message"]["content"]
+    # Failed attempts keep the estimate as their charge; the successful one
+    # reports its usage.
+    if "total_tokens" in usage:
+        chat_limiter.reconcile(estimated, usage["total_tokens"])
+    # Coalesced callers share the call, and its cost is charged to the first.
+    client = current_client.get()
+    if client is not None:
+        client.charge(usage.get("total_tokens", estimated))
+    return data["choices"][0]["message"]["content"]
+
+
+async def azure_chat_stream(
+    messages: list[dict], temperature: float = 0.0, priority: str = "interactive"
+) -> AsyncIterator[str]:
+    """
+    Streams a chat completion from the Azure OpenAI service.
+
+    Args:
+        messages: A list of message dictionaries for the chat.
+        temperature: The sampling temperature for the model.
+        priority: The quota lane, "interactive" or "bulk".
+
+    Yields:
+        Content deltas of the assistant's reply as they arrive.
+    """
+    completion_estimate = config.llm.azure_backends[0].completion_tokens_estimate
+    estimated = estimate_tokens(messages, completion_estimate)
+    await chat_limiter.acquire(estimated, priority)
+    # Streams do not report usage, so the client is charged the estimate.
+    client = current_client.get()
+    if client is not None:
+        client.charge(estimated)
+
+    backend = chat_balancer.pick()
+    url, headers = _chat_request(backend.settings)
+    async with chat_balancer.track(backend):
+        async with httpx.AsyncClient(timeout=config.llm.request_timeout) as client:
+            async with client.stream(
+                "POST",
+                url,
+                json={
+                    "messages": messages,
+                    "temperature": temperature,
+                    "stream": True,
+                },
+                headers=headers,
+            ) as response:
+                response.raise_for_status()
+                async for line in response.aiter_lines():
+                    # Server-sent events: each payload line is prefixed with "data: "
+                    if not line.startswith("data: "):
+                        continue
+                    payload = line[len("data: ") :]
+                    if payload == "[DONE]":
+                        break
+                    choices = json.loads(payload).get("choices") or []
+                    if not choices:
+                        continue
+                    delta = choices[0].get("delta", {}).get("content")
+                    if delta:
+                        yield delta
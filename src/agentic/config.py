@@ -1,10 +1,73 @@
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional, Union
 from pydantic import BaseModel
 import tomli
 import yaml
 
 
+class RouteLimit(BaseModel):
+    """Admission limits for one route."""
+
+    # Requests handled at once.
+    max_concurrency: int = 32
+    # Requests that may wait for a slot; any more are rejected at once.
+    max_queue: int = 64
+    # Seconds a request may wait for a slot before it is rejected.
+    queue_timeout: float = 5.0
+
+
+class AdmissionSettings(BaseModel):
+    """Per-route concurrency limits that shed load under overload."""
+
+    # Limits by route path; routes not listed are not limited.
+    routes: Dict[str, RouteLimit] = {
+        "/chat": RouteLimit(),
+        "/conversational-chat": RouteLimit(),
+    }
+    # Seconds rejected clients are told to wait, in the Retry-After header.
+    retry_after: int = 1
+
+
+class ApiKeySettings(BaseModel):
+    """A client allowed to call the API with its own key."""
+
+    # Identifies the client in logs and usage counters.
+    name: str
+    key: str
+    # Relative share of capacity when requests have to queue.
+    weight: float = 1.0
+    # Limits for this key alone; None leaves it unlimited.
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+    # Allows the /debug routes, such as the profiler.
+    admin: bool = False
+
+
+class AuthSettings(BaseModel):
+    """Which clients may call the API."""
+
+    # Require a valid X-API-Key header on every route but the public ones.
+    enabled: bool = True
+    # The accepted keys; if empty, `server.api_key` is the only one.
+    keys: List[ApiKeySettings] = []
+    # Routes reachable without a key; /metrics lets Prometheus scrape without one.
+    public_paths: List[str] = [
+        "/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json"
+    ]
+
+
+class LoopMonitorSettings(BaseModel):
+    """Measurement of event loop lag, to find code blocking the loop."""
+
+    enabled: bool = False
+    # Seconds between lag measurements.
+    interval: float = 0.1
+    # Lag, in seconds, at which the stack of the blocking code is logged.
+    threshold: float = 0.25
+    # Seconds between stack logs, so a blocked loop does not flood the log.
+    log_interval: float = 10.0
+
+
 class ServerConfig(BaseModel):
     """Configuration for the FastAPI server."""
 
@@ -12,6 +75,17 @@ class ServerConfig(BaseModel):
     port: int
     api_key: str
     reload: bool
+    # Seconds between write-behind flushes of WebSocket chat sessions.
+    ws_flush_interval: float = 5.0
+    # Messages of a WebSocket chat session kept in memory; older ones are
+    # dropped once they are saved and covered by the session's summary.
+    ws_max_messages: int = 200
+    # Seconds a WebSocket chat may wait for a message before the server
+    # closes it; 0 waits indefinitely.
+    ws_idle_timeout: float = 600.0
+    admission: AdmissionSettings = AdmissionSettings()
+    auth: AuthSettings = AuthSettings()
+    loop_monitor: LoopMonitorSettings = LoopMonitorSettings()
 
 
 class LoggingConfig(BaseModel):
@@ -26,16 +100,93 @@ class LoggingConfig(BaseModel):
     diagnose: bool
     rotation: str
     retention: str
+    # "rich" renders logs for people; "json" writes one JSON object per line
+    # from a background thread, for production.
+    format: str = "rich"
+    # Minimum levels by logger name prefix, e.g. {"src.agentic.balancer": "WARNING"}.
+    levels: Dict[str, str] = {}
+    # Fraction of records kept per level, e.g. {"DEBUG": 0.01}; others are all kept.
+    sampling: Dict[str, float] = {}
+    # Characters of user-supplied text kept in log messages; 0 redacts it and
+    # None keeps it whole.
+    user_content_chars: Optional[int] = 200
+
+
+class SessionSettings(BaseModel):
+    """How chat sessions are kept in Redis."""
+
+    # Every session key starts with this, keeping them apart from other data.
+    key_prefix: str = "agentic:session:"
+    # Seconds of inactivity after which a session expires.
+    ttl: int = 3600
+    # Most recent messages loaded per turn; None loads only what the history
+    # settings need (max_messages + summarize_after).
+    history_window: Optional[int] = None
+    # How stored messages are encoded: "json" or "msgpack", then "none",
+    # "zlib" or "zstd" for values of at least compress_min_bytes.
+    codec: str = "json"
+    compression: str = "zlib"
+    compress_min_bytes: int = 1024
+    compression_level: Optional[int] = None
+    # Sessions kept decoded in each worker's memory; 0 disables the cache.
+    cache_size: int = 0
+    # Most recent messages kept per cached session, unless history_window is
+    # set. It should cover llm.history max_messages + summarize_after, the
+    # messages a turn loads; larger reads go to Redis.
+    cache_messages: int = 30
+    # Pub/sub channel on which workers announce session writes to each other.
+    invalidation_channel: str = "agentic:sessions:invalidate"
+    # Sorted set of session IDs scored by when each was last active.
+    activity_key: str = "agentic:sessions:activity"
+
+
+class SlowQuerySettings(BaseModel):
+    """Capture of slow SQL statements and their plans."""
+
+    enabled: bool = True
+    # Statements taking at least this long are logged.
+    threshold_ms: float = 250.0
+    # Fraction of slow statements re-run with EXPLAIN (ANALYZE, BUFFERS).
+    sample_rate: float = 1.0
+    # Seconds before the same statement is explained again.
+    explain_interval: float = 300.0
+    # Plans are appended here as JSON lines, rotated by size.
+    log_path: str = "slow_queries.jsonl"
+    max_bytes: int = 10_000_000
+    backups: int = 5
+    # A sequential scan on any of these tables flags the plan as an alert.
+    alert_tables: List[str] = ["code_chunks"]
 
 
 class DBConfig(BaseModel):
     database_url: str
     redis_url: str
+    session: SessionSettings = SessionSettings()
+    slow_queries: SlowQuerySettings = SlowQuerySettings()
 
 
 class OllamaSettings(BaseModel):
     embedding_url: str
     embedder_model: str
+    # Relative share of traffic when several Ollama hosts are configured.
+    weight: float = 1.0
+    # Endpoint accepting a list of inputs; derived from embedding_url if unset.
+    batch_embedding_url: Optional[str] = None
+
+
+class EmbeddingSettings(BaseModel):
+    """Selects the embedding backend and how requests to it are shaped."""
+
+    # "ollama", "azure", or "hash" (deterministic, local; for tests/benchmarks)
+    backend: str = "ollama"
+    # Recently embedded texts kept in memory; 0 disables the cache.
+    cache_size: int = 10000
+    batch_max_size: int = 32
+    batch_max_wait_ms: float = 5.0
+    # Embedding requests in flight at once, shared between interactive and bulk.
+    max_concurrency: int = 8
+    # Share of contended dispatches guaranteed to bulk work such as ingestion.
+    bulk_min_share: float = 0.2
 
 
 class AzureSettings(BaseModel):
@@ -43,6 +194,15 @@ class AzureSettings(BaseModel):
     api_key: str
     chat_deployment: str
     api_version: str
+    # Relative share of traffic when several deployments are configured.
+    weight: float = 1.0
+    # Deployment used when llm.embedding.backend is "azure".
+    embedding_deployment: Optional[str] = None
+    # Deployment quotas; calls are scheduled client-side to stay within them.
+    tokens_per_minute: Optional[int] = None
+    requests_per_minute: Optional[int] = None
+    # Completion size assumed when reserving quota for a request.
+    completion_tokens_estimate: int = 512
 
 
 class OpenAISettings(BaseModel):
@@ -55,6 +215,46 @@ class SplitterSettings(BaseModel):
     language: str
 
 
+class ResilienceSettings(BaseModel):
+    """Retry, hedging and circuit breaker policy for model backends."""
+
+    max_retries: int = 3
+    backoff_base: float = 0.5
+    backoff_max: float = 8.0
+    # Upper bound for a single attempt; request_timeout bounds the whole call.
+    attempt_timeout: float = 30.0
+    hedge: bool = False
+    hedge_quantile: float = 0.95
+    hedge_min_samples: int = 20
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+
+
+class RoutingSettings(BaseModel):
+    """How requests are spread across several backends for the same role."""
+
+    # "least_outstanding" or "ewma"
+    strategy: str = "least_outstanding"
+    eject_after_failures: int = 3
+    probe_interval: float = 10.0
+
+
+class HistorySettings(BaseModel):
+    """How much of a conversation is sent to the model on each turn."""
+
+    # Most recent messages sent verbatim.
+    max_messages: int = 20
+    # Estimated token budget for the verbatim messages.
+    max_tokens: int = 6000
+    # Older messages are folded into a rolling summary in the background once
+    # this many have dropped out of the verbatim window; 0 disables summaries.
+    summarize_after: int = 10
+    summary_max_words: int = 300
+    # Most messages folded into the summary per model call, so a long backlog
+    # is summarized in bounded steps.
+    summary_batch: int = 50
+
+
 class LLMConfig(BaseModel):
     """LLM config now includes temperature and timeout."""
 
@@ -62,10 +262,25 @@ class LLMConfig(BaseModel):
     embedding_dim: int
     temperature: float
     request_timeout: float
-    ollama: OllamaSettings
-    azure: AzureSettings
+    embedding: EmbeddingSettings = EmbeddingSettings()
+    resilience: ResilienceSettings = ResilienceSettings()
+    routing: RoutingSettings = RoutingSettings()
+    history: HistorySettings = HistorySettings()
+    # Either a single backend or a list of weighted backends.
+    ollama: Union[OllamaSettings, List[OllamaSettings]]
+    azure: Union[AzureSettings, List[AzureSettings]]
     openai: OpenAISettings
 
+    @property
+    def ollama_backends(self) -> List[OllamaSettings]:
+        """All configured Ollama hosts."""
+        return self.ollama if isinstance(self.ollama, list) else [self.ollama]
+
+    @property
+    def azure_backends(self) -> List[AzureSettings]:
+        """All configured Azure OpenAI deployments."""
+        return self.azure if isinstance(self.azure, list) else [self.azure]
+
 
 class RAGAgentConfig(BaseModel):
     """RAG config now includes ignore patterns for the ingestor."""
@@ -75,6 +290,21 @@ class RAGAgentConfig(BaseModel):
     ingestor_ignore_patterns: List[str]
 
 
+class TracingConfig(BaseModel):
+    """Configuration for OpenTelemetry tracing through logfire."""
+
+    enabled: bool = False
+    service_name: str = "agentic"
+    # Also send spans to the Logfire service (needs a Logfire token).
+    send_to_logfire: bool = False
+    # OTLP/HTTP traces endpoint of a collector, e.g. "http://localhost:4318/v1/traces".
+    otlp_endpoint: Optional[str] = None
+    # Also append every span as a JSON line to this file.
+    file_path: Optional[str] = None
+    # Fraction of traces recorded.
+    sample_rate: float = 1.0
+
+
 class AppConfig(BaseModel):
     """The root configuration model, now including server and logging."""
 
@@ -84,6 +314,7 @@ class AppConfig(BaseModel):
     llm: LLMConfig
     rag: RAGAgentConfig
     splitter: SplitterSettings
+    tracing: TracingConfig = TracingConfig()
 
 
 # --- Configuration Loader ---
@@ -1,4 +1,6 @@
 from src.agentic.config import config
+from src.agentic.slow_queries import InstrumentedPool
+from src.agentic.vectors import decode_vector, encode_vector
 import asyncpg
 import pgvector.asyncpg
 
@@ -9,20 +11,31 @@ _db_pool = None
 async def init_vector_codec(conn):
     """
     An initializer function that is run on every new database connection.
-    It registers the pgvector type handler so that Python lists are
-    correctly translated to and from PostgreSQL vector types.
+    It registers the pgvector type handlers, then replaces the one for
+    `vector` so that embeddings are written straight from NumPy array
+    buffers and read back as float32 arrays.
     """
     await pgvector.asyncpg.register_vector(conn)
+    await conn.set_type_codec(
+        "vector",
+        schema="public",
+        encoder=encode_vector,
+        decoder=decode_vector,
+        format="binary",
+    )
 
 
 async def get_db_pool():
     """
     Gets the existing database connection pool, or creates it if it doesn't exist.
+
+    The pool is wrapped to capture slow statements and their plans.
     """
     global _db_pool
     if _db_pool is None:
         database_url = config.db.database_url
-        _db_pool = await asyncpg.create_pool(dsn=database_url, init=init_vector_codec)
+        pool = await asyncpg.create_pool(dsn=database_url, init=init_vector_codec)
+        _db_pool = InstrumentedPool(pool, config.db.slow_queries)
     return _db_pool
 
 
@@ -0,0 +1,55 @@
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import ContextManager, Iterator, Optional
+
+from starlette.responses import Response
+
+from src.agentic.models import ChatDiagnostics
+
+# The diagnostics collected for the current request, if it is in debug mode.
+current_diagnostics: ContextVar[Optional[ChatDiagnostics]] = ContextVar(
+    "current_diagnostics", default=None
+)
+
+
+def server_timing(timings: dict[str, float]) -> str:
+    """Formats stage durations, in milliseconds, as a Server-Timing header."""
+    return ", ".join(f"{stage};dur={ms:.1f}" for stage, ms in timings.items())
+
+
+@contextmanager
+def _collect(response: Response) -> Iterator[ChatDiagnostics]:
+    diagnostics = ChatDiagnostics()
+    started = time.perf_counter()
+    token = current_diagnostics.set(diagnostics)
+    try:
+        yield diagnostics
+    finally:
+        current_diagnostics.reset(token)
+        diagnostics.timings["total"] = (time.perf_counter() - started) * 1000
+        response.headers["Server-Timing"] = server_timing(diagnostics.timings)
+
+
+def debug_mode(
+    enabled: bool, response: Response
+) -> ContextManager[Optional[ChatDiagnostics]]:
+    """
+    Collects diagnostics of a chat turn if debug mode was requested.
+
+    Inside the block, stage timers and the RAG agent record into the yielded
+    ChatDiagnostics, which is also available as `current_diagnostics`. On
+    exit, the stage durations and the total are set as the response's
+    Server-Timing header. When disabled, nothing is collected and None is
+    yielded.
+
+    Args:
+        enabled: Whether the request asked for debug mode.
+        response: The response to add the Server-Timing header to.
+
+    Returns:
+        A context manager yielding the diagnostics, or None.
+    """
+    if not enabled:
+        return nullcontext()
+    return _collect(response)
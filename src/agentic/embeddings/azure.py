@@ -1,16 +1,75 @@
-# # agentic/azure_embedder.py
-# from agentic.config import Config
-# import httpx
-
-
-# async def get_azure_embedding(text: str) -> list[float]:
-#     base = Config.get("azure_openai_endpoint")
-#     api_key = Config.get("azure_openai_api_key")
-#     api_version = Config.get("azure_openai_api_version")
-#     deployment = Config.get("azure_openai_embedding_deployment")
-#     url = f"{base}openai/deployments/{deployment}/embeddings?api-version={api_version}"
-#     headers = {"api-key": api_key, "Content-Type": "application/json"}
-#     async with httpx.AsyncClient() as client:
-#         response = await client.post(url, json={"input": text}, headers=headers)
-#         response.raise_for_status()
-#         return response.json()["data"][0]["embedding"]
+import httpx
+import numpy as np
+
+from src.agentic.balancer import Backend, LoadBalancer
+from src.agentic.config import AzureSettings, config
+from src.agentic.embeddings.base import register_embedder
+from src.agentic.resilience import ResilientClient, is_retryable
+from src.agentic.vectors import loads, to_matrix
+
+
+class AzureEmbedder:
+    """
+    Embeds texts with an Azure OpenAI embedding deployment.
+
+    Azure accepts large input arrays per request, which makes it well suited
+    to bulk ingestion. Every configured deployment with an
+    `embedding_deployment` set takes part in load balancing.
+    """
+
+    name = "azure"
+    max_batch_size = 2048
+
+    def __init__(self, backends: list[AzureSettings]):
+        """
+        Args:
+            backends: Azure OpenAI resources that host an embedding deployment.
+        """
+        backends = [b for b in backends if b.embedding_deployment]
+        if not backends:
+            raise ValueError(
+                "No Azure embedding deployment is configured "
+                "(llm.azure.embedding_deployment)."
+            )
+        self.client = ResilientClient(config.llm.resilience, config.llm.request_timeout)
+        self.balancer = LoadBalancer(
+            "azure-embedding",
+            [
+                Backend(f"{b.endpoint}{b.embedding_deployment}", b, b.weight)
+                for b in backends
+            ],
+            strategy=config.llm.routing.strategy,
+            eject_after=config.llm.routing.eject_after_failures,
+            probe_interval=config.llm.routing.probe_interval,
+            is_failure=is_retryable,
+        )
+
+    async def embed_batch(self, texts: list[str]) -> np.ndarray:
+        return await self.client.call_balanced(
+            "azure:embedding",
+            self.balancer,
+            lambda backend: _request_embeddings(backend.settings, texts),
+        )
+
+
+@register_embedder("azure")
+def create_azure_embedder() -> AzureEmbedder:
+    return AzureEmbedder(config.llm.azure_backends)
+
+
+async def _request_embeddings(
+    settings: AzureSettings, texts: list[str]
+) -> np.ndarray:
+    url = (
+        f"{settings.endpoint}openai/deployments/"
+        f"{settings.embedding_deployment}/embeddings"
+        f"?api-version={settings.api_version}"
+    )
+    headers = {"api-key": settings.api_key, "Content-Type": "application/json"}
+    timeout = config.llm.resilience.attempt_timeout
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        response = await client.post(url, json={"input": texts}, headers=headers)
+        response.raise_for_status()
+        # Results carry an index; sort to be safe rather than trust the order.
+        data = sorted(loads(response.content)["data"], key=lambda item: item["index"])
+        return to_matrix([item["embedding"] for item in data])
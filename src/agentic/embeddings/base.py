@@ -0,0 +1,208 @@
+from collections import OrderedDict
+from typing import Callable, Optional, Protocol
+
+import numpy as np
+
+from src.agentic.config import EmbeddingSettings, config
+from src.agentic.embeddings.batcher import MicroBatcher
+from src.agentic.embeddings.scheduler import EmbeddingScheduler
+from src.agentic.metrics import CACHE_REQUESTS
+from src.agentic.ratelimit import LANES
+from src.agentic.singleflight import SingleFlight
+from src.agentic.vectors import to_matrix
+
+_cache_hits = CACHE_REQUESTS.labels("embedding", "hit")
+_cache_misses = CACHE_REQUESTS.labels("embedding", "miss")
+
+
+class Embedder(Protocol):
+    """A backend that turns texts into embedding vectors."""
+
+    # The registry name of the backend, e.g. "ollama".
+    name: str
+    # The most texts the backend accepts in a single request.
+    max_batch_size: int
+
+    async def embed_batch(self, texts: list[str]) -> np.ndarray:
+        """Embeds `texts`, returning a float32 array with one row per text."""
+        ...
+
+
+_registry: dict[str, Callable[[], Embedder]] = {}
+_service: Optional["EmbeddingService"] = None
+
+
+def register_embedder(name: str):
+    """Registers an embedder factory under `name` for selection by config."""
+
+    def decorator(factory: Callable[[], Embedder]) -> Callable[[], Embedder]:
+        _registry[name] = factory
+        return factory
+
+    return decorator
+
+
+def create_embedder(name: str) -> Embedder:
+    """Builds the embedder registered under `name`."""
+    # Importing the backends registers them.
+    from src.agentic.embeddings import azure, fake, ollama  # noqa: F401
+
+    if name not in _registry:
+        raise ValueError(
+            f"Unknown embedding backend '{name}'. "
+            f"Available: {', '.join(sorted(_registry))}."
+        )
+    return _registry[name]()
+
+
+def get_embedder() -> "EmbeddingService":
+    """Returns the shared embedding service for the configured backend."""
+    global _service
+    if _service is None:
+        settings = config.llm.embedding
+        _service = EmbeddingService(create_embedder(settings.backend), settings)
+    return _service
+
+
+class EmbeddingService:
+    """
+    Adds caching, coalescing, batching and scheduling to any Embedder.
+
+    Single texts are collected into batches per lane, identical concurrent
+    texts share one request, recently embedded texts are served from an
+    in-process LRU cache, and requests to the backend are scheduled so that
+    interactive queries go ahead of bulk ingestion.
+
+    Vectors are float32 arrays that are shared with the cache rather than
+    copied, so they are read-only; callers that need to modify one should
+    take a copy first.
+    """
+
+    def __init__(self, backend: Embedder, settings: EmbeddingSettings):
+        """
+        Args:
+            backend: The embedder that performs the requests.
+            settings: Batching, caching and concurrency settings.
+        """
+        self.backend = backend
+        self.cache_size = settings.cache_size
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self._cache: OrderedDict[str, np.ndarray] = OrderedDict()
+        self.flight = SingleFlight("embedding")
+        self.scheduler = EmbeddingScheduler(
+            max_concurrency=settings.max_concurrency,
+            bulk_min_share=settings.bulk_min_share,
+        )
+        batch_size = min(settings.batch_max_size, backend.max_batch_size)
+        self.batchers = {
+            lane: MicroBatcher(
+                lambda texts, lane=lane: self._embed_uncached(texts, lane),
+                max_batch_size=batch_size,
+                max_wait_ms=settings.batch_max_wait_ms,
+            )
+            for lane in LANES
+        }
+
+    async def embed(self, text: str, lane: str = "interactive") -> np.ndarray:
+        """
+        Embeds a single text, batching it with other concurrent texts.
+
+        Args:
+            text: The text to embed.
+            lane: The scheduling lane, "interactive" or "bulk".
+
+        Returns:
+            The read-only embedding vector for `text`.
+        """
+        cached = self._cache_get(text)
+        if cached is not None:
+            return cached
+        if lane not in self.batchers:
+            raise ValueError(f"Unknown priority lane '{lane}'.")
+        # Lanes never share a call, so interactive callers never wait on bulk work.
+        return await self.flight.do(
+            (lane, text), lambda: self.batchers[lane].embed(text)
+        )
+
+    async def embed_many(self, texts: list[str], lane: str = "bulk") -> np.ndarray:
+        """
+        Embeds many texts, splitting them into requests the backend accepts.
+
+        Args:
+            texts: The texts to embed.
+            lane: The scheduling lane, "interactive" or "bulk".
+
+        Returns:
+            A read-only float32 array with one embedding row per text, in order.
+        """
+        if not texts:
+            return to_matrix([])
+        vectors: list[Optional[np.ndarray]] = [self._cache_get(t) for t in texts]
+        missing = [i for i, v in enumerate(vectors) if v is None]
+        if len(missing) == len(texts):
+            return await self._embed_uncached(texts, lane)
+        if missing:
+            results = await self._embed_uncached([texts[i] for i in missing], lane)
+            for i, vector in zip(missing, results):
+                vectors[i] = vector
+        matrix = np.stack(vectors)
+        matrix.flags.writeable = False
+        return matrix
+
+    async def _embed_uncached(self, texts: list[str], lane: str) -> np.ndarray:
+        chunks: list[np.ndarray] = []
+        step = self.backend.max_batch_size
+        for start in range(0, len(texts), step):
+            batch = texts[start : start + step]
+            results = await self.scheduler.run(
+                lane, lambda batch=batch: self.backend.embed_batch(batch)
+            )
+            results = to_matrix(results)
+            if len(results) != len(batch):
+                raise ValueError(
+                    f"Embedding backend '{self.backend.name}' returned "
+                    f"{len(results)} vectors for {len(batch)} texts."
+                )
+            # Rows are views into the batch array; nothing is copied per text.
+            for text, vector in zip(batch, results):
+                self._cache_put(text, vector)
+            chunks.append(results)
+        if len(chunks) == 1:
+            return chunks[0]
+        matrix = np.concatenate(chunks)
+        matrix.flags.writeable = False
+        return matrix
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend.name,
+            "cache_size": len(self._cache),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "coalesced": self.flight.coalesced,
+            "batches": sum(b.batches for b in self.batchers.values()),
+            "batched_texts": sum(b.batched_texts for b in self.batchers.values()),
+            "queue": self.scheduler.stats(),
+        }
+
+    def _cache_get(self, text: str) -> Optional[np.ndarray]:
+        if not self.cache_size:
+            return None
+        vector = self._cache.get(text)
+        if vector is None:
+            self.cache_misses += 1
+            _cache_misses.inc()
+            return None
+        self._cache.move_to_end(text)
+        self.cache_hits += 1
+        _cache_hits.inc()
+        return vector
+
+    def _cache_put(self, text: str, vector: np.ndarray):
+        if not self.cache_size:
+            return
+        self._cache[text] = vector
+        self._cache.move_to_end(text)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
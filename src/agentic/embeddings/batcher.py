@@ -0,0 +1,99 @@
+import asyncio
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+BatchFn = Callable[[list[str]], Awaitable[np.ndarray]]
+
+
+class MicroBatcher:
+    """
+    Collects concurrent single-text embedding requests into batched calls.
+
+    Texts are buffered until either `max_batch_size` of them have arrived or
+    `max_wait_ms` has passed since the first one, then sent to the backend as
+    one request. Each caller receives the vector for its own text.
+    """
+
+    def __init__(
+        self,
+        batch_fn: BatchFn,
+        max_batch_size: int = 32,
+        max_wait_ms: float = 5.0,
+    ):
+        """
+        Args:
+            batch_fn: Embeds a list of texts, returning one row per text in order.
+            max_batch_size: The most texts to send in a single request.
+            max_wait_ms: How long the first text in a batch may wait for others.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.batches = 0
+        self.batched_texts = 0
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def embed(self, text: str) -> np.ndarray:
+        """
+        Queues a text for the next batch and waits for its embedding.
+
+        Args:
+            text: The text to embed.
+
+        Returns:
+            The embedding vector for `text`.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch = self._pending[: self.max_batch_size]
+        self._pending = self._pending[self.max_batch_size :]
+        if self._pending:
+            # More arrived than fit in one batch; start the clock for the rest.
+            loop = asyncio.get_running_loop()
+            self._timer = loop.call_later(self.max_wait_ms / 1000, self._flush)
+
+        task = asyncio.create_task(self._run(batch))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]):
+        # Callers that were cancelled while waiting are dropped from the batch.
+        live = [(text, future) for text, future in batch if not future.done()]
+        if not live:
+            return
+
+        self.batches += 1
+        self.batched_texts += len(live)
+        try:
+            vectors = await self.batch_fn([text for text, _ in live])
+            if len(vectors) != len(live):
+                raise ValueError(
+                    f"Embedding backend returned {len(vectors)} vectors "
+                    f"for {len(live)} texts."
+                )
+        except Exception as e:
+            for _, future in live:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), vector in zip(live, vectors):
+            if not future.done():
+                future.set_result(vector)
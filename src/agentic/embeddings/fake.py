@@ -0,0 +1,49 @@
+import hashlib
+import re
+
+import numpy as np
+
+from src.agentic.config import config
+from src.agentic.embeddings.base import register_embedder
+
+_TOKEN = re.compile(r"\w+")
+
+
+class HashEmbedder:
+    """
+    A deterministic, local embedder for tests and benchmarks.
+
+    Each word is hashed to a dimension and sign (the "hashing trick"), so
+    texts that share words get similar vectors without any model or network.
+    """
+
+    name = "hash"
+    max_batch_size = 4096
+
+    def __init__(self, dim: int):
+        """
+        Args:
+            dim: The length of the produced vectors.
+        """
+        self.dim = dim
+
+    def embed_text(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _TOKEN.findall(text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            vector[value % self.dim] += 1.0 if value >> 63 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    async def embed_batch(self, texts: list[str]) -> np.ndarray:
+        matrix = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, text in enumerate(texts):
+            matrix[i] = self.embed_text(text)
+        matrix.flags.writeable = False
+        return matrix
+
+
+@register_embedder("hash")
+def create_hash_embedder() -> HashEmbedder:
+    return HashEmbedder(config.llm.embedding_dim)
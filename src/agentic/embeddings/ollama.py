@@ -1,15 +1,120 @@
-from src.agentic.config import config
+from typing import Awaitable, Callable, TypeVar
+from urllib.parse import urlsplit
+
+from src.agentic.balancer import Backend, LoadBalancer
+from src.agentic.config import OllamaSettings, config
+from src.agentic.embeddings.base import register_embedder
+from src.agentic.resilience import ResilientClient, is_retryable
+from src.agentic.vectors import loads, to_matrix
 import httpx
+import numpy as np
+
+T = TypeVar("T")
+
+
+async def _probe_host(settings: OllamaSettings):
+    parts = urlsplit(settings.embedding_url)
+    async with httpx.AsyncClient(timeout=5.0) as client:
+        response = await client.get(f"{parts.scheme}://{parts.netloc}/api/version")
+        response.raise_for_status()
+
+
+# Retries, hedging and circuit breaking for the Ollama hosts.
+embedding_client = ResilientClient(config.llm.resilience, config.llm.request_timeout)
+# Spreads requests across the configured Ollama hosts.
+embedding_balancer = LoadBalancer(
+    "embedding",
+    [Backend(s.embedding_url, s, s.weight) for s in config.llm.ollama_backends],
+    strategy=config.llm.routing.strategy,
+    eject_after=config.llm.routing.eject_after_failures,
+    probe_interval=config.llm.routing.probe_interval,
+    probe=_probe_host,
+    is_failure=is_retryable,
+)
+
+
+class OllamaEmbedder:
+    """Embeds texts with Ollama's batch endpoint across the configured hosts."""
+
+    name = "ollama"
+    max_batch_size = 512
+
+    async def embed_batch(self, texts: list[str]) -> np.ndarray:
+        return await get_ollama_embeddings(texts)
+
+
+@register_embedder("ollama")
+def create_ollama_embedder() -> OllamaEmbedder:
+    return OllamaEmbedder()
+
+
+async def get_ollama_embedding(text: str) -> np.ndarray:
+    _model()
+    return await _call(lambda s: _request_embedding(s, text))
 
 
-async def get_ollama_embedding(text: str) -> list[float]:
-    url = config.llm.ollama.embedding_url
+async def get_ollama_embeddings(texts: list[str]) -> np.ndarray:
+    """
+    Embeds several texts with a single request to Ollama's batch endpoint.
+
+    Args:
+        texts: The texts to embed.
+
+    Returns:
+        A read-only float32 array with one embedding row per text, in order.
+    """
+    _model()
+    return await _call(lambda s: _request_embeddings(s, texts))
+
+
+def get_batch_embedding_url(settings: OllamaSettings) -> str:
+    """Returns the Ollama endpoint used for batched embedding requests."""
+    if settings.batch_embedding_url:
+        return settings.batch_embedding_url
+    url = settings.embedding_url
     if not url:
         raise ValueError("Ollama URL is missing in configuration.")
-    model = config.llm.ollama.embedder_model
+    # The legacy /api/embeddings endpoint takes one prompt; /api/embed takes many.
+    if url.rstrip("/").endswith("/api/embeddings"):
+        return url.rstrip("/")[: -len("embeddings")] + "embed"
+    return url
+
+
+def _model() -> str:
+    # All hosts must serve the same model for their vectors to be comparable.
+    model = config.llm.ollama_backends[0].embedder_model
     if not model:
         raise ValueError("Ollama model is missing in configuration.")
-    async with httpx.AsyncClient(timeout=config.llm.request_timeout) as client:
-        response = await client.post(url, json={"model": model, "prompt": text})
+    return model
+
+
+async def _call(request: Callable[[OllamaSettings], Awaitable[T]]) -> T:
+    return await embedding_client.call_balanced(
+        "ollama:embedding", embedding_balancer, lambda backend: request(backend.settings)
+    )
+
+
+async def _request_embedding(settings: OllamaSettings, text: str) -> np.ndarray:
+    if not settings.embedding_url:
+        raise ValueError("Ollama URL is missing in configuration.")
+    timeout = config.llm.resilience.attempt_timeout
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        response = await client.post(
+            settings.embedding_url,
+            json={"model": settings.embedder_model, "prompt": text},
+        )
+        response.raise_for_status()
+        return to_matrix([loads(response.content)["embedding"]])[0]
+
+
+async def _request_embeddings(
+    settings: OllamaSettings, texts: list[str]
+) -> np.ndarray:
+    timeout = config.llm.resilience.attempt_timeout
+    async with httpx.AsyncClient(timeout=timeout) as client:
+        response = await client.post(
+            get_batch_embedding_url(settings),
+            json={"model": settings.embedder_model, "input": texts},
+        )
         response.raise_for_status()
-        return response.json()["embedding"]
+        return to_matrix(loads(response.content)["embeddings"])
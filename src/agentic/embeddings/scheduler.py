@@ -0,0 +1,122 @@
+import asyncio
+import time
+from collections import deque
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from src.agentic.ratelimit import LANES
+
+T = TypeVar("T")
+
+
+class _LaneStats:
+    def __init__(self):
+        self.dispatched = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record(self, wait: float):
+        self.dispatched += 1
+        self.total_wait += wait
+        self.max_wait = max(self.max_wait, wait)
+
+
+class EmbeddingScheduler:
+    """
+    Shares a fixed number of concurrent embedding requests between lanes.
+
+    Interactive requests are dispatched ahead of bulk ones, but while both
+    lanes are waiting, bulk work is still guaranteed `bulk_min_share` of the
+    dispatches so that a long ingestion keeps making progress.
+    """
+
+    def __init__(self, max_concurrency: int = 8, bulk_min_share: float = 0.2):
+        """
+        Args:
+            max_concurrency: The most embedding requests in flight at once.
+            bulk_min_share: The fraction of contended dispatches reserved for
+                the bulk lane, between 0 and 1.
+        """
+        self.max_concurrency = max_concurrency
+        self.bulk_min_share = bulk_min_share
+        self.in_flight = 0
+        self._queues: dict[str, deque[asyncio.Future]] = {
+            lane: deque() for lane in LANES
+        }
+        self._stats = {lane: _LaneStats() for lane in LANES}
+        self._bulk_credit = 0.0
+
+    async def run(self, lane: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Waits for a free slot in the given lane, then runs `fn`.
+
+        Args:
+            lane: "interactive" or "bulk".
+            fn: A zero-argument callable returning the request to run.
+
+        Returns:
+            The result of `fn`.
+        """
+        if lane not in self._queues:
+            raise ValueError(f"Unknown priority lane '{lane}'.")
+
+        enqueued = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        self._queues[lane].append(future)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future in self._queues[lane]:
+                self._queues[lane].remove(future)
+            elif future.done() and not future.cancelled():
+                # The slot was granted just before cancellation; hand it on.
+                self.in_flight -= 1
+                self._dispatch()
+            raise
+        self._stats[lane].record(time.monotonic() - enqueued)
+
+        try:
+            return await fn()
+        finally:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def stats(self) -> dict:
+        """Returns queue depth and wait times for each lane."""
+        lanes = {
+            lane: {
+                "queued": len(self._queues[lane]),
+                "dispatched": stats.dispatched,
+                "avg_wait_ms": (
+                    round(stats.total_wait / stats.dispatched * 1000, 2)
+                    if stats.dispatched
+                    else 0.0
+                ),
+                "max_wait_ms": round(stats.max_wait * 1000, 2),
+            }
+            for lane, stats in self._stats.items()
+        }
+        return {"in_flight": self.in_flight, "lanes": lanes}
+
+    def _next_lane(self) -> Optional[str]:
+        interactive, bulk = self._queues["interactive"], self._queues["bulk"]
+        if not interactive:
+            return "bulk" if bulk else None
+        if not bulk:
+            return "interactive"
+        # Both lanes are waiting: bulk earns credit on every contended dispatch
+        # and is served whenever it has saved up a whole one.
+        self._bulk_credit += self.bulk_min_share
+        if self._bulk_credit >= 1.0:
+            self._bulk_credit -= 1.0
+            return "bulk"
+        return "interactive"
+
+    def _dispatch(self):
+        while self.in_flight < self.max_concurrency:
+            lane = self._next_lane()
+            if lane is None:
+                return
+            future = self._queues[lane].popleft()
+            self.in_flight += 1
+            future.set_result(None)
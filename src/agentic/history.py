@@ -0,0 +1,226 @@
+import asyncio
+from typing import Callable, Optional
+
+from loguru import logger
+
+from src.agentic.chat.azure import azure_chat
+from src.agentic.config import HistorySettings, config
+from src.agentic.models import Message, SessionSummary
+from src.agentic.ratelimit import message_tokens
+from src.agentic.session_store import SessionStore
+
+SUMMARY_PROMPT = (
+    "You maintain a running summary of a conversation between a user and a "
+    "code analysis assistant. Update the summary with the new messages. Keep "
+    "facts, decisions, file and symbol names, and open questions; drop "
+    "pleasantries. Answer with the summary only, in at most {words} words."
+)
+
+
+class HistoryManager:
+    """
+    Bounds the conversation history sent to the model on each turn.
+
+    The most recent messages are kept verbatim within a message and token
+    budget. Older messages are folded into a rolling summary, which is
+    written by a background task off the request path and stored with the
+    session, so the prompt stays the same size however long a conversation
+    runs.
+    """
+
+    def __init__(self, settings: HistorySettings):
+        """
+        Args:
+            settings: The verbatim window and summary settings.
+        """
+        self.settings = settings
+        self._summarizing: set[str] = set()
+        self._tasks: set[asyncio.Task] = set()
+
+    @property
+    def load_limit(self) -> int:
+        """
+        The most recent messages to load for a turn: the verbatim window plus
+        those that may drop out of it before the summary catches up.
+        """
+        return self.settings.max_messages + self.settings.summarize_after
+
+    async def load(
+        self, store: SessionStore, session_id: str
+    ) -> tuple[list[Message], int, Optional[SessionSummary]]:
+        """
+        Loads the part of a session needed to build the next prompt.
+
+        Args:
+            store: The session store holding the conversation.
+            session_id: The unique identifier for the chat session.
+
+        Returns:
+            The most recent messages, the position of the first of them in the
+            session, and the rolling summary if one has been written.
+        """
+        limit = store.history_window or self.load_limit
+        return await store.get_window(session_id, limit)
+
+    def window(
+        self,
+        messages: list[Message],
+        summary: Optional[SessionSummary] = None,
+        offset: int = 0,
+    ) -> list[Message]:
+        """
+        Selects the messages to send to the model.
+
+        Args:
+            messages: The conversation, ending with the latest user message.
+            summary: The rolling summary of the older part of the conversation.
+            offset: The position of the first of `messages` in the session.
+
+        Returns:
+            The most recent messages that fit the budget, preceded by the
+            summary as a system message if there is one. While summaries are
+            enabled, up to `summarize_after` more messages the summary does
+            not cover yet are kept too, within another `max_tokens`; any
+            older ones wait for the summary to catch up.
+        """
+        start = self._split(messages)
+        if self.settings.summarize_after:
+            covered = summary.covered if summary else 0
+            start = self._backlog_start(messages, start, covered - offset)
+        recent = messages[start:]
+        if summary is None:
+            return recent
+        note = Message(
+            role="system",
+            content=f"Summary of the earlier conversation:\n{summary.content}",
+        )
+        return [note] + recent
+
+    def schedule_summary(
+        self,
+        store: SessionStore,
+        session_id: str,
+        messages: list[Message],
+        offset: int,
+        summary: Optional[SessionSummary],
+        on_summary: Optional[Callable[[SessionSummary], None]] = None,
+    ):
+        """
+        Updates the session's summary in the background if enough messages
+        have dropped out of the verbatim window since it was last written.
+
+        Args:
+            store: The session store holding the conversation.
+            session_id: The unique identifier for the chat session.
+            messages: The most recent messages, including the latest turn.
+            offset: The position of the first of `messages` in the session.
+            summary: The current summary, if any.
+            on_summary: Called with the new summary once it has been saved.
+        """
+        if not self.settings.summarize_after or session_id in self._summarizing:
+            return
+        covered = summary.covered if summary else 0
+        boundary = offset + self._split(messages)
+        if boundary - covered < self.settings.summarize_after:
+            return
+
+        self._summarizing.add(session_id)
+        task = asyncio.create_task(
+            self._summarize(
+                store, session_id, messages, offset, summary, boundary, on_summary
+            )
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        task.add_done_callback(lambda _: self._summarizing.discard(session_id))
+
+    def _split(self, messages: list[Message]) -> int:
+        # Index of the first message kept verbatim; the latest is always kept.
+        budget = self.settings.max_tokens
+        start = len(messages)
+        while start > 0 and len(messages) - start < self.settings.max_messages:
+            cost = message_tokens(messages[start - 1].content)
+            if cost > budget and start < len(messages):
+                break
+            budget -= cost
+            start -= 1
+        return start
+
+    def _backlog_start(
+        self, messages: list[Message], start: int, first_uncovered: int
+    ) -> int:
+        # Moves the start back over messages the summary does not cover yet,
+        # within a hard message and token cap.
+        limit = max(start - self.settings.summarize_after, first_uncovered, 0)
+        budget = self.settings.max_tokens
+        while start > limit:
+            cost = message_tokens(messages[start - 1].content)
+            if cost > budget:
+                break
+            budget -= cost
+            start -= 1
+        return start
+
+    async def _summarize(
+        self,
+        store: SessionStore,
+        session_id: str,
+        messages: list[Message],
+        offset: int,
+        summary: Optional[SessionSummary],
+        boundary: int,
+        on_summary: Optional[Callable[[SessionSummary], None]],
+    ):
+        covered = summary.covered if summary else 0
+        updated = summary
+        try:
+            # A long backlog is folded in a bounded batch of messages at a time,
+            # saving the progress after each one.
+            while covered < boundary:
+                stop = min(boundary, covered + self.settings.summary_batch)
+                updated = await self._summarize_batch(
+                    store, session_id, messages, offset, updated, stop
+                )
+                await store.set_summary(session_id, updated)
+                covered = stop
+        except Exception as e:
+            logger.error(f"Failed to summarize session {session_id}: {e}")
+        if on_summary is not None and updated is not summary:
+            on_summary(updated)
+
+    async def _summarize_batch(
+        self,
+        store: SessionStore,
+        session_id: str,
+        messages: list[Message],
+        offset: int,
+        summary: Optional[SessionSummary],
+        stop: int,
+    ) -> SessionSummary:
+        covered = summary.covered if summary else 0
+        # Messages no longer in memory are read back from the store.
+        older = await store.get_range(session_id, covered, min(offset, stop))
+        pending = older + messages[max(covered - offset, 0) : max(stop - offset, 0)]
+        transcript = "\n".join(f"{m.role}: {m.content}" for m in pending)
+        previous = summary.content if summary else "(none)"
+        content = await azure_chat(
+            [
+                {
+                    "role": "system",
+                    "content": SUMMARY_PROMPT.format(
+                        words=self.settings.summary_max_words
+                    ),
+                },
+                {
+                    "role": "user",
+                    "content": f"Current summary:\n{previous}\n\n"
+                    f"New messages:\n{transcript}",
+                },
+            ],
+            priority="bulk",
+        )
+        return SessionSummary(content=content, covered=stop)
+
+
+# Shared by the agents and chat endpoints.
+history_manager = HistoryManager(config.llm.history)
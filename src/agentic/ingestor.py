@@ -1,4 +1,4 @@
-import asyncio
+import time
 import asyncpg
 from pathlib import Path
 
@@ -8,7 +8,9 @@ from llama_index.core.node_parser import CodeSplitter
 
 from src.agentic.config import config
 from src.agentic.utils import read_ignore_file
-from src.agentic.embeddings.ollama import get_ollama_embedding
+from src.agentic.embeddings.base import get_embedder
+from src.agentic.metrics import INGESTED_CHUNKS, INGESTED_EMBEDDINGS, INGESTED_FILES
+from src.agentic.tracing import span
 
 
 class CodeIngestor:
@@ -40,41 +42,51 @@ class CodeIngestor:
     def load_and_split(self):
         """Loads documents and splits them into code-aware nodes."""
         logger.info(f"Loading Python files from '{self.reader.input_dir}'...")
-        docs = self.reader.load_data()
-        self.nodes = self.splitter.get_nodes_from_documents(docs)
+        with span("load and split", input_dir=str(self.reader.input_dir)) as s:
+            docs = self.reader.load_data()
+            INGESTED_FILES.inc(len(docs))
+            self.nodes = self.splitter.get_nodes_from_documents(docs)
+            s.set_attributes({"files": len(docs), "nodes": len(self.nodes)})
         logger.success(f"Loaded and split documents into {len(self.nodes)} nodes.")
         return self.nodes
 
-    async def _embed_and_save(self, pool: asyncpg.Pool, node):
-        """Helper function to embed a single node and save it to the DB."""
-        file_path = node.metadata.get("file_path", "unknown")
-        code_chunk = node.get_content()
-
-        if not code_chunk.strip():
-            logger.warning(f"Skipping empty chunk from {file_path}.")
+    async def _embed_and_save(self, pool: asyncpg.Pool, nodes: list):
+        """Helper function to embed a batch of nodes together and save them to the DB."""
+        rows = []
+        for node in nodes:
+            file_path = node.metadata.get("file_path", "unknown")
+            code_chunk = node.get_content()
+            if not code_chunk.strip():
+                logger.warning(f"Skipping empty chunk from {file_path}.")
+                continue
+            rows.append((node.id_, self.repo_name, file_path, code_chunk))
+        if not rows:
             return
 
+        files = sorted({row[2] for row in rows})
         try:
-            embedding = await get_ollama_embedding(code_chunk)
-            await pool.execute(
-                """
-                INSERT INTO code_chunks (id, repo_name, file_path, chunk, embedding)
-                VALUES ($1, $2, $3, $4, $5)
-                ON CONFLICT (id) DO UPDATE SET
-                repo_name = EXCLUDED.repo_name,
-                file_path = EXCLUDED.file_path,
-                chunk = EXCLUDED.chunk,
-                embedding = EXCLUDED.embedding;
-                """,
-                node.id_,
-                self.repo_name,  # Pass the repo name to the query
-                file_path,
-                code_chunk,
-                embedding,
-            )
-            logger.trace(f"Successfully ingested chunk from {file_path}")
+            with span("ingest batch", chunks=len(rows), files=files):
+                # One request for the whole batch, split only at the backend's limit.
+                embeddings = await get_embedder().embed_many(
+                    [row[3] for row in rows], lane="bulk"
+                )
+                INGESTED_EMBEDDINGS.inc(len(rows))
+                await pool.executemany(
+                    """
+                    INSERT INTO code_chunks (id, repo_name, file_path, chunk, embedding)
+                    VALUES ($1, $2, $3, $4, $5)
+                    ON CONFLICT (id) DO UPDATE SET
+                    repo_name = EXCLUDED.repo_name,
+                    file_path = EXCLUDED.file_path,
+                    chunk = EXCLUDED.chunk,
+                    embedding = EXCLUDED.embedding;
+                    """,
+                    [(*row, embedding) for row, embedding in zip(rows, embeddings)],
+                )
+            INGESTED_CHUNKS.inc(len(rows))
+            logger.trace("Successfully ingested {} chunks from {}", len(rows), files)
         except Exception as e:
-            logger.error(f"Failed to ingest chunk from {file_path}: {e}")
+            logger.error(f"Failed to ingest {len(rows)} chunks from {', '.join(files)}: {e}")
 
     async def ingest(self, pool: asyncpg.Pool, batch_size: int = 10):
         """
@@ -82,7 +94,7 @@ class CodeIngestor:
 
         Args:
             pool: The asyncpg connection pool.
-            batch_size: The number of nodes to process concurrently.
+            batch_size: The number of nodes embedded and saved together.
         """
         if self.nodes is None:
             self.load_and_split()
@@ -91,18 +103,18 @@ class CodeIngestor:
             logger.warning("No nodes found to ingest.")
             return
 
-        logger.info(f"Ingesting {len(self.nodes)} nodes in batches of {batch_size}...")
-        tasks = []
-        for node in self.nodes:
-            tasks.append(self._embed_and_save(pool, node))
-            if len(tasks) >= batch_size:
-                await asyncio.gather(*tasks)
-                tasks = []
-
-        if tasks:  # Process any remaining tasks
-            await asyncio.gather(*tasks)
-
-        logger.success("Ingestion complete.")
+        logger.info("Ingesting {} nodes in batches of {}...", len(self.nodes), batch_size)
+        started, chunks_before = time.monotonic(), INGESTED_CHUNKS.labels().value
+        with span("ingest {repo_name}", repo_name=self.repo_name, nodes=len(self.nodes)):
+            for start in range(0, len(self.nodes), batch_size):
+                await self._embed_and_save(pool, self.nodes[start : start + batch_size])
+
+        elapsed = time.monotonic() - started
+        chunks = INGESTED_CHUNKS.labels().value - chunks_before
+        logger.success(
+            f"Ingestion complete: {chunks:.0f} chunks in {elapsed:.1f}s "
+            f"({chunks / elapsed if elapsed else 0:.1f} chunks/s)."
+        )
 
 
 # import asyncio
@@ -1,29 +1,128 @@
 # agentic/logging_setup.py
+import json
+import random
 import sys
+import traceback
+from typing import Callable, Optional
+
 from loguru import logger
 from src.agentic.config import LoggingConfig
 from src.agentic.formatting.console import get_rich_handler
 
+# Characters of user-supplied text kept in log messages; set by setup_logging.
+_user_content_chars: Optional[int] = 200
+
+
+class UserContent:
+    """
+    User-supplied text in a log message, such as a chat message.
+
+    Pass it as a formatting argument, e.g.
+    `logger.info("Query: '{}'", user_text(message))`, and it is cut to the
+    configured length, or redacted, only when the message is rendered.
+    """
+
+    __slots__ = ("text",)
+
+    def __init__(self, text: str):
+        self.text = text
+
+    def __str__(self) -> str:
+        limit = _user_content_chars
+        if limit is None or len(self.text) <= limit:
+            return self.text
+        if limit == 0:
+            return f"<redacted, {len(self.text)} chars>"
+        return f"{self.text[:limit]}... (+{len(self.text) - limit} chars)"
+
+
+def user_text(text: str) -> UserContent:
+    """Marks text as user content for a log message."""
+    return UserContent(text)
+
+
+def _json_line(record) -> str:
+    entry = {
+        "time": record["time"].isoformat(),
+        "level": record["level"].name,
+        "logger": record["name"],
+        "function": record["function"],
+        "line": record["line"],
+        "message": record["message"],
+    }
+    if record["exception"] is not None:
+        entry["exception"] = "".join(traceback.format_exception(*record["exception"]))
+    record["extra"]["_json"] = json.dumps(entry, default=str)
+    return "{extra[_json]}\n"
+
+
+def _make_filter(log_config: LoggingConfig) -> Optional[Callable]:
+    """Builds the per-logger levels and per-level sampling filter, if any."""
+    if not log_config.levels and not log_config.sampling:
+        return None
+    # Longest prefix first, so the most specific level applies.
+    levels = sorted(
+        ((name, logger.level(level.upper()).no) for name, level in log_config.levels.items()),
+        key=lambda item: -len(item[0]),
+    )
+    sampling = {
+        logger.level(level.upper()).no: rate
+        for level, rate in log_config.sampling.items()
+    }
+
+    def accept(record) -> bool:
+        name, level = record["name"] or "", record["level"].no
+        for prefix, minimum in levels:
+            if name == prefix or name.startswith(prefix + "."):
+                if level < minimum:
+                    return False
+                break
+        rate = sampling.get(level)
+        return rate is None or random.random() < rate
+
+    return accept
+
 
 def setup_logging(log_config: LoggingConfig):
     """Configures the application's logger based on config settings."""
+    global _user_content_chars
+    _user_content_chars = log_config.user_content_chars
     logger.remove()  # Remove the default handler
+    accept = _make_filter(log_config)
 
-    # Use our custom RichHandler for all console output
-    logger.add(
-        get_rich_handler(),
-        level=log_config.log_level.upper(),
-        format="{message}", # RichHandler handles its own formatting
-    )
+    structured = log_config.format == "json"
+    if structured:
+        # Lines are written by loguru's queue thread, so callers never wait on
+        # stdout; there is no Rich rendering or locals in tracebacks.
+        logger.add(
+            sys.stdout,
+            level=log_config.log_level.upper(),
+            format=_json_line,
+            filter=accept,
+            colorize=False,
+            enqueue=True,
+            backtrace=False,
+            diagnose=False,
+        )
+    else:
+        # Use our custom RichHandler for all console output
+        logger.add(
+            get_rich_handler(),
+            level=log_config.log_level.upper(),
+            format="{message}", # RichHandler handles its own formatting
+            filter=accept,
+        )
 
     # Add a handler for file output if enabled
     if log_config.log_to_file:
         logger.add(
             log_config.log_file_path,
             level=log_config.log_level.upper(),
+            filter=accept,
             rotation=log_config.rotation,
             retention=log_config.retention,
-            enqueue=log_config.enqueue,
+            enqueue=log_config.enqueue or structured,
             backtrace=log_config.backtrace,
-            diagnose=log_config.diagnose,
+            diagnose=log_config.diagnose and not structured,
+            **({"format": _json_line} if structured else {}),
         )
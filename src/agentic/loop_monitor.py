@@ -0,0 +1,102 @@
+import asyncio
+import math
+import sys
+import threading
+import time
+import traceback
+from typing import Optional
+
+from loguru import logger
+
+from src.agentic.config import LoopMonitorSettings
+from src.agentic.metrics import LOOP_LAG_SECONDS, LOOP_STALLS
+
+
+class LoopMonitor:
+    """
+    Measures event loop lag and reports the code that blocks the loop.
+
+    A task on the loop sleeps `interval` seconds at a time and records how
+    much later than that it wakes up in `agentic_event_loop_lag_seconds`.
+    A watchdog thread follows the task's heartbeat: once the loop has been
+    blocked for `threshold` seconds, it counts a stall and logs the stack
+    the loop's thread is executing, which is the blocking code itself. At
+    most one stack is logged per `log_interval`.
+    """
+
+    def __init__(self, settings: LoopMonitorSettings):
+        """
+        Args:
+            settings: Whether the monitor runs, and its interval and threshold.
+        """
+        self.settings = settings
+        self.stalls = 0
+        self._beat = time.monotonic()
+        self._last_logged = -math.inf
+        self._loop_thread: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Starts monitoring the running loop, if enabled in the settings."""
+        if not self.settings.enabled or self._task is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-monitor", daemon=True
+        )
+        self._thread.start()
+        logger.info(
+            f"Event loop monitor started (threshold {self.settings.threshold * 1000:.0f} ms)."
+        )
+
+    async def stop(self):
+        """Stops the measuring task and the watchdog thread."""
+        if self._task is None:
+            return
+        self._stopped.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._thread.join(timeout=1.0)
+        self._task = self._thread = None
+
+    async def _measure(self):
+        interval = self.settings.interval
+        lag = LOOP_LAG_SECONDS.labels()
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(interval)
+            self._beat = time.monotonic()
+            lag.observe(max(0.0, self._beat - started - interval))
+
+    def _watch(self):
+        interval, threshold = self.settings.interval, self.settings.threshold
+        stalled = False
+        while not self._stopped.wait(interval):
+            blocked = time.monotonic() - self._beat - interval
+            if blocked < threshold:
+                stalled = False
+                continue
+            if stalled:
+                # Still the same stall, which has been reported already.
+                continue
+            stalled = True
+            self.stalls += 1
+            LOOP_STALLS.inc()
+            now = time.monotonic()
+            if now - self._last_logged < self.settings.log_interval:
+                continue
+            self._last_logged = now
+            frame = sys._current_frames().get(self._loop_thread)
+            stack = "".join(traceback.format_stack(frame)) if frame else "unavailable\n"
+            logger.warning(
+                f"Event loop blocked for {blocked * 1000:.0f} ms; "
+                f"the loop thread is at:\n{stack}"
+            )
@@ -4,16 +4,27 @@ from fastapi.responses import JSONResponse
 
 from loguru import logger
 
-from agentic.config import config
-from agentic.agents.rag_agent import RAGAgent
-from agentic.session_store import SessionStore
-from agentic.database import get_db_pool, close_db_pool
-from agentic.logger import setup_logging
-from agentic.api.v1 import general_router, chat_router
-from agentic.agents.conversational_agent import ConversationalAgent
+from src.agentic.config import config
+from src.agentic.admission import AdmissionMiddleware
+from src.agentic.auth import ApiKeyMiddleware
+from src.agentic.agents.rag_agent import RAGAgent
+from src.agentic.session_store import SessionStore
+from src.agentic.database import get_db_pool, close_db_pool
+from src.agentic.loop_monitor import LoopMonitor
+from src.agentic.api.v1 import (
+    general_router,
+    chat_router,
+    ws_router,
+    sessions_router,
+    debug_router,
+)
+from src.agentic.agents.conversational_agent import ConversationalAgent
+from src.agentic.logger import setup_logging
+from src.agentic.tracing import setup_tracing
 
 
 setup_logging(config.logging)
+setup_tracing(config.tracing)
 
 
 @asynccontextmanager
@@ -34,29 +45,25 @@ async def lifespan(app: FastAPI):
     logger.info("Conversational Agent initialized.")
 
     # Create and store the session store
-    app.state.session_store = SessionStore(redis_url=config.db.redis_url)
+    app.state.session_store = SessionStore(
+        redis_url=config.db.redis_url, settings=config.db.session
+    )
+    app.state.session_store.start()
     logger.info("Session store initialized.")
 
+    # Reports code that blocks the event loop, if server.loop_monitor is enabled.
+    app.state.loop_monitor = LoopMonitor(config.server.loop_monitor)
+    app.state.loop_monitor.start()
+
     yield
 
     logger.info("Application shutting down...")
+    await app.state.loop_monitor.stop()
     await close_db_pool()
     await app.state.session_store.close()
     logger.info("Resources cleaned up.")
 
 
-app = FastAPI(
-    title="Agentic RAG Code Analysis API",
-    description="Analyze code repos and suggest improvements using a RAG agent.",
-    version="0.1.0",
-    lifespan=lifespan,
-)
-
-app.include_router(general_router)
-app.include_router(chat_router)
-
-
-@app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"An unhandled exception occurred: {exc}", exc_info=True)
     return JSONResponse(
@@ -65,6 +72,38 @@ async def global_exception_handler(request: Request, exc: Exception):
     )
 
 
+def create_app() -> FastAPI:
+    """
+    Builds the API application with its middlewares and routes.
+
+    Returns:
+        The FastAPI application; its resources are created by `lifespan`.
+    """
+    app = FastAPI(
+        title="Agentic RAG Code Analysis API",
+        description="Analyze code repos and suggest improvements using a RAG agent.",
+        version="0.1.0",
+        lifespan=lifespan,
+    )
+
+    # Sheds excess load on the routes listed in server.admission.
+    app.add_middleware(AdmissionMiddleware)
+    # Added last so it runs first: admission queues fairly by API client.
+    app.add_middleware(ApiKeyMiddleware)
+
+    app.include_router(general_router)
+    app.include_router(chat_router)
+    app.include_router(ws_router)
+    app.include_router(sessions_router)
+    app.include_router(debug_router)
+
+    app.add_exception_handler(Exception, global_exception_handler)
+    return app
+
+
+app = create_app()
+
+
 # def get_rag_agent(request: Request) -> RAGAgent:
 #     """Dependency to get the shared RAGAgent instance."""
 #     return request.app.state.rag_agent
@@ -0,0 +1,292 @@
+import bisect
+import math
+import time
+from typing import Iterator, Optional, Sequence
+
+from src.agentic.diagnostics import current_diagnostics
+
+# The content type of the Prometheus text exposition format.
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+# Seconds; spans cache hits through slow model calls.
+DEFAULT_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+class Registry:
+    """Holds metrics and renders them in the Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: dict[str, "Metric"] = {}
+
+    def register(self, metric: "Metric"):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric '{metric.name}' is already registered.")
+        self._metrics[metric.name] = metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, labels, value in metric.samples():
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class Metric:
+    """
+    A metric family, with one child per combination of label values.
+
+    Call sites should keep the child returned by `labels` where they can;
+    updating it is then a plain attribute update, cheap enough for hot paths.
+    """
+
+    kind = "untyped"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        registry: Optional[Registry] = None,
+    ):
+        """
+        Args:
+            name: The metric name, e.g. "agentic_cache_requests_total".
+            documentation: The HELP text.
+            labelnames: The names of the labels children are keyed by.
+            registry: Where to register the metric; defaults to `REGISTRY`.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple, object] = {}
+        (registry if registry is not None else REGISTRY).register(self)
+        if not self.labelnames:
+            # Unlabelled metrics are exported from the start, at zero.
+            self.labels()
+
+    def labels(self, *values: str):
+        """Returns the child for the given label values, creating it if needed."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"Metric '{self.name}' takes labels {self.labelnames}, got {values}."
+                )
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _labelled(self) -> Iterator[tuple[dict, object]]:
+        for values, child in list(self._children.items()):
+            yield dict(zip(self.labelnames, values)), child
+
+    def samples(self) -> Iterator[tuple[str, dict, float]]:
+        for labels, child in self._labelled():
+            yield "", labels, child.value
+
+
+class _Value:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(Metric):
+    """A value that only goes up, such as a number of requests."""
+
+    kind = "counter"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        """Increments an unlabelled counter."""
+        self.labels().inc(amount)
+
+
+class Gauge(Metric):
+    """A value that goes up and down, such as the connections in use."""
+
+    kind = "gauge"
+
+    def _new_child(self) -> _Value:
+        return _Value()
+
+
+class _Timer:
+    __slots__ = ("histogram", "started", "timings", "stage")
+
+    def __init__(
+        self,
+        histogram: "_HistogramValue",
+        timings: Optional[dict] = None,
+        stage: Optional[str] = None,
+    ):
+        self.histogram = histogram
+        # Where a debug-mode request collects its stage durations, in ms.
+        self.timings = timings
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.started
+        self.histogram.observe(elapsed)
+        if self.timings is not None:
+            self.timings[self.stage] = self.timings.get(self.stage, 0.0) + elapsed * 1000
+
+
+class _HistogramValue:
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: tuple[float, ...]):
+        self.bounds = bounds
+        # One count per bucket, plus one for values above every bound.
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def time(self) -> _Timer:
+        """Returns a context manager observing the seconds spent inside it."""
+        return _Timer(self)
+
+
+class Histogram(Metric):
+    """Counts observations, such as latencies, into cumulative buckets."""
+
+    kind = "histogram"
+
+    def __init__(self, *args, buckets: Sequence[float] = DEFAULT_BUCKETS, **kwargs):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(*args, **kwargs)
+
+    def _new_child(self) -> _HistogramValue:
+        return _HistogramValue(self.buckets)
+
+    def samples(self) -> Iterator[tuple[str, dict, float]]:
+        for labels, child in self._labelled():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), child.counts):
+                cumulative += count
+                yield "_bucket", {**labels, "le": bound}, cumulative
+            yield "_sum", labels, child.sum
+            yield "_count", labels, cumulative
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(labels: dict) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for name, value in labels.items():
+        if not isinstance(value, str):
+            value = _format_value(value)
+        escaped = value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+# Every metric of the process, exported by `GET /metrics`.
+REGISTRY = Registry()
+
+STAGE_SECONDS = Histogram(
+    "agentic_stage_duration_seconds",
+    "Latency of each stage of a chat turn.",
+    ["stage"],
+)
+CACHE_REQUESTS = Counter(
+    "agentic_cache_requests_total",
+    "Lookups in the in-process caches, by outcome.",
+    ["cache", "result"],
+)
+BACKEND_REQUESTS = Counter(
+    "agentic_backend_requests_total",
+    "Requests sent to each model backend.",
+    ["role", "backend"],
+)
+BACKEND_ERRORS = Counter(
+    "agentic_backend_errors_total",
+    "Failed requests to each model backend.",
+    ["role", "backend"],
+)
+SINGLEFLIGHT_COALESCED = Counter(
+    "agentic_singleflight_coalesced_total",
+    "Calls that joined an identical call already in flight instead of running.",
+    ["flight"],
+)
+BACKEND_RETRIES = Counter(
+    "agentic_backend_retries_total",
+    "Attempts retried against each model endpoint.",
+    ["endpoint"],
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "agentic_db_pool_connections",
+    "Connections of the PostgreSQL pool, by state.",
+    ["state"],
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    "agentic_redis_pool_connections",
+    "Connections of the Redis pool, by state.",
+    ["state"],
+)
+DB_SLOW_QUERIES = Counter(
+    "agentic_db_slow_queries_total", "SQL statements over the slow query threshold."
+)
+DB_SEQ_SCAN_ALERTS = Counter(
+    "agentic_db_seq_scan_alerts_total",
+    "Slow query plans with a sequential scan on an alert table.",
+)
+LOOP_LAG_SECONDS = Histogram(
+    "agentic_event_loop_lag_seconds",
+    "Delay of the event loop in running a timer that was due.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+LOOP_STALLS = Counter(
+    "agentic_event_loop_stalls_total",
+    "Times the event loop was blocked for longer than the monitor's threshold.",
+)
+INGESTED_FILES = Counter(
+    "agentic_ingest_files_total", "Source files loaded for ingestion."
+)
+INGESTED_CHUNKS = Counter(
+    "agentic_ingest_chunks_total", "Code chunks written to the database."
+)
+INGESTED_EMBEDDINGS = Counter(
+    "agentic_ingest_embeddings_total", "Embeddings computed during ingestion."
+)
+
+
+def stage_timer(stage: str) -> _Timer:
+    """
+    Times a block as one observation of `agentic_stage_duration_seconds`.
+
+    In a debug-mode request, the duration is also added to its diagnostics.
+    """
+    diagnostics = current_diagnostics.get()
+    if diagnostics is None:
+        return STAGE_SECONDS.labels(stage).time()
+    return _Timer(STAGE_SECONDS.labels(stage), diagnostics.timings, stage)
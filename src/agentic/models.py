@@ -1,20 +1,72 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 class Message(BaseModel):
     role: str  # 'user' or 'assistant'
     content: str
 
+class SessionSummary(BaseModel):
+    """A rolling summary of the start of a conversation."""
+    content: str
+    # The number of messages, from the start of the session, it summarizes.
+    covered: int
+
+class SessionInfo(BaseModel):
+    """Metadata kept for each chat session."""
+    session_id: str
+    # Unix timestamps; None for sessions written before metadata was kept.
+    created: Optional[float] = None
+    last_active: Optional[float] = None
+    turns: int = 0
+
 class ChatRequest(BaseModel):
     """Request body for the chat endpoint."""
     message: str
     session_id: Optional[str] = None
+    # Return only the new turn in `history` instead of the whole conversation.
+    delta: bool = False
+    # Return stage timings in a Server-Timing header and retrieval details in `debug`.
+    debug: bool = False
+
+class RetrievedChunk(BaseModel):
+    """A code chunk retrieved for a chat turn."""
+    id: str
+    file_path: str
+    # The distance between the chunk's and the query's embeddings.
+    distance: float
+
+class ChatDiagnostics(BaseModel):
+    """Details of how a chat turn was answered, returned in debug mode."""
+    # Milliseconds spent in each stage; concurrent stages overlap.
+    timings: Dict[str, float] = {}
+    chunks: List[RetrievedChunk] = []
+    # The index the retrieval query was planned with; None for a sequential scan.
+    index: Optional[str] = None
+    # The pgvector search settings of the connection.
+    probes: Optional[int] = None
+    ef_search: Optional[int] = None
+    # Estimated tokens of the retrieved context and of the whole prompt.
+    context_tokens: Optional[int] = None
+    prompt_tokens: Optional[int] = None
 
 class ChatResponse(BaseModel):
     """Response body for the chat endpoint."""
     session_id: str
     reply: str
     history: List[Message]
+    # The position in the session of this turn's user message.
+    turn_index: Optional[int] = None
+    # Set when the request asked for debug mode.
+    debug: Optional[ChatDiagnostics] = None
+
+class MessagePage(BaseModel):
+    """A page of the messages of a chat session."""
+    session_id: str
+    # The position in the session of the first of `messages`.
+    offset: int
+    # The number of messages in the whole session.
+    total: int
+    messages: List[Message]
 
 class ChatSession(BaseModel):
     session_id: str
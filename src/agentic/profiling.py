@@ -0,0 +1,119 @@
+import cProfile
+import marshal
+import pstats
+import sys
+import threading
+from collections import Counter
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import ContextManager, Iterator, Optional
+
+from loguru import logger
+
+# Samples per second taken by default; low enough to leave the profiled
+# code's timing essentially unchanged.
+DEFAULT_RATE = 200
+# Profiles written to files with these suffixes are collapsed stacks.
+COLLAPSED_SUFFIXES = {".txt", ".collapsed", ".folded"}
+
+
+def _label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_qualname} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+def _collapse(frame) -> str:
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame))
+        frame = frame.f_back
+    return ";".join(reversed(labels))
+
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread at a fixed rate from a background thread.
+
+    The profiled thread is not instrumented, so the overhead is the
+    sampling alone. Results are collapsed stacks, one line per distinct
+    stack with the number of samples it was seen in, as read by
+    flamegraph.pl, speedscope and similar tools. In a server, the loop's
+    thread spends idle time in the selector's `select`.
+    """
+
+    def __init__(self, thread_id: Optional[int] = None, rate: int = DEFAULT_RATE):
+        """
+        Args:
+            thread_id: The thread to sample; defaults to the calling thread.
+            rate: Samples per second.
+        """
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = 1 / rate
+        self.stacks: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._stopped.clear()
+        self._thread = threading.Thread(target=self._sample, name="profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        self._thread.join()
+
+    def collapsed(self) -> str:
+        """Returns the samples as collapsed stacks, most frequent first."""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _sample(self):
+        while not self._stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[_collapse(frame)] += 1
+
+
+def pstats_bytes(profiler: cProfile.Profile) -> bytes:
+    """Returns a cProfile run in the file format of `pstats.Stats.dump_stats`."""
+    stats = pstats.Stats(profiler)
+    return marshal.dumps(stats.stats)
+
+
+@contextmanager
+def _profile_to_file(path: Path) -> Iterator[None]:
+    if path.suffix in COLLAPSED_SUFFIXES:
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            path.write_text(profiler.collapsed(), encoding="utf-8")
+    else:
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            path.write_bytes(pstats_bytes(profiler))
+    logger.info(f"Profile written to '{path}'.")
+
+
+def profile_to_file(path: Optional[Path]) -> ContextManager[None]:
+    """
+    Profiles the block into `path`, or does nothing if it is None.
+
+    Paths ending in .txt, .collapsed or .folded get sampled collapsed
+    stacks; any other path gets a cProfile run in pstats format, to be read
+    with `python -m pstats` or snakeviz.
+
+    Args:
+        path: Where to write the profile.
+
+    Returns:
+        A context manager profiling its block.
+    """
+    if path is None:
+        return nullcontext()
+    return _profile_to_file(path)
@@ -0,0 +1,214 @@
+import asyncio
+import time
+from collections import deque
+from typing import Optional
+
+# Lanes in priority order: waiting interactive calls are always served first.
+LANES = ("interactive", "bulk")
+
+
+class TokenBucket:
+    """
+    A token bucket refilled continuously at a fixed rate.
+
+    The level may go negative when a caller is charged for more than it
+    reserved, which delays later callers until the debt is repaid.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._level = capacity
+        self._updated = time.monotonic()
+
+    @property
+    def level(self) -> float:
+        self._refill()
+        return self._level
+
+    def _refill(self):
+        now = time.monotonic()
+        self._level = min(
+            self.capacity,
+            self._level + (now - self._updated) * self.refill_per_second,
+        )
+        self._updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Returns how many seconds until `amount` tokens are available."""
+        missing = min(amount, self.capacity) - self.level
+        if missing <= 0:
+            return 0.0
+        return missing / self.refill_per_second
+
+    def consume(self, amount: float):
+        """Takes `amount` tokens, going into debt if necessary."""
+        self._refill()
+        self._level -= amount
+
+    def refund(self, amount: float):
+        """Returns `amount` tokens to the bucket, up to its capacity."""
+        self._refill()
+        self._level = min(self.capacity, self._level + amount)
+
+
+class _Waiter:
+    def __init__(self, cost: float, future: asyncio.Future):
+        self.cost = cost
+        self.future = future
+
+
+class QuotaLimiter:
+    """
+    Schedules calls against requests-per-minute and tokens-per-minute quotas.
+
+    Each call reserves one request and an estimated number of tokens. Calls
+    wait in per-priority lanes and are granted strictly in lane order, so
+    interactive traffic never queues behind bulk work. Once a call completes,
+    `reconcile` corrects the token bucket with the actual usage.
+    """
+
+    def __init__(
+        self,
+        tokens_per_minute: Optional[int] = None,
+        requests_per_minute: Optional[int] = None,
+    ):
+        """
+        Args:
+            tokens_per_minute: The token quota, or None for no token limit.
+            requests_per_minute: The request quota, or None for no request limit.
+        """
+        self.tokens = (
+            TokenBucket(tokens_per_minute, tokens_per_minute / 60)
+            if tokens_per_minute
+            else None
+        )
+        self.requests = (
+            TokenBucket(requests_per_minute, requests_per_minute / 60)
+            if requests_per_minute
+            else None
+        )
+        self._lanes: dict[str, deque[_Waiter]] = {lane: deque() for lane in LANES}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.granted = {lane: 0 for lane in LANES}
+
+    def queued(self) -> dict[str, int]:
+        """Returns the number of calls waiting in each lane."""
+        return {lane: len(waiters) for lane, waiters in self._lanes.items()}
+
+    async def acquire(self, estimated_tokens: int, lane: str = "interactive"):
+        """
+        Waits until the call fits within the quotas, then reserves it.
+
+        Args:
+            estimated_tokens: The prompt plus expected completion tokens.
+            lane: The priority lane, one of LANES.
+        """
+        if lane not in self._lanes:
+            raise ValueError(f"Unknown priority lane '{lane}'.")
+        future = asyncio.get_running_loop().create_future()
+        waiter = _Waiter(estimated_tokens, future)
+        self._lanes[lane].append(waiter)
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if waiter in self._lanes[lane]:
+                self._lanes[lane].remove(waiter)
+            elif future.done() and not future.cancelled():
+                self._release(waiter.cost)
+            self._dispatch()
+            raise
+        self.granted[lane] += 1
+
+    def charge(self, estimated_tokens: int):
+        """
+        Takes quota for a call that is sent without waiting for it, such as
+        a retry or a hedge of a call that was acquired.
+
+        The buckets go into debt if necessary, which delays later callers.
+
+        Args:
+            estimated_tokens: The prompt plus expected completion tokens.
+        """
+        if self.tokens is not None:
+            self.tokens.consume(estimated_tokens)
+        if self.requests is not None:
+            self.requests.consume(1)
+
+    def reconcile(self, estimated_tokens: int, actual_tokens: int):
+        """
+        Corrects the token bucket once a call's real usage is known.
+
+        Args:
+            estimated_tokens: The tokens reserved when the call was acquired.
+            actual_tokens: The tokens the service reported using.
+        """
+        if self.tokens is None:
+            return
+        difference = estimated_tokens - actual_tokens
+        if difference > 0:
+            self.tokens.refund(difference)
+        elif difference < 0:
+            self.tokens.consume(-difference)
+        self._dispatch()
+
+    def _release(self, cost: float):
+        if self.tokens is not None:
+            self.tokens.refund(cost)
+        if self.requests is not None:
+            self.requests.refund(1)
+
+    def _head(self) -> Optional[_Waiter]:
+        for lane in LANES:
+            if self._lanes[lane]:
+                return self._lanes[lane][0]
+        return None
+
+    def _dispatch(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while (waiter := self._head()) is not None:
+            delay = max(
+                self.tokens.delay_for(waiter.cost) if self.tokens else 0.0,
+                self.requests.delay_for(1) if self.requests else 0.0,
+            )
+            if delay > 0:
+                loop = asyncio.get_running_loop()
+                self._timer = loop.call_later(delay, self._dispatch)
+                return
+            for waiters in self._lanes.values():
+                if waiters and waiters[0] is waiter:
+                    waiters.popleft()
+                    break
+            if self.tokens is not None:
+                self.tokens.consume(waiter.cost)
+            if self.requests is not None:
+                self.requests.consume(1)
+            waiter.future.set_result(None)
+
+
+def message_tokens(content: str) -> int:
+    """Estimates the prompt tokens of one chat message with the given content."""
+    # Roughly four characters per token, plus a small per-message overhead.
+    return 4 + len(content) // 4
+
+
+def estimate_tokens(messages: list[dict], completion_tokens: int) -> int:
+    """
+    Estimates the tokens a chat request will use.
+
+    Uses the common rule of thumb of roughly four characters per token plus a
+    small per-message overhead, and adds the expected completion size.
+
+    Args:
+        messages: The chat messages to be sent.
+        completion_tokens: The expected size of the completion.
+
+    Returns:
+        The estimated prompt plus completion tokens.
+    """
+    prompt_tokens = sum(message_tokens(msg.get("content") or "") for msg in messages)
+    return prompt_tokens + completion_tokens
@@ -0,0 +1,340 @@
+import asyncio
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager, nullcontext
+from email.utils import parsedate_to_datetime
+from typing import AsyncIterator, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+from loguru import logger
+
+from src.agentic.balancer import Backend, LoadBalancer
+from src.agentic.config import ResilienceSettings
+from src.agentic.metrics import BACKEND_RETRIES
+
+S = TypeVar("S")
+T = TypeVar("T")
+
+# Status codes worth retrying: timeouts, throttling and server-side failures.
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised when a call is rejected because the endpoint's circuit is open."""
+
+    def __init__(self, endpoint: str, retry_in: float):
+        super().__init__(
+            f"Circuit open for {endpoint}; retry in {max(retry_in, 0.0):.1f}s."
+        )
+        self.endpoint = endpoint
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive failures for an endpoint and fails fast while open.
+
+    After `failure_threshold` consecutive failures the circuit opens and calls
+    are rejected for `reset_timeout` seconds. A single probe call is then let
+    through; its outcome closes the circuit or opens it again.
+    """
+
+    def __init__(self, endpoint: str, failure_threshold: int, reset_timeout: float):
+        self.endpoint = endpoint
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """One of "closed", "open" or "half_open"."""
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    @property
+    def available(self) -> bool:
+        """Whether `allow` would let a call through now."""
+        state = self.state
+        return state == "closed" or (state == "half_open" and not self._probing)
+
+    def allow(self):
+        """Raises CircuitOpenError if a call should not be attempted now."""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half_open" and not self._probing:
+            self._probing = True
+            return
+        retry_in = self.reset_timeout - (time.monotonic() - (self.opened_at or 0.0))
+        raise CircuitOpenError(self.endpoint, retry_in)
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self._probing = False
+
+    def release(self):
+        """Frees the probe slot after a call that ended without an outcome."""
+        self._probing = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self._probing or self.failures >= self.failure_threshold:
+            if self.opened_at is None or self._probing:
+                logger.warning(f"Opening circuit for {self.endpoint}.")
+            self.opened_at = time.monotonic()
+        self._probing = False
+
+
+class LatencyTracker:
+    """Keeps a window of recent successful call latencies for an endpoint."""
+
+    def __init__(self, window: int = 200):
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def record(self, seconds: float):
+        self._samples.append(seconds)
+
+    def quantile(self, q: float) -> float:
+        """Returns the q-quantile of the recorded latencies."""
+        ordered = sorted(self._samples)
+        index = min(int(q * len(ordered)), len(ordered) - 1)
+        return ordered[index]
+
+
+def is_retryable(exc: BaseException) -> bool:
+    """Returns True if a failed attempt may succeed when tried again."""
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code in RETRYABLE_STATUS_CODES
+    return isinstance(exc, (httpx.TransportError, asyncio.TimeoutError))
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """
+    Extracts the server-requested delay from a throttled response.
+
+    Understands Azure's `retry-after-ms` as well as `Retry-After` given in
+    seconds or as an HTTP date.
+    """
+    if not isinstance(exc, httpx.HTTPStatusError):
+        return None
+    headers = exc.response.headers
+    if "retry-after-ms" in headers:
+        try:
+            return float(headers["retry-after-ms"]) / 1000
+        except ValueError:
+            pass
+    value = headers.get("retry-after")
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+class ResilientClient:
+    """
+    Wraps calls to model backends with retries, hedging and circuit breaking.
+
+    Each attempt is bounded by `attempt_timeout` while the call as a whole,
+    including back-off, is bounded by the total timeout. Failed attempts are
+    retried with jittered exponential back-off, honoring `Retry-After`. When
+    hedging is enabled, a second attempt is started if the first has not
+    finished within the endpoint's recent p95 latency, and the first to
+    succeed wins.
+    """
+
+    def __init__(self, settings: ResilienceSettings, total_timeout: float):
+        """
+        Args:
+            settings: Retry, hedging and circuit breaker settings.
+            total_timeout: The overall budget in seconds for a call.
+        """
+        self.settings = settings
+        self.total_timeout = total_timeout
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.latencies: dict[str, LatencyTracker] = {}
+        self.retries = 0
+        self.hedges = 0
+
+    def breaker(self, endpoint: str) -> CircuitBreaker:
+        if endpoint not in self.breakers:
+            self.breakers[endpoint] = CircuitBreaker(
+                endpoint,
+                self.settings.breaker_failure_threshold,
+                self.settings.breaker_reset_timeout,
+            )
+        return self.breakers[endpoint]
+
+    @asynccontextmanager
+    async def guard(self, endpoint: str) -> AsyncIterator[None]:
+        """
+        Applies the endpoint's circuit breaker to the request made in the block.
+
+        Raises CircuitOpenError instead of running the block while the
+        circuit is open.
+        """
+        breaker = self.breaker(endpoint)
+        breaker.allow()
+        try:
+            yield
+        except Exception as e:
+            if is_retryable(e):
+                breaker.record_failure()
+            else:
+                # The endpoint answered; the request itself was at fault.
+                breaker.record_success()
+            raise
+        except BaseException:
+            # Cancelled, e.g. by a client disconnect: the endpoint was not
+            # judged, but a half-open probe must not hold its slot forever.
+            breaker.release()
+            raise
+        breaker.record_success()
+
+    async def call(self, endpoint: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs `attempt` against `endpoint` under the resilience policy.
+
+        Args:
+            endpoint: Identifies the backend for circuit breaking and latency stats.
+            attempt: A zero-argument callable performing a single request.
+
+        Returns:
+            The result of the first successful attempt.
+        """
+        return await self._call(endpoint, attempt, guarded=False)
+
+    async def call_balanced(
+        self,
+        endpoint: str,
+        balancer: LoadBalancer[S],
+        request: Callable[[Backend[S]], Awaitable[T]],
+    ) -> T:
+        """
+        Runs `request` against the backends of `balancer` under the policy.
+
+        Every attempt, including retries and hedges, is routed afresh, away
+        from backends that already failed this call and from those whose
+        circuit is open. Each backend has its own circuit breaker, keyed by
+        its name, so one failing backend does not cut off the others. An
+        attempt that exceeds `attempt_timeout` counts as a failure of its
+        backend.
+
+        Args:
+            endpoint: Identifies the backends as a whole for latency stats.
+            balancer: The backends to spread attempts across.
+            request: Performs a single request against the given backend.
+
+        Returns:
+            The result of the first successful attempt.
+        """
+        failed: set[str] = set()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.total_timeout
+
+        async def attempt() -> T:
+            tripped = {name for name, b in self.breakers.items() if not b.available}
+            backend = balancer.pick(exclude=frozenset(failed | tripped))
+            # The timeout is applied within the backend's breaker and tracking,
+            # so a hung backend is recorded as failing rather than cancelled.
+            timeout = min(self.settings.attempt_timeout, deadline - loop.time())
+            try:
+                async with self.guard(backend.name):
+                    async with balancer.track(backend):
+                        return await asyncio.wait_for(request(backend), timeout)
+            except Exception:
+                failed.add(backend.name)
+                raise
+
+        return await self._call(endpoint, attempt, guarded=True, deadline=deadline)
+
+    async def _call(
+        self,
+        endpoint: str,
+        attempt: Callable[[], Awaitable[T]],
+        guarded: bool,
+        deadline: Optional[float] = None,
+    ) -> T:
+        # Guarded attempts apply the circuit breakers and attempt timeouts of
+        # their backends themselves; only the overall deadline is enforced here.
+        loop = asyncio.get_running_loop()
+        if deadline is None:
+            deadline = loop.time() + self.total_timeout
+
+        for attempt_number in range(self.settings.max_retries + 1):
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise asyncio.TimeoutError(f"Deadline exceeded calling {endpoint}.")
+            timeout = (
+                remaining if guarded else min(self.settings.attempt_timeout, remaining)
+            )
+            try:
+                async with nullcontext() if guarded else self.guard(endpoint):
+                    result = await asyncio.wait_for(
+                        self._attempt(endpoint, attempt), timeout
+                    )
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt_number == self.settings.max_retries:
+                    raise
+                delay = retry_after(e)
+                if delay is None:
+                    ceiling = self.settings.backoff_base * 2**attempt_number
+                    delay = random.uniform(0, min(ceiling, self.settings.backoff_max))
+                if loop.time() + delay >= deadline:
+                    raise
+                logger.warning(
+                    f"Attempt {attempt_number + 1} against {endpoint} failed ({e!r}); "
+                    f"retrying in {delay:.2f}s."
+                )
+                self.retries += 1
+                BACKEND_RETRIES.labels(endpoint).inc()
+                await asyncio.sleep(delay)
+            else:
+                return result
+        raise AssertionError("unreachable")
+
+    async def _attempt(self, endpoint: str, attempt: Callable[[], Awaitable[T]]) -> T:
+        tracker = self.latencies.setdefault(endpoint, LatencyTracker())
+        started = time.monotonic()
+        primary = asyncio.ensure_future(attempt())
+        tasks = {primary}
+        try:
+            if self.settings.hedge and len(tracker) >= self.settings.hedge_min_samples:
+                hedge_delay = tracker.quantile(self.settings.hedge_quantile)
+                done, _ = await asyncio.wait(tasks, timeout=hedge_delay)
+                if not done:
+                    self.hedges += 1
+                    tasks.add(asyncio.ensure_future(attempt()))
+
+            error: Optional[BaseException] = None
+            while tasks:
+                done, tasks = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    if task.exception() is None:
+                        tracker.record(time.monotonic() - started)
+                        return task.result()
+                    error = task.exception()
+            assert error is not None
+            raise error
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -0,0 +1,153 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+
+from src.agentic.metrics import CACHE_REQUESTS
+from src.agentic.models import Message, SessionSummary
+
+_cache_hits = CACHE_REQUESTS.labels("session", "hit")
+_cache_misses = CACHE_REQUESTS.labels("session", "miss")
+
+
+@dataclass
+class CachedSession:
+    # The most recent messages of the session.
+    messages: list[Message]
+    # The position of the first of `messages` in the session.
+    offset: int
+    summary: Optional[SessionSummary]
+    expires_at: float
+
+
+class SessionCache:
+    """
+    An in-process LRU of recently used sessions, in decoded form.
+
+    Entries mirror the Redis expiry of their session and can hold just the
+    most recent `max_messages` messages of it. The cache is only a copy:
+    callers must invalidate an entry whenever the session changes elsewhere.
+    """
+
+    def __init__(self, max_sessions: int, max_messages: Optional[int], ttl: int):
+        """
+        Args:
+            max_sessions: The most sessions kept; 0 disables the cache.
+            max_messages: The most recent messages kept per session; None
+                keeps them all.
+            ttl: Seconds after its last write that an entry expires.
+        """
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Bumped on every change, so a read that raced one is not cached.
+        self.epoch = 0
+        self._entries: OrderedDict[str, CachedSession] = OrderedDict()
+
+    def get(
+        self, session_id: str, limit: Optional[int]
+    ) -> Optional[tuple[list[Message], int, Optional[SessionSummary]]]:
+        """
+        Looks up the most recent `limit` messages of a session.
+
+        Args:
+            session_id: The unique identifier for the chat session.
+            limit: The most recent messages wanted; None for the whole session.
+
+        Returns:
+            A copy of the messages, their offset and the summary, or None if
+            the cache does not hold enough of the session.
+        """
+        entry = self._entries.get(session_id)
+        if entry is not None and entry.expires_at <= time.monotonic():
+            del self._entries[session_id]
+            entry = None
+        if entry is None or (
+            entry.offset and (not limit or len(entry.messages) < limit)
+        ):
+            self.misses += 1
+            _cache_misses.inc()
+            return None
+
+        self._entries.move_to_end(session_id)
+        self.hits += 1
+        _cache_hits.inc()
+        messages = entry.messages[-limit:] if limit else entry.messages
+        total = entry.offset + len(entry.messages)
+        return list(messages), total - len(messages), entry.summary
+
+    def put(
+        self,
+        session_id: str,
+        messages: list[Message],
+        offset: int,
+        summary: Optional[SessionSummary],
+        ttl: int,
+        epoch: int,
+    ):
+        """
+        Caches the most recent messages of a session as read from Redis.
+
+        Args:
+            session_id: The unique identifier for the chat session.
+            messages: The most recent messages.
+            offset: The position of the first of `messages` in the session.
+            summary: The rolling summary, if any.
+            ttl: The seconds left before the session expires in Redis.
+            epoch: The value of `epoch` from before the session was read.
+        """
+        if not self.max_sessions or ttl <= 0 or epoch != self.epoch:
+            return
+        entry = CachedSession([], offset, summary, 0.0)
+        self._entries[session_id] = entry
+        self._entries.move_to_end(session_id)
+        self._extend(entry, messages)
+        entry.expires_at = time.monotonic() + ttl
+        while len(self._entries) > self.max_sessions:
+            self._entries.popitem(last=False)
+
+    def append(self, session_id: str, messages: list[Message]):
+        """Adds messages written by this process to a cached session."""
+        self.epoch += 1
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            self._extend(entry, messages)
+
+    def set_summary(self, session_id: str, summary: SessionSummary):
+        """Replaces the summary of a cached session."""
+        self.epoch += 1
+        entry = self._entries.get(session_id)
+        if entry is not None:
+            entry.summary = summary
+
+    def invalidate(self, session_id: str):
+        """Drops a session that was changed elsewhere."""
+        self.epoch += 1
+        if self._entries.pop(session_id, None) is not None:
+            self.invalidations += 1
+
+    def clear(self):
+        self.epoch += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "sessions": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "invalidations": self.invalidations,
+        }
+
+    def _extend(self, entry: CachedSession, messages: list[Message]):
+        entry.messages.extend(messages)
+        if self.max_messages and len(entry.messages) > self.max_messages:
+            dropped = len(entry.messages) - self.max_messages
+            del entry.messages[:dropped]
+            entry.offset += dropped
+        # Writes refresh the Redis expiry, so they refresh the entry's too.
+        entry.expires_at = time.monotonic() + self.ttl
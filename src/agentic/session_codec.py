@@ -0,0 +1,166 @@
+import json
+import zlib
+from typing import Any, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional dependency
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+# Every encoded value starts with one header byte: the format version in the
+# high nibble, then two bits each for the serializer and the compressor.
+FORMAT_VERSION = 1
+SERIALIZERS = ("json", "msgpack")
+COMPRESSIONS = ("none", "zlib", "zstd")
+
+
+class SessionCodec:
+    """
+    Encodes session values (messages and summaries) for storage in Redis.
+
+    Values are serialized with JSON (orjson when installed) or msgpack, and
+    those of at least `compress_min_bytes` are compressed with zlib or zstd;
+    small values are left as they are, since compressing them rarely pays.
+    The header byte records how each value was written, so values written
+    with other settings, and plain JSON written before the codec existed,
+    still decode.
+    """
+
+    def __init__(
+        self,
+        serializer: str = "json",
+        compression: str = "zlib",
+        compress_min_bytes: int = 1024,
+        level: Optional[int] = None,
+    ):
+        """
+        Args:
+            serializer: "json" or "msgpack".
+            compression: "none", "zlib" or "zstd".
+            compress_min_bytes: Serialized values smaller than this are
+                stored uncompressed.
+            level: The compression level; the compressor's default if unset.
+        """
+        if serializer not in SERIALIZERS:
+            raise ValueError(
+                f"Unknown session serializer '{serializer}'. "
+                f"Available: {', '.join(SERIALIZERS)}."
+            )
+        if compression not in COMPRESSIONS:
+            raise ValueError(
+                f"Unknown session compression '{compression}'. "
+                f"Available: {', '.join(COMPRESSIONS)}."
+            )
+        if serializer == "msgpack" and msgpack is None:
+            raise ValueError("The 'msgpack' session serializer requires msgpack.")
+        if compression == "zstd" and zstandard is None:
+            raise ValueError("The 'zstd' session compression requires zstandard.")
+
+        self.serializer = SERIALIZERS.index(serializer)
+        self.compression = COMPRESSIONS.index(compression)
+        self.compress_min_bytes = compress_min_bytes
+        self.level = level
+        self.encoded = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        if compression == "zstd":
+            self._zstd = zstandard.ZstdCompressor(level=level or 3)
+
+    def encode(self, value: Any) -> bytes:
+        """
+        Encodes a JSON-compatible value.
+
+        Args:
+            value: The value to encode, e.g. a dumped Message.
+
+        Returns:
+            The header byte followed by the serialized, possibly compressed value.
+        """
+        payload = self._serialize(value)
+        raw_size = len(payload)
+        compression = 0
+        if self.compression and len(payload) >= self.compress_min_bytes:
+            compressed = self._compress(payload)
+            # Keep the raw payload if compression would not make it smaller.
+            if len(compressed) < len(payload):
+                payload, compression = compressed, self.compression
+        header = FORMAT_VERSION << 4 | self.serializer << 2 | compression
+
+        self.encoded += 1
+        self.raw_bytes += raw_size
+        self.stored_bytes += len(payload) + 1
+        return bytes([header]) + payload
+
+    def decode(self, data: Union[bytes, str]) -> Any:
+        """
+        Decodes a value written by `encode`, or a legacy plain JSON value.
+
+        Args:
+            data: The stored value.
+
+        Returns:
+            The decoded value.
+        """
+        if isinstance(data, str):
+            data = data.encode()
+        header = data[0]
+        if header >> 4 != FORMAT_VERSION:
+            # Written before the codec existed: plain JSON text.
+            return _json_loads(data)
+
+        serializer, compression = header >> 2 & 0b11, header & 0b11
+        payload = memoryview(data)[1:]
+        if compression == 1:
+            payload = zlib.decompress(payload)
+        elif compression == 2:
+            if zstandard is None:
+                raise ValueError("Decoding this session value requires zstandard.")
+            payload = zstandard.ZstdDecompressor().decompress(payload)
+        if serializer == 1:
+            if msgpack is None:
+                raise ValueError("Decoding this session value requires msgpack.")
+            return msgpack.unpackb(payload)
+        return _json_loads(bytes(payload))
+
+    def stats(self) -> dict:
+        """Returns the number of values encoded and how much they shrank."""
+        return {
+            "serializer": SERIALIZERS[self.serializer],
+            "compression": COMPRESSIONS[self.compression],
+            "encoded": self.encoded,
+            "raw_bytes": self.raw_bytes,
+            "stored_bytes": self.stored_bytes,
+            "compression_ratio": (
+                round(self.raw_bytes / self.stored_bytes, 2)
+                if self.stored_bytes
+                else 1.0
+            ),
+        }
+
+    def _serialize(self, value: Any) -> bytes:
+        if self.serializer == 1:
+            return msgpack.packb(value)
+        if orjson is not None:
+            return orjson.dumps(value)
+        return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode()
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.compression == 2:
+            return self._zstd.compress(payload)
+        return zlib.compress(payload, self.level if self.level is not None else 6)
+
+
+def _json_loads(data: bytes) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
@@ -1,58 +1,634 @@
+import asyncio
 import redis.asyncio as aioredis
+from redis.exceptions import ResponseError, WatchError
 import json
-from src.agentic.models import Message
+import re
+import time
+from typing import AsyncIterator, Optional
+from uuid import UUID, uuid4
+from loguru import logger
+from src.agentic.config import SessionSettings
+from src.agentic.metrics import stage_timer
+from src.agentic.tracing import span
+from src.agentic.models import Message, SessionInfo, SessionSummary
+from src.agentic.session_cache import SessionCache
+from src.agentic.session_codec import SessionCodec
+
+# Keys stored beside each session's message list.
+SUMMARY_SUFFIX = ":summary"
+META_SUFFIX = ":meta"
+# Published in place of a session ID when every session may have changed.
+ALL_SESSIONS = "*"
+
+
+def _is_wrong_type(error: ResponseError) -> bool:
+    return "WRONGTYPE" in str(error)
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        UUID(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _float(value: Optional[bytes]) -> Optional[float]:
+    return float(value) if value is not None else None
 
 
 class SessionStore:
     """
     Manages chat session storage in Redis.
 
-    This class handles getting and setting chat messages for a given session_id,
-    persisting the data in a Redis database.
+    Each session is a Redis list under `<key_prefix><session_id>` with one
+    encoded message per element, so a turn appends its new messages instead
+    of rewriting the whole history and a read can fetch just the most recent
+    window. Every write refreshes the session's expiry, which therefore
+    slides with activity.
+
+    Beside the list, `:summary` holds a rolling summary of the older part of
+    the session and `:meta` a hash of when it was created, when it was last
+    active and how many turns it has had. Both expire with the session.
+
+    Values are encoded with a SessionCodec, which can compress large ones.
+    Sessions saved by earlier versions under their bare ID, or as a single
+    JSON blob, are moved and converted the first time they are read.
+
+    Optionally, recently used sessions are also kept decoded in an in-process
+    SessionCache, so consecutive turns served by the same worker skip Redis
+    reads. Every write publishes the session ID on an invalidation channel
+    and other workers drop their copy; the cache is bypassed whenever this
+    worker is not subscribed to the channel.
     """
 
-    def __init__(self, redis_url: str):
+    def __init__(self, redis_url: str, settings: SessionSettings = SessionSettings()):
         """
         Initializes the Redis connection.
 
         Args:
             redis_url: The connection string for the Redis instance.
+            settings: Key prefix, expiry, history window and encoding settings.
         """
         # from_url is the recommended way to create a client instance.
-        self._redis = aioredis.from_url(redis_url, decode_responses=True)
+        # Values are binary, so responses are left undecoded.
+        self._redis = aioredis.from_url(redis_url)
+        self.prefix = settings.key_prefix
+        self.ttl = settings.ttl
+        self.history_window = settings.history_window
+        self.codec = SessionCodec(
+            serializer=settings.codec,
+            compression=settings.compression,
+            compress_min_bytes=settings.compress_min_bytes,
+            level=settings.compression_level,
+        )
+        self.cache = SessionCache(
+            max_sessions=settings.cache_size,
+            max_messages=settings.history_window or settings.cache_messages,
+            ttl=settings.ttl,
+        )
+        self.invalidation_channel = settings.invalidation_channel
+        self.activity_key = settings.activity_key
+        # Identifies this worker's own invalidations on the shared channel.
+        self._worker_id = uuid4().hex
+        self._listener: Optional[asyncio.Task] = None
+        self._listening = False
+        # The latest background append of each session still being written.
+        self._writes: dict[str, asyncio.Task] = {}
+
+    def start(self):
+        """Starts listening for invalidations if the session cache is enabled."""
+        if self.cache.max_sessions and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
 
-    async def get(self, session_id: str) -> list[Message]:
+    async def get(
+        self, session_id: str, limit: Optional[int] = None
+    ) -> list[Message]:
         """
         Retrieves chat messages for a given session ID.
 
         Args:
             session_id: The unique identifier for the chat session.
+            limit: The most recent messages to return; defaults to the
+                configured history window, or the whole session if unset.
 
         Returns:
             A list of Message objects, or an empty list if the session is not found.
         """
-        data = await self._redis.get(session_id)
-        if not data:
+        messages, _, _ = await self.get_window(session_id, limit)
+        return messages
+
+    async def get_window(
+        self, session_id: str, limit: Optional[int] = None
+    ) -> tuple[list[Message], int, Optional[SessionSummary]]:
+        """
+        Retrieves recent messages together with the session's summary.
+
+        Args:
+            session_id: The unique identifier for the chat session.
+            limit: The most recent messages to return; defaults to the
+                configured history window, or the whole session if unset.
+
+        Returns:
+            The messages, the position of the first of them in the session,
+            and the rolling summary if one has been written.
+        """
+        with stage_timer("session_get"), span(
+            "session load", session_id=session_id
+        ) as s:
+            messages, offset, summary = await self._get_window(session_id, limit)
+            s.set_attributes(
+                {"messages": len(messages), "offset": offset, "summarized": summary is not None}
+            )
+            return messages, offset, summary
+
+    async def _get_window(
+        self, session_id: str, limit: Optional[int]
+    ) -> tuple[list[Message], int, Optional[SessionSummary]]:
+        await self._wait_for_writes(session_id)
+        limit = limit if limit is not None else self.history_window
+        if self._listening:
+            cached = self.cache.get(session_id, limit)
+            if cached is not None:
+                return cached
+        epoch = self.cache.epoch
+
+        start = -limit if limit else 0
+        total, items, summary, ttl, legacy = await self._read_window(session_id, start)
+        if not total and legacy:
+            await self._adopt_legacy(session_id)
+            total, items, summary, ttl, _ = await self._read_window(session_id, start)
+        messages = [self._decode_message(item) for item in items]
+        summary = SessionSummary(**self.codec.decode(summary)) if summary else None
+        offset = total - len(messages)
+        if self._listening:
+            self.cache.put(session_id, list(messages), offset, summary, ttl, epoch)
+        return messages, offset, summary
+
+    async def get_range(self, session_id: str, start: int, stop: int) -> list[Message]:
+        """
+        Retrieves the messages at positions `start` up to, not including, `stop`.
+
+        Args:
+            session_id: The unique identifier for the chat session.
+            start: The position of the first message.
+            stop: The position after the last message.
+
+        Returns:
+            A list of Message objects.
+        """
+        if stop <= start:
             return []
+        await self._wait_for_writes(session_id)
+        items = await self._redis.lrange(self._key(session_id), start, stop - 1)
+        return [self._decode_message(item) for item in items]
+
+    async def get_page(
+        self, session_id: str, offset: int, limit: int
+    ) -> tuple[list[Message], int]:
+        """
+        Retrieves up to `limit` messages starting at position `offset`.
+
+        Args:
+            session_id: The unique identifier for the chat session.
+            offset: The position of the first message.
+            limit: The most messages to return.
+
+        Returns:
+            The messages and the number of messages in the whole session.
+        """
+        await self._wait_for_writes(session_id)
+        total, items, legacy = await self._read_page(session_id, offset, limit)
+        if not total and legacy:
+            await self._adopt_legacy(session_id)
+            total, items, _ = await self._read_page(session_id, offset, limit)
+        return [self._decode_message(item) for item in items], total
+
+    async def set_summary(self, session_id: str, summary: SessionSummary):
+        """
+        Saves the rolling summary of a session.
+
+        Args:
+            session_id: The unique identifier for the chat session.
+            summary: The summary and the number of messages it covers.
+        """
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.set(
+            self._key(session_id) + SUMMARY_SUFFIX,
+            self.codec.encode(summary.model_dump()),
+            ex=self.ttl,
+        )
+        self._publish_invalidation(pipe, session_id)
+        await pipe.execute()
+        self.cache.set_summary(session_id, summary)
+
+    async def append(self, session_id: str, *messages: Message):
+        """
+        Appends messages to a session and refreshes its expiry.
+
+        Args:
+            session_id: The unique identifier for the chat session.
+            *messages: The new messages, in order.
+        """
+        if not messages:
+            return
+        with stage_timer("session_set"), span(
+            "session save", session_id=session_id, messages=len(messages)
+        ):
+            await self._write(session_id, messages, replace=False)
+        self.cache.append(session_id, list(messages))
 
-        # Deserialize the JSON data back into a list of Message objects
-        messages_data = json.loads(data)
-        return [Message(**msg_data) for msg_data in messages_data]
+    def append_in_background(self, session_id: str, *messages: Message) -> asyncio.Task:
+        """
+        Appends messages to a session without waiting for the write.
+
+        Background appends to a session are applied in order, and reads of
+        the session through this store wait for them, so the next turn of a
+        conversation always sees this one. Failures are logged.
+
+        Args:
+            session_id: The unique identifier for the chat session.
+            *messages: The new messages, in order.
+
+        Returns:
+            The task performing the write.
+        """
+        previous = self._writes.get(session_id)
+        task = asyncio.create_task(self._append_after(previous, session_id, messages))
+        self._writes[session_id] = task
+        task.add_done_callback(lambda done: self._finish_write(session_id, done))
+        return task
 
     async def set(self, session_id: str, messages: list[Message]):
         """
-        Saves chat messages for a session ID with a 1-hour expiry.
+        Replaces the whole history of a session and refreshes its expiry.
+
+        Prefer `append` for adding turns; this rewrites every message.
 
         Args:
             session_id: The unique identifier for the chat session.
             messages: A list of Message objects to save.
         """
-        # Use model_dump() for Pydantic v2 instead of the deprecated dict()
-        messages_as_dict = [msg.model_dump() for msg in messages]
-        await self._redis.set(
-            session_id, json.dumps(messages_as_dict), ex=3600
-        )  # 1 hour expiry
+        with stage_timer("session_set"), span(
+            "session save", session_id=session_id, messages=len(messages), replace=True
+        ):
+            await self._write(session_id, messages, replace=True)
+        self.cache.invalidate(session_id)
+
+    async def scan(self, batch_size: int = 1000) -> AsyncIterator[list[SessionInfo]]:
+        """
+        Iterates over the metadata of every session, a batch at a time.
+
+        Keys are found with SCAN MATCH, so Redis is never blocked, and each
+        batch's metadata is fetched in one pipelined round trip.
+
+        Args:
+            batch_size: The SCAN COUNT hint, roughly the sessions per batch.
+
+        Yields:
+            Lists of SessionInfo objects.
+        """
+        pattern = f"{self._glob_prefix()}*{META_SUFFIX}"
+        async for keys in self._scan_keys(pattern, batch_size):
+            pipe = self._redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.hmget(key, "created", "last_active", "turns")
+            rows = await pipe.execute()
+            yield [
+                SessionInfo(
+                    session_id=key[len(self.prefix) : -len(META_SUFFIX)],
+                    created=_float(created),
+                    last_active=_float(last_active),
+                    turns=int(turns or 0),
+                )
+                for key, (created, last_active, turns) in zip(keys, rows)
+            ]
+
+    async def count(self) -> int:
+        """
+        Counts the sessions in the store.
+
+        Sessions are counted in the activity sorted set with ZCOUNT instead
+        of scanning their keys. Those idle for longer than the TTL have
+        expired in Redis and are left out, even before a write trims them
+        from the set.
+        """
+        cutoff = time.time() - self.ttl
+        return await self._redis.zcount(self.activity_key, f"({cutoff}", "+inf")
+
+    async def export(self, batch_size: int = 1000) -> AsyncIterator[dict]:
+        """
+        Iterates over every session with its metadata and messages.
+
+        Args:
+            batch_size: Roughly the sessions read per round trip.
+
+        Yields:
+            One dictionary per session.
+        """
+        async for batch in self.scan(batch_size):
+            pipe = self._redis.pipeline(transaction=False)
+            for info in batch:
+                pipe.lrange(self._key(info.session_id), 0, -1)
+            for info, items in zip(batch, await pipe.execute()):
+                yield {
+                    **info.model_dump(),
+                    "messages": [self.codec.decode(item) for item in items],
+                }
+
+    async def purge(self, older_than: float, batch_size: int = 1000) -> int:
+        """
+        Deletes sessions that have been inactive for longer than `older_than`.
+
+        Idle sessions are looked up by score in the activity sorted set, so
+        only they are read, and their keys are removed with batched UNLINK,
+        which frees memory in the background instead of blocking Redis.
+
+        Args:
+            older_than: Seconds of inactivity after which a session is deleted.
+            batch_size: The sessions deleted per round trip.
+
+        Returns:
+            The number of sessions deleted.
+        """
+        cutoff = time.time() - older_than
+        deleted = 0
+        while True:
+            idle = await self._redis.zrangebyscore(
+                self.activity_key, "-inf", f"({cutoff}", start=0, num=batch_size
+            )
+            if not idle:
+                return deleted
+            idle = [sid.decode() if isinstance(sid, bytes) else sid for sid in idle]
+            pipe = self._redis.pipeline(transaction=False)
+            for session_id in idle:
+                pipe.unlink(*self._keys(session_id))
+            pipe.zrem(self.activity_key, *idle)
+            for session_id in idle:
+                self._publish_invalidation(pipe, session_id, force=True)
+            results = await pipe.execute()
+            # Sessions that already expired in Redis are only dropped from the set.
+            deleted += sum(bool(removed) for removed in results[: len(idle)])
+
+    async def clear(self, batch_size: int = 1000) -> int:
+        """
+        Deletes every key under the session prefix.
+
+        Each batch of keys is unlinked while the next one is being scanned.
+
+        Args:
+            batch_size: The SCAN COUNT hint, roughly the keys per batch.
+
+        Returns:
+            The number of sessions deleted.
+        """
+        if not self.prefix:
+            raise ValueError("Refusing to clear sessions without a key prefix.")
+        deleted = 0
+        pending: Optional[asyncio.Task] = None
+        async for keys in self._scan_keys(f"{self._glob_prefix()}*", batch_size):
+            deleted += sum(
+                not key.endswith((SUMMARY_SUFFIX, META_SUFFIX)) for key in keys
+            )
+            if pending is not None:
+                await pending
+            pending = asyncio.create_task(self._redis.unlink(*keys))
+        if pending is not None:
+            await pending
+        await self._redis.unlink(self.activity_key)
+        await self._redis.publish(
+            self.invalidation_channel, f"{self._worker_id}:{ALL_SESSIONS}"
+        )
+        self.cache.clear()
+        return deleted
+
+    def stats(self) -> dict:
+        """Returns compression and session cache statistics."""
+        return {
+            "codec": self.codec.stats(),
+            "cache": {**self.cache.stats(), "enabled": self._listening},
+        }
+
+    def pool_stats(self) -> dict:
+        """Returns the connections of the Redis pool in use and idle."""
+        pool = self._redis.connection_pool
+        return {
+            "in_use": len(getattr(pool, "_in_use_connections", ())),
+            "idle": len(getattr(pool, "_available_connections", ())),
+            "max": pool.max_connections,
+        }
 
     async def close(self):
-        """Closes the Redis connection pool."""
+        """
+        Waits for background writes, stops listening for invalidations and
+        closes the Redis connection pool.
+        """
+        if self._writes:
+            await asyncio.wait(list(self._writes.values()))
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
         await self._redis.close()
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}"
+
+    def _keys(self, session_id: str) -> list[str]:
+        key = self._key(session_id)
+        return [key, key + SUMMARY_SUFFIX, key + META_SUFFIX]
+
+    def _glob_prefix(self) -> str:
+        return re.sub(r"([*?\[\]\\])", r"\\\1", self.prefix)
+
+    def _decode_message(self, item: bytes) -> Message:
+        return Message(**self.codec.decode(item))
+
+    async def _scan_keys(self, pattern: str, count: int) -> AsyncIterator[list[str]]:
+        cursor = 0
+        while True:
+            cursor, keys = await self._redis.scan(cursor, match=pattern, count=count)
+            if keys:
+                yield [k.decode() if isinstance(k, bytes) else k for k in keys]
+            if not cursor:
+                return
+
+    async def _read_window(self, session_id: str, start: int) -> list:
+        key = self._key(session_id)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.llen(key)
+        pipe.lrange(key, start, -1)
+        pipe.get(key + SUMMARY_SUFFIX)
+        pipe.ttl(key)
+        # Sessions from before the key prefix live under their bare ID.
+        legacy = bool(self.prefix) and _is_uuid(session_id)
+        if legacy:
+            pipe.exists(session_id)
+        try:
+            results = await pipe.execute()
+        except ResponseError as e:
+            if not _is_wrong_type(e):
+                raise
+            await self._migrate(key)
+            return await self._read_window(session_id, start)
+        return results if legacy else results + [0]
+
+    async def _read_page(self, session_id: str, offset: int, limit: int) -> list:
+        key = self._key(session_id)
+        pipe = self._redis.pipeline(transaction=False)
+        pipe.llen(key)
+        pipe.lrange(key, offset, offset + limit - 1)
+        legacy = bool(self.prefix) and _is_uuid(session_id)
+        if legacy:
+            pipe.exists(session_id)
+        try:
+            results = await pipe.execute()
+        except ResponseError as e:
+            if not _is_wrong_type(e):
+                raise
+            await self._migrate(key)
+            return await self._read_page(session_id, offset, limit)
+        return results if legacy else results + [0]
+
+    async def _append_after(
+        self, previous: Optional[asyncio.Task], session_id: str, messages: tuple
+    ):
+        if previous is not None:
+            await asyncio.wait([previous])
+        await self.append(session_id, *messages)
+
+    def _finish_write(self, session_id: str, task: asyncio.Task):
+        if self._writes.get(session_id) is task:
+            del self._writes[session_id]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to persist session {session_id}: {task.exception()}")
+
+    async def _wait_for_writes(self, session_id: str):
+        task = self._writes.get(session_id)
+        if task is not None:
+            await asyncio.wait([task])
+
+    def _track_activity(self, pipe, session_id: str, now: float):
+        pipe.zadd(self.activity_key, {session_id: now})
+        # Sessions idle for longer than the TTL have expired in Redis already.
+        pipe.zremrangebyscore(self.activity_key, "-inf", f"({now - self.ttl}")
+
+    def _publish_invalidation(self, pipe, session_id: str, force: bool = False):
+        if self.cache.max_sessions or force:
+            pipe.publish(self.invalidation_channel, f"{self._worker_id}:{session_id}")
+
+    async def _listen(self):
+        while True:
+            pubsub = self._redis.pubsub()
+            try:
+                await pubsub.subscribe(self.invalidation_channel)
+                # Anything may have changed while this worker was not listening.
+                self.cache.clear()
+                self._listening = True
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    data = message["data"]
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    worker_id, _, session_id = data.partition(":")
+                    if worker_id == self._worker_id:
+                        continue
+                    if session_id == ALL_SESSIONS:
+                        self.cache.clear()
+                    else:
+                        self.cache.invalidate(session_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Session invalidation channel lost, retrying: {e}")
+                await asyncio.sleep(1.0)
+            finally:
+                self._listening = False
+                self.cache.clear()
+                await pubsub.aclose()
+
+    async def _write(self, session_id: str, messages: list[Message], replace: bool):
+        key = self._key(session_id)
+        summary_key, meta_key = key + SUMMARY_SUFFIX, key + META_SUFFIX
+        items = [self.codec.encode(msg.model_dump()) for msg in messages]
+        turns = sum(msg.role == "user" for msg in messages)
+        now = time.time()
+
+        # One round trip, applied atomically.
+        pipe = self._redis.pipeline(transaction=True)
+        if replace:
+            # A rewritten history invalidates its summary and turn count.
+            pipe.delete(key, summary_key, meta_key)
+        if items:
+            pipe.rpush(key, *items)
+        pipe.hsetnx(meta_key, "created", now)
+        pipe.hset(meta_key, "last_active", now)
+        if turns:
+            pipe.hincrby(meta_key, "turns", turns)
+        for k in (key, summary_key, meta_key):
+            pipe.expire(k, self.ttl)
+        self._track_activity(pipe, session_id, now)
+        self._publish_invalidation(pipe, session_id)
+        try:
+            await pipe.execute()
+        except ResponseError as e:
+            if replace or not _is_wrong_type(e):
+                raise
+            # The key still holds a JSON blob. Redis ran the rest of the
+            # transaction, so only the RPUSH has to be repeated.
+            await self._migrate(key)
+            await self._redis.rpush(key, *items)
+
+    async def _adopt_legacy(self, session_id: str):
+        """Moves a session from its bare ID to its prefixed key."""
+        key = self._key(session_id)
+        try:
+            moved = await self._redis.renamenx(session_id, key)
+        except ResponseError:
+            return  # The legacy key vanished in the meantime.
+        if not moved:
+            return
+        # Only list and JSON blob values are sessions; anything else is put back.
+        kind = await self._redis.type(key)
+        if kind not in (b"list", "list", b"string", "string"):
+            await self._redis.rename(key, session_id)
+            return
+        await self._migrate(key)
+        length = await self._redis.llen(key)
+        now = time.time()
+        pipe = self._redis.pipeline(transaction=True)
+        pipe.hsetnx(key + META_SUFFIX, "created", now)
+        pipe.hset(key + META_SUFFIX, "last_active", now)
+        pipe.hsetnx(key + META_SUFFIX, "turns", (length + 1) // 2)
+        pipe.expire(key + META_SUFFIX, self.ttl)
+        pipe.expire(key, self.ttl)
+        self._track_activity(pipe, session_id, now)
+        await pipe.execute()
+
+    async def _migrate(self, key: str):
+        """Converts a session stored as a JSON blob into a Redis list."""
+        async with self._redis.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    # Retry if another worker touches the session meanwhile.
+                    await pipe.watch(key)
+                    kind = await pipe.type(key)
+                    if kind not in (b"string", "string"):
+                        await pipe.unwatch()
+                        return
+                    blob = await pipe.get(key)
+                    ttl = await pipe.ttl(key)
+                    items = [self.codec.encode(msg) for msg in json.loads(blob)]
+                    pipe.multi()
+                    pipe.delete(key)
+                    if items:
+                        pipe.rpush(key, *items)
+                    pipe.expire(key, ttl if ttl > 0 else self.ttl)
+                    await pipe.execute()
+                    return
+                except WatchError:
+                    continue
@@ -0,0 +1,84 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, TypeVar
+
+from src.agentic.metrics import SINGLEFLIGHT_COALESCED
+
+T = TypeVar("T")
+
+
+class _Call:
+    """A single in-flight call and the number of callers awaiting it."""
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key into a single execution.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same result (or exception). A caller that is
+    cancelled only stops waiting; the shared work is cancelled once every
+    caller waiting on it has gone away.
+
+    Callers that joined a call in flight are counted in
+    `agentic_singleflight_coalesced_total`, labelled with the flight's name.
+    """
+
+    def __init__(self, name: str = "default"):
+        """
+        Args:
+            name: Identifies the flight in metrics, e.g. "chat".
+        """
+        self._calls: dict[Hashable, _Call] = {}
+        self.coalesced = 0
+        self._coalesced = SINGLEFLIGHT_COALESCED.labels(name)
+
+    @property
+    def in_flight(self) -> int:
+        """The number of distinct calls currently running."""
+        return len(self._calls)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """
+        Runs `fn` unless a call with the same key is already in flight.
+
+        Args:
+            key: A hashable identifying the normalized inputs of the call.
+            fn: A zero-argument callable returning the awaitable to run.
+
+        Returns:
+            The result of the shared call.
+        """
+        call = self._calls.get(key)
+        if call is None:
+            call = _Call(asyncio.ensure_future(fn()))
+            self._calls[key] = call
+            call.task.add_done_callback(lambda task: self._finish(key, call))
+        else:
+            self.coalesced += 1
+            self._coalesced.inc()
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        except asyncio.CancelledError:
+            if not call.task.done() and call.waiters == 1:
+                # Last caller left; nobody needs the result any more.
+                self._forget(key, call)
+                call.task.cancel()
+            raise
+        finally:
+            call.waiters -= 1
+
+    def _finish(self, key: Hashable, call: _Call):
+        self._forget(key, call)
+        if not call.task.cancelled():
+            # Mark the exception as retrieved in case every waiter was cancelled.
+            call.task.exception()
+
+    def _forget(self, key: Hashable, call: _Call):
+        if self._calls.get(key) is call:
+            del self._calls[key]
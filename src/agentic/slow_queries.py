@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import random
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Optional
+
+import asyncpg
+from loguru import logger
+
+from src.agentic.config import SlowQuerySettings
+from src.agentic.metrics import DB_SEQ_SCAN_ALERTS, DB_SLOW_QUERIES
+
+
+def _one_line(query: str) -> str:
+    return " ".join(query.split())
+
+
+def _seq_scans(node: dict) -> list[str]:
+    """Returns the tables scanned sequentially anywhere in a plan node."""
+    tables = []
+    if node.get("Node Type") == "Seq Scan" and "Relation Name" in node:
+        tables.append(node["Relation Name"])
+    for child in node.get("Plans", []):
+        tables.extend(_seq_scans(child))
+    return tables
+
+
+class SlowQueryLog:
+    """
+    Slow statements and their plans, one JSON object per line.
+
+    The file is rotated by size, keeping `backups` older files next to it
+    with the suffixes .1 (newest) to .N (oldest).
+    """
+
+    def __init__(self, path: str, max_bytes: int = 10_000_000, backups: int = 5):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self._handler: Optional[RotatingFileHandler] = None
+
+    def write(self, record: dict):
+        if self._handler is None:
+            # Opened on first use, so processes without slow queries leave no file.
+            self._handler = RotatingFileHandler(
+                self.path,
+                maxBytes=self.max_bytes,
+                backupCount=self.backups,
+                encoding="utf-8",
+            )
+            self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._handler.emit(
+            logging.makeLogRecord({"msg": json.dumps(record, default=str)})
+        )
+
+    def read(self) -> list[dict]:
+        """Returns every record kept, oldest first."""
+        records = []
+        files = [Path(f"{self.path}.{i}") for i in range(self.backups, 0, -1)]
+        for path in files + [self.path]:
+            if not path.exists():
+                continue
+            with path.open(encoding="utf-8") as f:
+                records.extend(json.loads(line) for line in f if line.strip())
+        return records
+
+    def close(self):
+        if self._handler is not None:
+            self._handler.close()
+            self._handler = None
+
+
+class InstrumentedPool:
+    """
+    Wraps an asyncpg pool to capture slow statements and their plans.
+
+    Statements run through the pool's query methods are timed. Those at or
+    over the threshold are logged and counted and, subject to sampling and
+    at most once per `explain_interval` per statement, run again with
+    EXPLAIN (ANALYZE, BUFFERS) on a separate connection in the background.
+    That run is inside a transaction that is rolled back, so explaining a
+    write has no effect. The plan is appended to the slow query log,
+    flagged as an alert if it scans one of `alert_tables` sequentially.
+
+    Everything else, including `acquire`, is passed through to the pool;
+    statements run on an acquired connection are not timed.
+    """
+
+    def __init__(
+        self,
+        pool: asyncpg.Pool,
+        settings: SlowQuerySettings = SlowQuerySettings(),
+        log: Optional[SlowQueryLog] = None,
+    ):
+        """
+        Args:
+            pool: The pool to wrap.
+            settings: The threshold, sampling and log settings.
+            log: Where plans are written; defaults to `settings.log_path`.
+        """
+        self._pool = pool
+        self.settings = settings
+        self.log = log or SlowQueryLog(
+            settings.log_path, settings.max_bytes, settings.backups
+        )
+        self._explained: dict[str, float] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._pool, name)
+
+    async def execute(self, query: str, *args, **kwargs):
+        return await self._run(self._pool.execute, query, args, kwargs)
+
+    async def executemany(self, query: str, args, **kwargs):
+        # Each call runs many statements, which cannot be explained as one.
+        return await self._run(
+            self._pool.executemany, query, None, {"args": args, **kwargs}
+        )
+
+    async def fetch(self, query: str, *args, **kwargs):
+        return await self._run(self._pool.fetch, query, args, kwargs)
+
+    async def fetchrow(self, query: str, *args, **kwargs):
+        return await self._run(self._pool.fetchrow, query, args, kwargs)
+
+    async def fetchval(self, query: str, *args, **kwargs):
+        return await self._run(self._pool.fetchval, query, args, kwargs)
+
+    async def close(self):
+        for task in list(self._tasks):
+            task.cancel()
+        await self._pool.close()
+        self.log.close()
+
+    async def _run(self, method, query: str, args: Optional[tuple], kwargs: dict):
+        started = time.perf_counter()
+        try:
+            if args is None:
+                return await method(query, **kwargs)
+            return await method(query, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            if self.settings.enabled and elapsed_ms >= self.settings.threshold_ms:
+                self._on_slow(query, args, elapsed_ms)
+
+    def _on_slow(self, query: str, args: Optional[tuple], elapsed_ms: float):
+        DB_SLOW_QUERIES.inc()
+        logger.warning(f"Slow query ({elapsed_ms:.0f} ms): {_one_line(query)[:200]}")
+        if args is None:
+            return
+        now = time.monotonic()
+        last = self._explained.get(query)
+        if last is not None and now - last < self.settings.explain_interval:
+            return
+        if random.random() >= self.settings.sample_rate:
+            return
+        self._explained[query] = now
+        task = asyncio.create_task(self._explain(query, args, elapsed_ms))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _explain(self, query: str, args: tuple, elapsed_ms: float):
+        try:
+            async with self._pool.acquire() as conn:
+                transaction = conn.transaction()
+                await transaction.start()
+                try:
+                    plan = await conn.fetchval(
+                        f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}", *args
+                    )
+                finally:
+                    await transaction.rollback()
+        except Exception as e:
+            logger.warning(f"Could not explain slow query: {e}")
+            return
+
+        plan = json.loads(plan)[0]
+        seq_scans = _seq_scans(plan["Plan"])
+        alert = any(table in self.settings.alert_tables for table in seq_scans)
+        self.log.write(
+            {
+                "time": time.time(),
+                "duration_ms": round(elapsed_ms, 3),
+                "execution_ms": plan.get("Execution Time"),
+                "query": _one_line(query),
+                "seq_scans": seq_scans,
+                "alert": alert,
+                "plan": plan,
+            }
+        )
+        if alert:
+            DB_SEQ_SCAN_ALERTS.inc()
+            logger.error(
+                f"Sequential scan on {', '.join(seq_scans)} in slow query: "
+                f"{_one_line(query)[:200]}"
+            )
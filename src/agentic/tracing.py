@@ -0,0 +1,106 @@
+from contextlib import nullcontext
+from typing import Any, ContextManager
+
+from loguru import logger
+
+from src.agentic.config import TracingConfig
+
+# The logfire module, once setup_tracing has enabled it; spans are no-ops until then.
+_logfire = None
+
+
+class _NoopSpan:
+    """Stands in for a span while tracing is disabled."""
+
+    def set_attribute(self, key: str, value: Any):
+        pass
+
+    def set_attributes(self, attributes: dict):
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+def _keep_session_ids(match) -> Any:
+    # Logfire redacts anything named like "session"; session ids are not secret
+    # and are what traces are looked up by.
+    if match.path[-1] == "session_id":
+        return match.value
+    return None
+
+
+def setup_tracing(settings: TracingConfig):
+    """
+    Configures logfire to record spans and export them where configured.
+
+    Spans go to an OTLP/HTTP collector, a JSON-lines file and/or the Logfire
+    service. Outgoing httpx requests, such as those to Azure OpenAI and
+    Ollama, get spans of their own and carry the trace context downstream.
+    Does nothing unless tracing is enabled.
+
+    Args:
+        settings: The tracing section of the configuration.
+    """
+    global _logfire
+    if not settings.enabled:
+        return
+
+    import logfire
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+
+    processors = []
+    if settings.otlp_endpoint:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (
+            OTLPSpanExporter,
+        )
+
+        processors.append(
+            BatchSpanProcessor(OTLPSpanExporter(endpoint=settings.otlp_endpoint))
+        )
+    if settings.file_path:
+        out = open(settings.file_path, "a", encoding="utf-8")
+        processors.append(
+            BatchSpanProcessor(
+                ConsoleSpanExporter(
+                    out=out, formatter=lambda span: span.to_json(indent=None) + "\n"
+                )
+            )
+        )
+
+    logfire.configure(
+        service_name=settings.service_name,
+        send_to_logfire=settings.send_to_logfire,
+        console=False,
+        metrics=False,
+        inspect_arguments=False,
+        additional_span_processors=processors,
+        sampling=logfire.SamplingOptions(head=settings.sample_rate),
+        scrubbing=logfire.ScrubbingOptions(callback=_keep_session_ids),
+    )
+    try:
+        logfire.instrument_httpx()
+    except RuntimeError as e:
+        logger.warning(f"Outgoing HTTP requests will not be traced: {e}")
+    _logfire = logfire
+    logger.info(f"Tracing enabled for service '{settings.service_name}'.")
+
+
+def span(msg_template: str, **attributes: Any) -> ContextManager:
+    """
+    Opens a span, or does nothing if tracing is disabled.
+
+    Spans opened inside one another, including in tasks created inside a
+    span, form a single trace.
+
+    Args:
+        msg_template: The span name; `{name}` fields are filled in from
+            `attributes`.
+        **attributes: Attributes recorded on the span.
+
+    Returns:
+        A context manager yielding an object with `set_attribute`.
+    """
+    if _logfire is None:
+        return nullcontext(_NOOP_SPAN)
+    return _logfire.span(msg_template, **attributes)
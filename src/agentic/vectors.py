@@ -0,0 +1,59 @@
+import json
+import struct
+from typing import Any, Sequence, Union
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speed-up
+    orjson = None
+
+# pgvector's binary format: a big-endian header of (dim, unused) then float32s.
+_HEADER = struct.Struct(">HH")
+_WIRE_DTYPE = np.dtype(">f4")
+
+VectorLike = Union[np.ndarray, Sequence[float]]
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parses JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def to_matrix(rows: Sequence[Sequence[float]]) -> np.ndarray:
+    """
+    Packs embedding rows into a read-only float32 matrix.
+
+    Rows of the result are views into one contiguous buffer, so they can be
+    handed to many callers without copying; making them read-only keeps a
+    caller from changing a vector that others (or a cache) still share.
+
+    Args:
+        rows: One embedding per row, all of the same length.
+
+    Returns:
+        A 2-D float32 array of shape (len(rows), dim).
+    """
+    matrix = np.asarray(rows, dtype=np.float32)
+    if matrix.ndim != 2:
+        matrix = matrix.reshape(len(rows), -1 if len(rows) else 0)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def encode_vector(value: VectorLike) -> bytes:
+    """Encodes a vector into pgvector's binary wire format."""
+    array = np.asarray(value, dtype=_WIRE_DTYPE)
+    if array.ndim != 1:
+        raise ValueError("expected a 1-D vector")
+    return _HEADER.pack(array.shape[0], 0) + array.tobytes()
+
+
+def decode_vector(data: bytes) -> np.ndarray:
+    """Decodes pgvector's binary wire format into a float32 array."""
+    dim, _ = _HEADER.unpack_from(data)
+    wire = np.frombuffer(data, dtype=_WIRE_DTYPE, count=dim, offset=_HEADER.size)
+    return wire.astype(np.float32)
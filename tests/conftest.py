@@ -1,7 +1,9 @@
 
 import asyncio
+import copy
 import pytest
 from unittest.mock import AsyncMock, MagicMock, patch
+from redis.exceptions import WatchError
 
 # --- Event loop fixture for async tests ---
 @pytest.fixture(scope="session")
@@ -75,6 +77,316 @@ def mock_session_store(mock_redis):
     store._redis = mock_redis
     return store
 
+# --- In-memory Redis for session store tests ---
+class FakeRedis:
+    """A small in-memory stand-in for the redis.asyncio commands the app uses."""
+
+    def __init__(self):
+        self.data = {}
+        self.ttls = {}
+        self.calls = []
+        self.subscribers = {}
+
+    def _check(self, key, kind):
+        value = self.data.get(key)
+        if value is not None and not isinstance(value, kind):
+            from redis.exceptions import ResponseError
+            raise ResponseError(
+                "WRONGTYPE Operation against a key holding the wrong kind of value"
+            )
+        return value
+
+    async def get(self, key):
+        self.calls.append("get")
+        return self._check(key, (str, bytes))
+
+    async def set(self, key, value, ex=None):
+        self.calls.append("set")
+        self.data[key] = value
+        if ex:
+            self.ttls[key] = ex
+
+    async def type(self, key):
+        value = self.data.get(key)
+        if value is None:
+            return "none"
+        return "list" if isinstance(value, list) else "hash" if isinstance(value, dict) else "string"
+
+    async def ttl(self, key):
+        return self.ttls.get(key, -1) if key in self.data else -2
+
+    async def expire(self, key, seconds):
+        if key in self.data:
+            self.ttls[key] = seconds
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+            self.ttls.pop(key, None)
+
+    async def rpush(self, key, *values):
+        items = self._check(key, list)
+        if items is None:
+            items = self.data[key] = []
+        items.extend(values)
+        return len(items)
+
+    async def exists(self, *keys):
+        return sum(key in self.data for key in keys)
+
+    async def rename(self, key, new):
+        if key not in self.data:
+            from redis.exceptions import ResponseError
+            raise ResponseError("no such key")
+        self.data[new] = self.data.pop(key)
+        if key in self.ttls:
+            self.ttls[new] = self.ttls.pop(key)
+
+    async def renamenx(self, key, new):
+        if new in self.data:
+            return False
+        await self.rename(key, new)
+        return True
+
+    async def unlink(self, *keys):
+        count = sum(key in self.data for key in keys)
+        await self.delete(*keys)
+        return count
+
+    async def scan(self, cursor=0, match=None, count=None):
+        import fnmatch
+        # Like Redis, keys present for the whole scan are returned even when
+        # others are deleted in between.
+        if cursor == 0:
+            self._scan_keys = sorted(self.data)
+        count = count or 10
+        page = [
+            k
+            for k in self._scan_keys[cursor : cursor + count]
+            if k in self.data and (match is None or fnmatch.fnmatchcase(k, match))
+        ]
+        following = cursor + count
+        return (following if following < len(self._scan_keys) else 0), [k.encode() for k in page]
+
+    async def hsetnx(self, key, field, value):
+        fields = self.data.setdefault(key, {})
+        if field in fields:
+            return 0
+        fields[field] = str(value).encode()
+        return 1
+
+    async def hset(self, key, field, value):
+        self.data.setdefault(key, {})[field] = str(value).encode()
+
+    async def hincrby(self, key, field, amount=1):
+        fields = self.data.setdefault(key, {})
+        value = int(fields.get(field, b"0")) + amount
+        fields[field] = str(value).encode()
+        return value
+
+    async def hmget(self, key, *fields):
+        values = self.data.get(key, {})
+        return [values.get(field) for field in fields]
+
+    async def zadd(self, key, mapping):
+        scores = self.data.setdefault(key, {})
+        added = sum(member not in scores for member in mapping)
+        scores.update(mapping)
+        return added
+
+    def _in_range(self, score, low, high):
+        def bound(value):
+            value = str(value)
+            return float(value.lstrip("(")), value.startswith("(")
+
+        (low, low_open), (high, high_open) = bound(low), bound(high)
+        above = score > low if low_open else score >= low
+        below = score < high if high_open else score <= high
+        return above and below
+
+    async def zrangebyscore(self, key, low, high, start=None, num=None):
+        self.calls.append("zrangebyscore")
+        scores = self.data.get(key, {})
+        members = sorted(
+            (m for m, s in scores.items() if self._in_range(s, low, high)),
+            key=scores.get,
+        )
+        if start is not None:
+            members = members[start : start + num]
+        return [m.encode() for m in members]
+
+    async def zcount(self, key, low, high):
+        self.calls.append("zcount")
+        scores = self.data.get(key, {})
+        return sum(self._in_range(s, low, high) for s in scores.values())
+
+    async def zrem(self, key, *members):
+        scores = self.data.get(key, {})
+        return sum(scores.pop(m, None) is not None for m in members)
+
+    async def zremrangebyscore(self, key, low, high):
+        scores = self.data.get(key, {})
+        expired = [m for m, s in scores.items() if self._in_range(s, low, high)]
+        return await self.zrem(key, *expired)
+
+    async def llen(self, key):
+        return len(self._check(key, list) or [])
+
+    async def lrange(self, key, start, end):
+        self.calls.append("lrange")
+        items = self._check(key, list) or []
+        end = len(items) if end == -1 else end + 1
+        return items[start:end] if start >= 0 else items[max(len(items) + start, 0):end]
+
+    async def publish(self, channel, message):
+        for queue in self.subscribers.get(channel, []):
+            queue.put_nowait(message)
+        return len(self.subscribers.get(channel, []))
+
+    def pubsub(self):
+        return FakePubSub(self)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def close(self):
+        pass
+
+
+class FakePubSub:
+    def __init__(self, redis):
+        self.redis = redis
+        self.queue = asyncio.Queue()
+        self.channels = []
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+        self.redis.subscribers.setdefault(channel, []).append(self.queue)
+
+    async def listen(self):
+        while True:
+            data = await self.queue.get()
+            yield {"type": "message", "data": data.encode()}
+
+    async def aclose(self):
+        for channel in self.channels:
+            self.redis.subscribers[channel].remove(self.queue)
+
+
+class FakePipeline:
+    """
+    Buffers commands until `execute()`, like a redis.asyncio pipeline.
+
+    Between `watch()` and `multi()` commands run immediately, and `execute()`
+    raises WatchError if a watched key changed in the meantime.
+    """
+
+    def __init__(self, redis):
+        self.redis = redis
+        self.reset()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.reset()
+
+    def reset(self):
+        self.queue = []
+        self.watched = {}
+        self.immediate = False
+
+    async def watch(self, *keys):
+        self.immediate = True
+        for key in keys:
+            self.watched[key] = copy.deepcopy(self.redis.data.get(key))
+
+    async def unwatch(self):
+        self.watched = {}
+        self.immediate = False
+
+    def multi(self):
+        self.immediate = False
+
+    def __getattr__(self, name):
+        command = getattr(self.redis, name)
+        if self.immediate:
+            return command
+
+        def queue(*args, **kwargs):
+            self.queue.append((command, args, kwargs))
+            return self
+
+        return queue
+
+    async def execute(self):
+        self.redis.calls.append("execute")
+        queue, watched = self.queue, self.watched
+        self.reset()
+        if any(self.redis.data.get(key) != value for key, value in watched.items()):
+            raise WatchError("Watched variable changed.")
+        return [await command(*args, **kwargs) for command, args, kwargs in queue]
+
+
+@pytest.fixture
+def fake_redis():
+    return FakeRedis()
+
+@pytest.fixture
+def make_session_store(fake_redis):
+    """Builds SessionStores with the given settings on the shared fake Redis."""
+    from src.agentic.config import SessionSettings
+    from src.agentic.session_store import SessionStore
+
+    def make(**settings):
+        store = SessionStore(
+            redis_url="redis://localhost:6379/0", settings=SessionSettings(**settings)
+        )
+        store._redis = fake_redis
+        return store
+
+    return make
+
+@pytest.fixture
+def fake_session_store(make_session_store):
+    return make_session_store()
+
+class DummyRAGAgent:
+    """Stands in for RAGAgent in API tests; replies with the history length."""
+
+    def __init__(self):
+        self.contexts = []
+
+    async def retrieve_code_chunks(self, query):
+        return f"chunks for {query}"
+
+    async def run_rag_chat(self, messages, summary=None, context=None, offset=0):
+        self.contexts.append(context)
+        return f"reply {len(messages)}"
+
+    async def stream_rag_chat(self, messages, summary=None, offset=0):
+        for token in ["Hel", "lo"]:
+            yield token
+
+@pytest.fixture
+def make_api_app():
+    """Builds an app with the v1 chat routers around a session store."""
+    from fastapi import FastAPI
+    from src.agentic.api.v1.chat import chat_router
+    from src.agentic.api.v1.sessions import sessions_router
+    from src.agentic.api.v1.ws import ws_router
+
+    def make(store, agent=None):
+        app = FastAPI()
+        app.include_router(chat_router)
+        app.include_router(sessions_router)
+        app.include_router(ws_router)
+        app.state.rag_agent = agent or DummyRAGAgent()
+        app.state.session_store = store
+        return app
+
+    return make
+
 # --- Patch config for isolation ---
 @pytest.fixture(autouse=True)
 def patch_config(monkeypatch):
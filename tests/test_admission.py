@@ -0,0 +1,135 @@
+import asyncio
+import httpx
+import pytest
+from fastapi import FastAPI
+
+from src.agentic.admission import (
+    AdmissionController,
+    AdmissionGate,
+    AdmissionMiddleware,
+    Overloaded,
+)
+from src.agentic.config import AdmissionSettings, RouteLimit
+
+
+@pytest.mark.asyncio
+async def test_gate_queues_then_hands_over_in_order():
+    gate = AdmissionGate(RouteLimit(max_concurrency=1, max_queue=2, queue_timeout=1))
+    await gate.acquire()
+    order = []
+
+    async def wait(name):
+        await gate.acquire()
+        order.append(name)
+
+    waiters = [asyncio.create_task(wait(name)) for name in ("a", "b")]
+    await asyncio.sleep(0)
+    assert gate.stats()["queued"] == 2
+
+    # A full queue rejects at once
+    with pytest.raises(Overloaded):
+        await gate.acquire()
+    assert gate.rejected == 1
+
+    gate.release()
+    await asyncio.sleep(0)
+    gate.release()
+    await asyncio.gather(*waiters)
+    assert order == ["a", "b"]
+    assert gate.in_flight == 1
+    gate.release()
+    assert gate.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_gate_times_out_waiting_requests():
+    gate = AdmissionGate(RouteLimit(max_concurrency=1, max_queue=5, queue_timeout=0.01))
+    await gate.acquire()
+    with pytest.raises(Overloaded):
+        await gate.acquire()
+    assert gate.timed_out == 1
+    assert gate.queued == 0
+    gate.release()
+    assert gate.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_gate_cancelled_waiter_leaves_queue():
+    gate = AdmissionGate(RouteLimit(max_concurrency=1, max_queue=5, queue_timeout=5))
+    await gate.acquire()
+    task = asyncio.create_task(gate.acquire())
+    await asyncio.sleep(0)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert gate.queued == 0
+    gate.release()
+    assert gate.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_middleware_sheds_overflow_with_retry_after():
+    controller = AdmissionController(
+        AdmissionSettings(
+            routes={"/slow": RouteLimit(max_concurrency=1, max_queue=0)},
+            retry_after=3,
+        )
+    )
+    release = asyncio.Event()
+    app = FastAPI()
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"ok": True}
+
+    @app.get("/free")
+    async def free():
+        return {"ok": True}
+
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = asyncio.create_task(client.get("/slow"))
+        while not controller.gates["/slow"].in_flight:
+            await asyncio.sleep(0)
+
+        shed = await client.get("/slow")
+        assert shed.status_code == 503
+        assert shed.headers["Retry-After"] == "3"
+        # Routes without a limit are unaffected
+        assert (await client.get("/free")).status_code == 200
+
+        release.set()
+        assert (await first).status_code == 200
+    assert controller.stats()["/slow"] == {
+        "in_flight": 0,
+        "queued": 0,
+        "max_concurrency": 1,
+        "max_queue": 0,
+        "admitted": 1,
+        "rejected": 1,
+        "timed_out": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_gate_shares_slots_fairly_between_clients():
+    gate = AdmissionGate(RouteLimit(max_concurrency=1, max_queue=20, queue_timeout=5))
+    await gate.acquire()
+    order = []
+
+    async def wait(client, weight):
+        await gate.acquire(client, weight)
+        order.append(client)
+        gate.release()
+
+    # A busy client queues first, then an interactive one with twice the weight
+    waiters = [asyncio.create_task(wait("bot", 1)) for _ in range(6)]
+    await asyncio.sleep(0)
+    waiters += [asyncio.create_task(wait("ide", 2)) for _ in range(4)]
+    await asyncio.sleep(0)
+    gate.release()
+    await asyncio.gather(*waiters)
+    assert order == ["ide", "bot", "ide", "ide", "bot", "ide", "bot", "bot", "bot", "bot"]
+    assert gate.in_flight == 0
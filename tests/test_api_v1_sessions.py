@@ -0,0 +1,67 @@
+from uuid import uuid4
+from fastapi.testclient import TestClient
+
+from src.agentic.history import history_manager
+from src.agentic.models import Message, SessionSummary
+
+
+def test_chat_delta_returns_only_the_new_turn(fake_session_store, make_api_app):
+    session_id = str(uuid4())
+    with TestClient(make_api_app(fake_session_store)) as client:
+        for i in range(3):
+            body = client.post(
+                "/chat", json={"session_id": session_id, "message": f"q{i}", "delta": True}
+            ).json()
+            assert body["turn_index"] == 2 * i
+            assert [m["content"] for m in body["history"]] == [f"q{i}", f"reply {2 * i + 1}"]
+
+        full = client.post("/chat", json={"session_id": session_id, "message": "q3"}).json()
+        assert full["turn_index"] == 6
+        assert len(full["history"]) == 8
+
+
+def test_session_messages_pages_history(fake_session_store, make_api_app):
+    with TestClient(make_api_app(fake_session_store)) as client:
+        session_id = client.post("/chat", json={"message": "a"}).json()["session_id"]
+        client.post("/chat", json={"session_id": session_id, "message": "b"})
+
+        page = client.get(f"/sessions/{session_id}/messages?offset=1&limit=2").json()
+        assert page["offset"] == 1
+        assert page["total"] == 4
+        assert [m["content"] for m in page["messages"]] == ["reply 1", "b"]
+
+        assert client.get(f"/sessions/{session_id}/messages?offset=10").json()["messages"] == []
+        assert client.get(f"/sessions/{session_id}/messages?limit=0").status_code == 422
+        assert client.get(f"/sessions/{uuid4()}/messages").status_code == 404
+
+
+def test_chat_reuses_the_context_retrieved_while_loading(fake_session_store, make_api_app):
+    app = make_api_app(fake_session_store)
+    with TestClient(app) as client:
+        session_id = client.post("/chat", json={"message": "a"}).json()["session_id"]
+        client.post("/chat", json={"session_id": session_id, "message": "b"})
+    assert app.state.rag_agent.contexts == ["chunks for a", "chunks for b"]
+
+
+def test_chat_returns_the_whole_history_beyond_the_loaded_window(
+    fake_session_store, make_api_app
+):
+    session_id = str(uuid4())
+    earlier = history_manager.load_limit + 10
+    with TestClient(make_api_app(fake_session_store)) as client:
+        client.portal.call(
+            fake_session_store.append,
+            session_id,
+            *[Message(role="user", content=f"m{i}") for i in range(earlier)],
+        )
+        client.portal.call(
+            fake_session_store.set_summary,
+            session_id,
+            SessionSummary(content="s", covered=earlier),
+        )
+        body = client.post("/chat", json={"session_id": session_id, "message": "q"}).json()
+        assert body["turn_index"] == earlier
+        assert len(body["history"]) == earlier + 2
+        assert body["history"][0]["content"] == "m0"
+        # The model was only given the loaded window
+        assert body["reply"] == f"reply {history_manager.load_limit + 1}"
@@ -0,0 +1,98 @@
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from fastapi import WebSocketDisconnect
+from fastapi.testclient import TestClient
+
+from src.agentic.api.v1.ws import WriteBehindSession
+from src.agentic.history import history_manager
+from src.agentic.models import Message, SessionSummary
+
+
+def make_store(history=None):
+    store = MagicMock()
+    store.history_window = None
+    store.get_window = AsyncMock(return_value=(history or [], 0, None))
+    store.append = AsyncMock()
+    return store
+
+
+def test_ws_chat_streams_and_persists_on_disconnect(make_api_app):
+    store = make_store([Message(role="user", content="earlier")])
+    client = TestClient(make_api_app(store))
+    with client.websocket_connect("/ws/chat?session_id=abc") as ws:
+        assert ws.receive_json() == {"type": "session", "session_id": "abc", "turns": 1}
+        ws.send_json({"message": "Hi"})
+        assert ws.receive_json() == {"type": "token", "content": "Hel"}
+        assert ws.receive_json() == {"type": "token", "content": "lo"}
+        assert ws.receive_json() == {"type": "done", "reply": "Hello"}
+        # The session is loaded once and not written on every turn
+        store.get_window.assert_awaited_once_with("abc", history_manager.load_limit)
+
+    # Only the new turn is appended; the loaded history is not rewritten
+    store.append.assert_awaited_once()
+    session_id, *saved = store.append.await_args.args
+    assert session_id == "abc"
+    assert [m.content for m in saved] == ["Hi", "Hello"]
+
+
+def test_ws_chat_rejects_empty_message(make_api_app):
+    store = make_store()
+    client = TestClient(make_api_app(store))
+    with client.websocket_connect("/ws/chat") as ws:
+        assert ws.receive_json()["type"] == "session"
+        ws.send_json({"message": ""})
+        assert ws.receive_json()["type"] == "error"
+    store.get_window.assert_not_awaited()
+    store.append.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_write_behind_session_retries_failed_flush():
+    store = make_store()
+    store.append.side_effect = [RuntimeError("redis down"), None]
+    session = WriteBehindSession(store, "sid", [], flush_interval=60)
+    session.append(Message(role="user", content="hi"))
+    await session.flush()
+    await session.close()
+    assert store.append.await_count == 2
+    # Once persisted, the message is not appended again
+    await session.flush()
+    assert store.append.await_count == 2
+
+
+def test_ws_chat_closes_idle_connections(monkeypatch, make_api_app):
+    monkeypatch.setattr("src.agentic.api.v1.ws.config.server.ws_idle_timeout", 0.05)
+    store = make_store()
+    client = TestClient(make_api_app(store))
+    with client.websocket_connect("/ws/chat?session_id=abc") as ws:
+        assert ws.receive_json()["type"] == "session"
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == 1000
+
+
+@pytest.mark.asyncio
+async def test_write_behind_session_drops_saved_and_summarized_messages():
+    store = make_store()
+    history = [Message(role="user", content=f"m{i}") for i in range(8)]
+    summary = SessionSummary(content="s", covered=14)
+    session = WriteBehindSession(
+        store, "sid", history, 60, offset=10, summary=summary, max_messages=4
+    )
+    session.append(Message(role="user", content="m8"))
+    await session.flush()
+
+    # Only the messages the summary covers are dropped, even beyond the cap
+    assert session.offset == 14
+    assert [m.content for m in session.messages] == ["m4", "m5", "m6", "m7", "m8"]
+
+    # Unsaved messages are kept
+    session.summary = SessionSummary(content="s", covered=19)
+    session.append(Message(role="user", content="m9"))
+    store.append.side_effect = RuntimeError("redis down")
+    await session.flush()
+    assert len(session.messages) == 6
+    store.append.side_effect = None
+    await session.flush()
+    assert session.offset == 16
+    assert [m.content for m in session.messages] == ["m6", "m7", "m8", "m9"]
@@ -0,0 +1,106 @@
+import pytest
+from fastapi import FastAPI, Request, WebSocket
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from src.agentic.auth import (
+    ApiKeyMiddleware,
+    ApiKeyRegistry,
+    current_client,
+    ws_subprotocol,
+)
+from src.agentic.config import ApiKeySettings, AuthSettings
+
+
+def make_registry(**overrides):
+    keys = [
+        ApiKeySettings(name="ide", key="k-ide", weight=4),
+        ApiKeySettings(name="ci", key="k-ci", requests_per_minute=2, tokens_per_minute=600),
+    ]
+    return ApiKeyRegistry(AuthSettings(keys=keys, **overrides))
+
+
+def make_client(registry):
+    app = FastAPI()
+
+    @app.get("/health")
+    def health():
+        return {"status": "ok"}
+
+    @app.get("/metrics")
+    def metrics():
+        return "agentic_up 1"
+
+    @app.get("/whoami")
+    def whoami(request: Request):
+        assert current_client.get() is request.state.api_client
+        return {"name": request.state.api_client.name}
+
+    @app.websocket("/ws")
+    async def ws(websocket: WebSocket):
+        await websocket.accept(subprotocol=ws_subprotocol(websocket.scope))
+        await websocket.send_json({"name": current_client.get().name})
+        await websocket.close()
+
+    app.add_middleware(ApiKeyMiddleware, registry=registry)
+    return TestClient(app)
+
+
+def test_registry_falls_back_to_the_server_key():
+    registry = ApiKeyRegistry(AuthSettings(), default_key="secret")
+    assert registry.authenticate("secret").name == "default"
+    assert registry.authenticate("other") is None
+    assert registry.authenticate(None) is None
+
+
+def test_client_quota_throttles_and_charges_tokens():
+    client = make_registry().authenticate("k-ci")
+    assert client.admit() == 0
+    assert client.admit() == 0
+    assert client.admit() > 0
+    client.requests.refund(10)
+    client.charge(1000)
+    # Spending beyond the token budget throttles until the debt is repaid
+    assert client.admit() == pytest.approx(40.1, abs=0.5)
+    assert client.stats()["tokens_used"] == 1000
+    assert client.stats()["throttled"] == 2
+
+
+def test_middleware_requires_a_known_key():
+    client = make_client(make_registry())
+    assert client.get("/health").status_code == 200
+    # Prometheus scrapes without a key
+    assert client.get("/metrics").status_code == 200
+    assert client.get("/whoami").status_code == 401
+    assert client.get("/whoami", headers={"X-API-Key": "nope"}).status_code == 401
+    assert client.get("/whoami", headers={"X-API-Key": "k-ide"}).json() == {"name": "ide"}
+
+
+def test_middleware_returns_429_over_quota():
+    client = make_client(make_registry())
+    headers = {"X-API-Key": "k-ci"}
+    assert client.get("/whoami", headers=headers).status_code == 200
+    assert client.get("/whoami", headers=headers).status_code == 200
+    response = client.get("/whoami", headers=headers)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # Other keys are unaffected
+    assert client.get("/whoami", headers={"X-API-Key": "k-ide"}).status_code == 200
+
+
+def test_middleware_checks_websockets():
+    client = make_client(make_registry())
+    with client.websocket_connect("/ws", subprotocols=["agentic", "api-key.k-ide"]) as ws:
+        assert ws.accepted_subprotocol == "agentic"
+        assert ws.receive_json() == {"name": "ide"}
+    # Keys in the query string would be logged, so they are not accepted
+    for url in ("/ws", "/ws?api_key=k-ide"):
+        with pytest.raises(WebSocketDisconnect) as closed:
+            with client.websocket_connect(url):
+                pass
+        assert closed.value.code == 1008
+
+
+def test_middleware_can_be_disabled():
+    client = make_client(make_registry(enabled=False))
+    assert client.get("/health").status_code == 200
@@ -0,0 +1,81 @@
+import asyncio
+import pytest
+from src.agentic.balancer import Backend, LoadBalancer
+
+
+def make_balancer(**kwargs):
+    backends = [Backend("a", "settings-a"), Backend("b", "settings-b", weight=2.0)]
+    return LoadBalancer("test", backends, **kwargs)
+
+
+def test_requires_backends():
+    with pytest.raises(ValueError):
+        LoadBalancer("test", [])
+
+
+@pytest.mark.asyncio
+async def test_least_outstanding_respects_weight():
+    balancer = make_balancer()
+    a, b = balancer.backends
+    # b has twice the weight, so it can carry more requests than a.
+    a.outstanding, b.outstanding = 1, 2
+    assert balancer.pick() is b
+    b.outstanding = 4
+    assert balancer.pick() is a
+
+
+@pytest.mark.asyncio
+async def test_ewma_prefers_faster_backend():
+    balancer = make_balancer(strategy="ewma")
+    a, b = balancer.backends
+    a.ewma_latency, b.ewma_latency = 0.01, 1.0
+    assert balancer.pick() is a
+
+
+@pytest.mark.asyncio
+async def test_exclude_prefers_untried_backend():
+    balancer = make_balancer()
+    assert balancer.pick(exclude=frozenset({"b"})).name == "a"
+
+
+@pytest.mark.asyncio
+async def test_failures_eject_and_probe_restores():
+    probed = asyncio.Event()
+
+    async def probe(settings):
+        probed.set()
+
+    balancer = make_balancer(eject_after=2, probe_interval=0.01, probe=probe)
+    a = balancer.backends[0]
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            async with balancer.track(a):
+                raise RuntimeError("down")
+    assert not a.healthy
+    assert all(balancer.pick() is balancer.backends[1] for _ in range(5))
+
+    await asyncio.wait_for(probed.wait(), 1)
+    await asyncio.sleep(0)
+    assert a.healthy
+    assert a.stats()["errors"] == 2
+
+
+@pytest.mark.asyncio
+async def test_non_failures_do_not_eject():
+    balancer = make_balancer(eject_after=1, is_failure=lambda e: False)
+    a = balancer.backends[0]
+    with pytest.raises(ValueError):
+        async with balancer.track(a):
+            raise ValueError("bad request")
+    assert a.healthy
+
+
+@pytest.mark.asyncio
+async def test_track_records_latency_and_outstanding():
+    balancer = make_balancer()
+    a = balancer.backends[0]
+    async with balancer.track(a):
+        assert a.outstanding == 1
+    assert a.outstanding == 0
+    assert a.ewma_latency is not None
+    assert a.requests == 1
@@ -1,7 +1,32 @@
+import httpx
 import pytest
 from src.agentic.chat.azure import azure_chat
+from src.agentic.config import ResilienceSettings
+from src.agentic.ratelimit import QuotaLimiter
+from src.agentic.resilience import ResilientClient
 
 @pytest.mark.asyncio
 async def test_azure_chat(patch_httpx_post):
     reply = await azure_chat([{"role": "user", "content": "hi"}])
     assert reply == "Test reply"
+
+@pytest.mark.asyncio
+async def test_azure_chat_charges_retries_to_the_quota(monkeypatch):
+    limiter = QuotaLimiter(requests_per_minute=60)
+    monkeypatch.setattr("src.agentic.chat.azure.chat_limiter", limiter)
+    monkeypatch.setattr(
+        "src.agentic.chat.azure.chat_client",
+        ResilientClient(
+            ResilienceSettings(backoff_base=0.001, backoff_max=0.002), total_timeout=5.0
+        ),
+    )
+    statuses = [503, 200]
+
+    async def post(self, url, json=None, headers=None):
+        body = {"choices": [{"message": {"content": "ok"}}], "usage": {"total_tokens": 10}}
+        return httpx.Response(statuses.pop(0), json=body, request=httpx.Request("POST", url))
+
+    monkeypatch.setattr("httpx.AsyncClient.post", post)
+    assert await azure_chat([{"role": "user", "content": "retried"}]) == "ok"
+    # Both the first request and its retry took a request from the quota
+    assert limiter.requests.level == pytest.approx(58, abs=0.1)
@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+from starlette.responses import Response
+
+from src.agentic.agents.rag_agent import RAGAgent
+from src.agentic.diagnostics import current_diagnostics, debug_mode, server_timing
+from src.agentic.metrics import stage_timer
+from src.agentic.models import ChatDiagnostics
+
+
+def test_debug_mode_disabled_collects_nothing():
+    response = Response()
+    with debug_mode(False, response) as diagnostics:
+        with stage_timer("llm"):
+            pass
+    assert diagnostics is None
+    assert "server-timing" not in response.headers
+
+
+def test_debug_mode_sets_server_timing_header():
+    response = Response()
+    with debug_mode(True, response) as diagnostics:
+        assert current_diagnostics.get() is diagnostics
+        with stage_timer("embedding"):
+            pass
+        with stage_timer("llm"):
+            pass
+    assert current_diagnostics.get() is None
+    assert list(diagnostics.timings) == ["embedding", "llm", "total"]
+    header = response.headers["server-timing"]
+    assert header.startswith("embedding;dur=")
+    assert ", llm;dur=" in header and ", total;dur=" in header
+
+
+def test_server_timing_format():
+    assert server_timing({"llm": 12.345, "total": 20}) == "llm;dur=12.3, total;dur=20.0"
+
+
+@pytest.mark.asyncio
+async def test_diagnose_retrieval_reports_chunks_index_and_settings(mock_db_pool):
+    plan = [
+        {
+            "Plan": {
+                "Node Type": "Limit",
+                "Plans": [
+                    {"Node Type": "Index Scan", "Index Name": "code_chunks_embedding_idx"}
+                ],
+            }
+        }
+    ]
+    conn = MagicMock()
+    conn.fetchval = AsyncMock(return_value=json.dumps(plan))
+    conn.fetchrow = AsyncMock(return_value={"probes": "10", "ef_search": None})
+    mock_db_pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+    mock_db_pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+    rows = [{"id": 7, "file_path": "foo.py", "chunk": "x", "distance": 0.25}]
+    diagnostics = ChatDiagnostics()
+
+    agent = RAGAgent(db_pool=mock_db_pool)
+    await agent._diagnose_retrieval(diagnostics, rows, "SELECT 1", ())
+
+    assert conn.fetchval.call_args.args[0] == "EXPLAIN (FORMAT JSON) SELECT 1"
+    assert [(c.id, c.file_path, c.distance) for c in diagnostics.chunks] == [
+        ("7", "foo.py", 0.25)
+    ]
+    assert diagnostics.index == "code_chunks_embedding_idx"
+    assert diagnostics.probes == 10
+    assert diagnostics.ef_search is None
+    assert "explain" in diagnostics.timings
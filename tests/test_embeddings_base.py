@@ -0,0 +1,99 @@
+import asyncio
+import numpy as np
+import pytest
+from src.agentic.config import EmbeddingSettings
+from src.agentic.embeddings.base import EmbeddingService, create_embedder
+from src.agentic.embeddings.fake import HashEmbedder
+
+
+class CountingEmbedder:
+    name = "counting"
+    max_batch_size = 2
+
+    def __init__(self):
+        self.batches = []
+
+    async def embed_batch(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(t))] for t in texts]
+
+
+def make_service(**settings):
+    backend = CountingEmbedder()
+    return backend, EmbeddingService(backend, EmbeddingSettings(**settings))
+
+
+def test_registry_selects_backends():
+    assert create_embedder("hash").name == "hash"
+    assert create_embedder("ollama").name == "ollama"
+    with pytest.raises(ValueError):
+        create_embedder("nope")
+
+
+@pytest.mark.asyncio
+async def test_embed_many_splits_batches_and_caches():
+    backend, service = make_service()
+    vectors = await service.embed_many(["a", "bb", "ccc"])
+    assert vectors.dtype == np.float32
+    assert vectors.tolist() == [[1.0], [2.0], [3.0]]
+    assert backend.batches == [["a", "bb"], ["ccc"]]
+
+    vectors = await service.embed_many(["bb", "dddd"])
+    assert vectors.tolist() == [[2.0], [4.0]]
+    assert backend.batches[-1] == ["dddd"]
+    assert service.stats()["cache_hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_concurrent_single_embeds_are_batched_and_coalesced():
+    backend, service = make_service(batch_max_wait_ms=5)
+    results = await asyncio.gather(
+        service.embed("a"), service.embed("a"), service.embed("bb")
+    )
+    assert [r.tolist() for r in results] == [[1.0], [1.0], [2.0]]
+    assert backend.batches == [["a", "bb"]]
+    assert service.stats()["coalesced"] == 1
+
+
+@pytest.mark.asyncio
+async def test_lanes_do_not_share_a_flight():
+    backend, service = make_service(batch_max_wait_ms=5, cache_size=0)
+    await asyncio.gather(service.embed("a", lane="bulk"), service.embed("a"))
+    # The interactive caller got its own request instead of joining bulk's
+    assert sorted(backend.batches) == [["a"], ["a"]]
+    assert service.stats()["coalesced"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_is_bounded_and_can_be_disabled():
+    backend, service = make_service(cache_size=1)
+    await service.embed_many(["a", "b"])
+    await service.embed_many(["a"])
+    assert backend.batches[-1] == ["a"]
+
+    backend, service = make_service(cache_size=0)
+    await service.embed_many(["a"])
+    await service.embed_many(["a"])
+    assert len(backend.batches) == 2
+
+
+@pytest.mark.asyncio
+async def test_returned_vectors_are_shared_read_only():
+    _, service = make_service()
+    first = await service.embed("a", lane="bulk")
+    with pytest.raises(ValueError):
+        first[0] = 99.0
+    assert np.shares_memory(await service.embed("a"), first)
+    assert first.tolist() == [1.0]
+
+
+@pytest.mark.asyncio
+async def test_hash_embedder_is_deterministic_and_normalized():
+    embedder = HashEmbedder(dim=64)
+    a, b, c = await embedder.embed_batch(
+        ["open the database pool", "open the database pool", "render markdown"]
+    )
+    assert np.array_equal(a, b)
+    assert a.shape == (64,)
+    assert float(a @ a) == pytest.approx(1.0)
+    assert not np.array_equal(a, c)
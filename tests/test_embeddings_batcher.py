@@ -0,0 +1,64 @@
+import asyncio
+import pytest
+from src.agentic.embeddings.batcher import MicroBatcher
+
+
+def make_batch_fn(calls):
+    async def batch_fn(texts):
+        calls.append(list(texts))
+        return [[float(len(text))] for text in texts]
+
+    return batch_fn
+
+
+@pytest.mark.asyncio
+async def test_batches_concurrent_texts_and_routes_results():
+    calls = []
+    batcher = MicroBatcher(make_batch_fn(calls), max_batch_size=10, max_wait_ms=5)
+    results = await asyncio.gather(*[batcher.embed("x" * n) for n in range(1, 4)])
+    assert results == [[1.0], [2.0], [3.0]]
+    assert calls == [["x", "xx", "xxx"]]
+    assert batcher.batches == 1
+    assert batcher.batched_texts == 3
+
+
+@pytest.mark.asyncio
+async def test_full_batch_is_sent_without_waiting():
+    calls = []
+    batcher = MicroBatcher(make_batch_fn(calls), max_batch_size=2, max_wait_ms=10_000)
+    results = await asyncio.wait_for(
+        asyncio.gather(batcher.embed("a"), batcher.embed("bb")), timeout=1
+    )
+    assert results == [[1.0], [2.0]]
+
+
+@pytest.mark.asyncio
+async def test_overflow_is_split_into_batches():
+    calls = []
+    batcher = MicroBatcher(make_batch_fn(calls), max_batch_size=2, max_wait_ms=5)
+    await asyncio.gather(*[batcher.embed(t) for t in ["a", "b", "c"]])
+    assert calls == [["a", "b"], ["c"]]
+
+
+@pytest.mark.asyncio
+async def test_backend_error_reaches_every_caller():
+    async def failing(texts):
+        raise RuntimeError("backend down")
+
+    batcher = MicroBatcher(failing, max_batch_size=10, max_wait_ms=1)
+    results = await asyncio.gather(
+        batcher.embed("a"), batcher.embed("b"), return_exceptions=True
+    )
+    assert all(isinstance(r, RuntimeError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_is_dropped_from_batch():
+    calls = []
+    batcher = MicroBatcher(make_batch_fn(calls), max_batch_size=10, max_wait_ms=20)
+    cancelled = asyncio.create_task(batcher.embed("gone"))
+    kept = asyncio.create_task(batcher.embed("kept"))
+    await asyncio.sleep(0)
+    cancelled.cancel()
+    assert await kept == [4.0]
+    assert calls == [["kept"]]
@@ -0,0 +1,74 @@
+import asyncio
+import pytest
+from src.agentic.embeddings.scheduler import EmbeddingScheduler
+
+
+@pytest.mark.asyncio
+async def test_interactive_served_before_bulk_with_guaranteed_share():
+    scheduler = EmbeddingScheduler(max_concurrency=1, bulk_min_share=0.5)
+    gate = asyncio.Event()
+    order = []
+
+    async def blocker():
+        await gate.wait()
+
+    async def job(name):
+        order.append(name)
+
+    first = asyncio.create_task(scheduler.run("bulk", blocker))
+    await asyncio.sleep(0)
+    tasks = [
+        asyncio.create_task(scheduler.run("bulk", lambda n=f"b{i}": job(n)))
+        for i in range(2)
+    ]
+    tasks += [
+        asyncio.create_task(scheduler.run("interactive", lambda n=f"i{i}": job(n)))
+        for i in range(4)
+    ]
+    await asyncio.sleep(0)
+    assert scheduler.stats()["lanes"]["interactive"]["queued"] == 4
+    gate.set()
+    await asyncio.gather(first, *tasks)
+    # Interactive goes first, but bulk gets every second contended slot.
+    assert order == ["i0", "b0", "i1", "b1", "i2", "i3"]
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    scheduler = EmbeddingScheduler(max_concurrency=2)
+    peak = 0
+
+    async def job():
+        nonlocal peak
+        peak = max(peak, scheduler.in_flight)
+        await asyncio.sleep(0.01)
+
+    await asyncio.gather(*[scheduler.run("interactive", job) for _ in range(6)])
+    assert peak == 2
+    stats = scheduler.stats()
+    assert stats["in_flight"] == 0
+    assert stats["lanes"]["interactive"]["dispatched"] == 6
+    assert stats["lanes"]["interactive"]["max_wait_ms"] > 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_releases_queue_position():
+    scheduler = EmbeddingScheduler(max_concurrency=1)
+    gate = asyncio.Event()
+    running = asyncio.create_task(scheduler.run("bulk", gate.wait))
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(scheduler.run("bulk", gate.wait))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert scheduler.stats()["lanes"]["bulk"]["queued"] == 0
+    gate.set()
+    await running
+    assert scheduler.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_lane_is_rejected():
+    with pytest.raises(ValueError):
+        await EmbeddingScheduler().run("vip", asyncio.sleep)
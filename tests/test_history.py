@@ -0,0 +1,167 @@
+import asyncio
+import pytest
+from src.agentic.config import HistorySettings
+from src.agentic.history import HistoryManager
+from src.agentic.models import Message, SessionSummary
+
+
+def conversation(n):
+    return [
+        Message(role="user" if i % 2 == 0 else "assistant", content=f"message {i}")
+        for i in range(n)
+    ]
+
+
+def test_window_keeps_recent_messages_within_budget():
+    manager = HistoryManager(HistorySettings(max_messages=4, summarize_after=0))
+    assert [m.content for m in manager.window(conversation(10))] == [
+        "message 6", "message 7", "message 8", "message 9"
+    ]
+
+    # Each message costs 4 + 9 // 4 = 6 estimated tokens
+    manager = HistoryManager(
+        HistorySettings(max_messages=10, max_tokens=13, summarize_after=0)
+    )
+    assert len(manager.window(conversation(10))) == 2
+
+    # The latest message is kept even if it alone exceeds the budget
+    manager = HistoryManager(HistorySettings(max_tokens=1, summarize_after=0))
+    assert len(manager.window(conversation(3))) == 1
+
+
+def test_window_prepends_summary():
+    manager = HistoryManager(HistorySettings(max_messages=2))
+    summary = SessionSummary(content="We discussed the ingestor.", covered=8)
+    window = manager.window(conversation(10), summary)
+    assert window[0].role == "system"
+    assert "We discussed the ingestor." in window[0].content
+    assert len(window) == 3
+
+
+@pytest.mark.asyncio
+async def test_no_message_is_dropped_before_the_summary_catches_up(fake_session_store):
+    manager = HistoryManager(HistorySettings(max_messages=4, summarize_after=4))
+    await fake_session_store.append("sid", *conversation(30))
+
+    # The summary lags behind the verbatim window by less than summarize_after
+    await fake_session_store.set_summary("sid", SessionSummary(content="s", covered=23))
+    loaded, offset, summary = await manager.load(fake_session_store, "sid")
+    assert offset == 22
+    window = manager.window(loaded, summary, offset)
+    # Every message is either covered by the summary or sent verbatim
+    assert [m.content for m in window[1:]] == [f"message {i}" for i in range(23, 30)]
+
+    # Once the summary catches up, only the budgeted messages are sent
+    summary = SessionSummary(content="s", covered=28)
+    assert len(manager.window(loaded, summary, offset)) == 5
+
+
+@pytest.mark.asyncio
+async def test_prompt_stays_bounded_while_summaries_fail(monkeypatch, fake_session_store):
+    async def failing_chat(messages, temperature=0.0, priority="interactive"):
+        raise RuntimeError("azure down")
+
+    monkeypatch.setattr("src.agentic.history.azure_chat", failing_chat)
+    manager = HistoryManager(
+        HistorySettings(max_messages=4, max_tokens=1000, summarize_after=4)
+    )
+    await fake_session_store.append("sid", *conversation(200))
+
+    for _ in range(3):
+        loaded, offset, summary = await manager.load(fake_session_store, "sid")
+        assert len(loaded) == manager.load_limit
+        window = manager.window(loaded, summary, offset)
+        # The verbatim window plus at most summarize_after uncovered messages
+        assert len(window) == 8
+        manager.schedule_summary(fake_session_store, "sid", loaded, offset, summary)
+        await asyncio.gather(*manager._tasks)
+    _, _, summary = await fake_session_store.get_window("sid")
+    assert summary is None
+
+
+@pytest.mark.asyncio
+async def test_long_backlog_is_summarized_in_batches(monkeypatch, fake_session_store):
+    prompts = []
+
+    async def fake_chat(messages, temperature=0.0, priority="interactive"):
+        prompts.append(messages[1]["content"])
+        if len(prompts) == 3:
+            raise RuntimeError("azure down")
+        return f"summary {len(prompts)}"
+
+    monkeypatch.setattr("src.agentic.history.azure_chat", fake_chat)
+    manager = HistoryManager(
+        HistorySettings(max_messages=4, summarize_after=4, summary_batch=10)
+    )
+    await fake_session_store.append("sid", *conversation(40))
+    loaded, offset, _ = await manager.load(fake_session_store, "sid")
+    received = []
+    manager.schedule_summary(
+        fake_session_store, "sid", loaded, offset, None, on_summary=received.append
+    )
+    await asyncio.gather(*manager._tasks)
+
+    # Each call folds in at most summary_batch messages
+    assert all(p.count("message ") == 10 for p in prompts)
+    assert "message 10" in prompts[1] and "summary 1" in prompts[1]
+    # The progress made before the failure is kept
+    _, _, summary = await fake_session_store.get_window("sid")
+    assert summary == SessionSummary(content="summary 2", covered=20)
+    assert received == [summary]
+
+
+@pytest.mark.asyncio
+async def test_summary_is_written_in_background(monkeypatch, fake_session_store):
+    prompts = []
+
+    async def fake_chat(messages, temperature=0.0, priority="interactive"):
+        prompts.append((messages, priority))
+        return "summary text"
+
+    monkeypatch.setattr("src.agentic.history.azure_chat", fake_chat)
+    manager = HistoryManager(HistorySettings(max_messages=4, summarize_after=4))
+    messages = conversation(10)
+    # The first four messages are only in the store, not in memory
+    await fake_session_store.append("sid", *messages[:4])
+
+    manager.schedule_summary(fake_session_store, "sid", messages[4:], 4, None)
+    received = []
+    manager.schedule_summary(
+        fake_session_store, "sid", messages[4:], 4, None, on_summary=received.append
+    )
+    await asyncio.gather(*manager._tasks)
+
+    # Concurrent requests for the same session summarize once
+    assert len(prompts) == 1 and received == []
+    transcript = prompts[0][0][1]["content"]
+    assert "message 0" in transcript and "message 5" in transcript
+    assert "message 6" not in transcript
+    assert prompts[0][1] == "bulk"
+
+    _, _, summary = await fake_session_store.get_window("sid")
+    assert summary == SessionSummary(content="summary text", covered=6)
+
+
+@pytest.mark.asyncio
+async def test_summary_waits_for_enough_dropped_messages(monkeypatch, fake_session_store):
+    monkeypatch.setattr("src.agentic.history.azure_chat", None)
+    manager = HistoryManager(HistorySettings(max_messages=4, summarize_after=4))
+    summary = SessionSummary(content="s", covered=4)
+    manager.schedule_summary(fake_session_store, "sid", conversation(10), 0, summary)
+    assert not manager._tasks
+
+
+@pytest.mark.asyncio
+async def test_load_reads_only_what_the_window_needs(fake_session_store):
+    manager = HistoryManager(HistorySettings(max_messages=4, summarize_after=2))
+    await fake_session_store.append("sid", *conversation(50))
+    await fake_session_store.set_summary("sid", SessionSummary(content="s", covered=46))
+
+    messages, offset, _ = await manager.load(fake_session_store, "sid")
+    assert len(messages) == manager.load_limit == 6
+    assert offset == 44
+
+    # A configured history window takes precedence
+    fake_session_store.history_window = 10
+    messages, offset, _ = await manager.load(fake_session_store, "sid")
+    assert len(messages) == 10 and offset == 40
@@ -30,3 +30,27 @@ async def test_code_ingestor_ingest(monkeypatch, tmp_path, patch_ollama_embeddin
     ingestor._embed_and_save = fake_embed_and_save
     await ingestor.ingest(mock_db_pool, batch_size=2)
     assert called
+
+@pytest.mark.asyncio
+async def test_code_ingestor_embeds_each_batch_in_one_call(monkeypatch, mock_db_pool):
+    from unittest.mock import AsyncMock, MagicMock
+    from llama_index.core.schema import TextNode
+
+    embedder = MagicMock()
+    embedder.embed_many = AsyncMock(return_value=[[0.1], [0.2]])
+    monkeypatch.setattr("src.agentic.ingestor.get_embedder", lambda: embedder)
+    mock_db_pool.executemany = AsyncMock()
+    # The splitter needs tree_sitter, so the ingestor is built without it
+    ingestor = CodeIngestor.__new__(CodeIngestor)
+    ingestor.repo_name = "repo"
+    ingestor.nodes = [
+        TextNode(id_=str(i), text=text, metadata={"file_path": "a.py"})
+        for i, text in enumerate(["def a(): pass", "  ", "def b(): pass"])
+    ]
+    await ingestor.ingest(mock_db_pool, batch_size=3)
+
+    embedder.embed_many.assert_awaited_once_with(
+        ["def a(): pass", "def b(): pass"], lane="bulk"
+    )
+    rows = mock_db_pool.executemany.await_args.args[1]
+    assert [(row[0], row[4]) for row in rows] == [("0", [0.1]), ("2", [0.2])]
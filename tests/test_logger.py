@@ -1,4 +1,8 @@
-from src.agentic.logger import setup_logging
+import json
+
+from loguru import logger
+
+from src.agentic.logger import _make_filter, setup_logging, user_text
 from src.agentic.config import LoggingConfig
 
 def test_setup_logging(patch_config):
@@ -14,3 +18,67 @@ def test_setup_logging(patch_config):
         retention="4 weeks"
     )
     setup_logging(log_cfg)
+
+
+def make_config(**overrides):
+    settings = dict(
+        log_level="DEBUG",
+        log_to_file=False,
+        log_file_path="test.log",
+        colorize=False,
+        enqueue=False,
+        backtrace=False,
+        diagnose=False,
+        rotation="1 week",
+        retention="4 weeks",
+    )
+    settings.update(overrides)
+    return LoggingConfig(**settings)
+
+
+def record(name, level):
+    return {"name": name, "level": logger.level(level)}
+
+
+def test_user_text_is_truncated_or_redacted(monkeypatch):
+    monkeypatch.setattr("src.agentic.logger._user_content_chars", 5)
+    assert str(user_text("hello world")) == "hello... (+6 chars)"
+    assert str(user_text("hi")) == "hi"
+    monkeypatch.setattr("src.agentic.logger._user_content_chars", 0)
+    assert str(user_text("hello world")) == "<redacted, 11 chars>"
+    monkeypatch.setattr("src.agentic.logger._user_content_chars", None)
+    assert str(user_text("hello world")) == "hello world"
+
+
+def test_filter_applies_most_specific_level_and_sampling(monkeypatch):
+    accept = _make_filter(make_config(
+        levels={"src.agentic": "INFO", "src.agentic.balancer": "WARNING"},
+        sampling={"INFO": 0.5},
+    ))
+    assert not accept(record("src.agentic.balancer", "INFO"))
+    assert accept(record("src.agentic.balancer", "ERROR"))
+    assert not accept(record("src.agentic.ingestor", "DEBUG"))
+    assert accept(record("src.agentic_other", "DEBUG"))
+    monkeypatch.setattr("src.agentic.logger.random.random", lambda: 0.7)
+    assert not accept(record("src.agentic.ingestor", "INFO"))
+    monkeypatch.setattr("src.agentic.logger.random.random", lambda: 0.2)
+    assert accept(record("src.agentic.ingestor", "INFO"))
+    assert _make_filter(make_config()) is None
+
+
+def test_json_format_writes_one_object_per_line(tmp_path, monkeypatch):
+    monkeypatch.setattr("src.agentic.logger._user_content_chars", 200)
+    path = tmp_path / "app.log"
+    setup_logging(make_config(
+        format="json", log_to_file=True, log_file_path=str(path), user_content_chars=4
+    ))
+    try:
+        logger.critical("Query: '{}'", user_text("secret question"))
+        logger.complete()
+    finally:
+        logger.remove()
+    [line] = path.read_text().splitlines()
+    entry = json.loads(line)
+    assert entry["level"] == "CRITICAL"
+    assert entry["message"] == "Query: 'secr... (+11 chars)'"
+    assert entry["logger"] == __name__
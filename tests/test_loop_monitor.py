@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+import pytest
+
+from src.agentic.config import LoopMonitorSettings
+from src.agentic.loop_monitor import LoopMonitor
+from src.agentic.metrics import LOOP_LAG_SECONDS
+
+
+def block_the_loop(seconds: float):
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_monitor_reports_the_blocking_stack(monkeypatch):
+    messages = []
+    monkeypatch.setattr("src.agentic.loop_monitor.logger.warning", messages.append)
+    monitor = LoopMonitor(
+        LoopMonitorSettings(enabled=True, interval=0.01, threshold=0.05)
+    )
+    observed = sum(LOOP_LAG_SECONDS.labels().counts)
+    try:
+        monitor.start()
+        await asyncio.sleep(0.05)
+        block_the_loop(0.3)
+        await asyncio.sleep(0.05)
+    finally:
+        await monitor.stop()
+
+    assert monitor.stalls == 1
+    [message] = messages
+    assert "Event loop blocked for" in message
+    assert "block_the_loop" in message
+    assert sum(LOOP_LAG_SECONDS.labels().counts) > observed
+
+
+@pytest.mark.asyncio
+async def test_disabled_monitor_does_nothing():
+    monitor = LoopMonitor(LoopMonitorSettings(enabled=False))
+    monitor.start()
+    assert monitor._task is None and monitor._thread is None
+    await monitor.stop()
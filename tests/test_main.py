@@ -0,0 +1,65 @@
+import httpx
+from fastapi.testclient import TestClient
+
+from src.agentic.agents.conversational_agent import ConversationalAgent
+from src.agentic.auth import ApiKeyRegistry
+from src.agentic.config import ApiKeySettings, AuthSettings
+from src.agentic.main import create_app
+
+
+def test_app_charges_chat_tokens_to_the_api_key(monkeypatch, fake_session_store):
+    registry = ApiKeyRegistry(
+        AuthSettings(
+            keys=[
+                ApiKeySettings(name="ide", key="k-ide", tokens_per_minute=1000),
+                ApiKeySettings(name="ops", key="k-ops", admin=True),
+            ]
+        )
+    )
+    # The middleware and the /usage route must see the same registry
+    monkeypatch.setattr("src.agentic.auth.api_keys", registry)
+    monkeypatch.setattr("src.agentic.api.v1.general.api_keys", registry)
+
+    async def post(self, url, json=None, headers=None):
+        body = {"choices": [{"message": {"content": "ok"}}], "usage": {"total_tokens": 42}}
+        return httpx.Response(200, json=body, request=httpx.Request("POST", url))
+
+    monkeypatch.setattr("httpx.AsyncClient.post", post)
+
+    # The lifespan is not run; the resources it would create are set directly.
+    app = create_app()
+    app.state.conversational_agent = ConversationalAgent()
+    app.state.session_store = fake_session_store
+    client = TestClient(app)
+    headers = {"X-API-Key": "k-ide"}
+    for _ in range(2):
+        response = client.post("/conversational-chat", json={"message": "hi"}, headers=headers)
+        assert response.json()["reply"] == "ok"
+
+    # Usage is only reported to admin keys
+    assert client.get("/usage", headers=headers).status_code == 403
+    assert client.get("/usage").status_code == 401
+    usage = client.get("/usage", headers={"X-API-Key": "k-ops"}).json()["ide"]
+    assert usage["admitted"] == 3
+    assert usage["tokens_used"] == 84
+    assert usage["tokens_available"] == 1000 - 84
+
+
+def test_app_reports_its_own_admissions(monkeypatch, fake_session_store):
+    monkeypatch.setattr("src.agentic.auth.api_keys", ApiKeyRegistry(AuthSettings(enabled=False)))
+
+    class Agent:
+        async def run_chat(self, messages, summary=None, offset=0):
+            return "ok"
+
+    app = create_app()
+    app.state.conversational_agent = Agent()
+    app.state.session_store = fake_session_store
+    client = TestClient(app)
+    before = client.get("/admission").json()["/conversational-chat"]["admitted"]
+    for _ in range(3):
+        assert client.post("/conversational-chat", json={"message": "hi"}).status_code == 200
+
+    gate = client.get("/admission").json()["/conversational-chat"]
+    assert gate["admitted"] == before + 3
+    assert gate["in_flight"] == 0
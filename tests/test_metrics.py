@@ -0,0 +1,66 @@
+import pytest
+from unittest.mock import MagicMock
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.agentic.api.v1.general import general_router
+from src.agentic.metrics import CACHE_REQUESTS, Counter, Histogram, Registry
+from src.agentic.models import Message
+from src.agentic.session_cache import SessionCache
+
+
+def test_registry_renders_prometheus_text():
+    registry = Registry()
+    requests = Counter("test_requests_total", "Requests.", ["route"], registry=registry)
+    latency = Histogram("test_seconds", "Latency.", buckets=[0.1, 1], registry=registry)
+    requests.labels('/chat "v1"').inc(2)
+    latency.labels().observe(0.05)
+    latency.labels().observe(0.1)
+    latency.labels().observe(5)
+
+    assert registry.render().splitlines() == [
+        "# HELP test_requests_total Requests.",
+        "# TYPE test_requests_total counter",
+        'test_requests_total{route="/chat \\"v1\\""} 2',
+        "# HELP test_seconds Latency.",
+        "# TYPE test_seconds histogram",
+        'test_seconds_bucket{le="0.1"} 2',
+        'test_seconds_bucket{le="1"} 2',
+        'test_seconds_bucket{le="+Inf"} 3',
+        "test_seconds_sum 5.15",
+        "test_seconds_count 3",
+    ]
+
+
+def test_metric_rejects_wrong_labels():
+    counter = Counter("test_labelled_total", "Things.", ["kind"], registry=Registry())
+    with pytest.raises(ValueError):
+        counter.labels("a", "b")
+
+
+def test_session_cache_counts_hits_and_misses():
+    hits = CACHE_REQUESTS.labels("session", "hit")
+    misses = CACHE_REQUESTS.labels("session", "miss")
+    before = hits.value, misses.value
+    cache = SessionCache(max_sessions=4, max_messages=None, ttl=60)
+    cache.get("sid", None)
+    cache.put("sid", [Message(role="user", content="hi")], 0, None, ttl=60, epoch=cache.epoch)
+    cache.get("sid", None)
+    assert (hits.value, misses.value) == (before[0] + 1, before[1] + 1)
+
+
+def test_metrics_endpoint_reports_pools():
+    app = FastAPI()
+    app.include_router(general_router)
+    app.state.db_pool = MagicMock(
+        get_size=lambda: 10, get_idle_size=lambda: 4, get_max_size=lambda: 20
+    )
+    app.state.session_store = MagicMock(
+        pool_stats=lambda: {"in_use": 2, "idle": 3, "max": 50}
+    )
+    response = TestClient(app).get("/metrics")
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    lines = response.text.splitlines()
+    assert 'agentic_db_pool_connections{state="in_use"} 6' in lines
+    assert 'agentic_redis_pool_connections{state="idle"} 3' in lines
+    assert "# TYPE agentic_stage_duration_seconds histogram" in lines
@@ -0,0 +1,79 @@
+import pstats
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.agentic.api.v1.debug import debug_router
+from src.agentic.auth import ApiKeyMiddleware, ApiKeyRegistry
+from src.agentic.config import ApiKeySettings, AuthSettings
+from src.agentic.profiling import SamplingProfiler, profile_to_file
+
+
+def spin(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+def make_client():
+    registry = ApiKeyRegistry(
+        AuthSettings(
+            keys=[
+                ApiKeySettings(name="ops", key="k-ops", admin=True),
+                ApiKeySettings(name="ide", key="k-ide"),
+            ]
+        )
+    )
+    app = FastAPI()
+    app.include_router(debug_router)
+    app.add_middleware(ApiKeyMiddleware, registry=registry)
+    return TestClient(app)
+
+
+def test_sampling_profiler_collapses_stacks():
+    profiler = SamplingProfiler()
+    profiler.start()
+    spin(0.1)
+    profiler.stop()
+
+    lines = profiler.collapsed().splitlines()
+    stack, count = lines[0].rsplit(" ", 1)
+    assert int(count) > 0
+    assert stack.split(";")[-1].startswith("spin (test_profiling.py:")
+
+
+def test_profile_to_file_writes_either_format(tmp_path):
+    collapsed, stats = tmp_path / "ingest.collapsed", tmp_path / "ingest.pstats"
+    with profile_to_file(collapsed):
+        spin(0.05)
+    with profile_to_file(stats):
+        spin(0.01)
+    with profile_to_file(None):
+        pass
+
+    assert "spin (test_profiling.py:" in collapsed.read_text()
+    functions = {name for _, _, name in pstats.Stats(str(stats)).stats}
+    assert "spin" in functions
+
+
+def test_profile_endpoint_requires_an_admin_key():
+    client = make_client()
+    assert client.get("/debug/profile", headers={"X-API-Key": "k-ide"}).status_code == 403
+    assert client.get("/debug/profile").status_code == 401
+
+
+def test_profile_endpoint_returns_collapsed_stacks_and_pstats(tmp_path):
+    client = make_client()
+    headers = {"X-API-Key": "k-ops"}
+
+    response = client.get("/debug/profile?seconds=0.1", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in response.text.splitlines())
+
+    response = client.get("/debug/profile?seconds=0.05&format=pstats", headers=headers)
+    assert response.status_code == 200
+    path = tmp_path / "server.pstats"
+    path.write_bytes(response.content)
+    assert pstats.Stats(str(path)).total_calls > 0
@@ -7,8 +7,8 @@ async def test_rag_agent_run_rag_chat(mock_db_pool, patch_ollama_embedding, patc
     agent = RAGAgent(db_pool=mock_db_pool)
     # Mock DB returns two code chunks
     mock_db_pool.fetch.return_value = [
-        {"file_path": "foo.py", "chunk": "def foo(): pass"},
-        {"file_path": "bar.py", "chunk": "def bar(): pass"},
+        {"id": "1", "file_path": "foo.py", "chunk": "def foo(): pass", "distance": 0.1},
+        {"id": "2", "file_path": "bar.py", "chunk": "def bar(): pass", "distance": 0.3},
     ]
     messages = [Message(role="user", content="What does foo do?")]
     reply = await agent.run_rag_chat(messages)
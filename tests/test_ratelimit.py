@@ -0,0 +1,83 @@
+import asyncio
+import pytest
+from src.agentic.ratelimit import QuotaLimiter, TokenBucket, estimate_tokens
+
+
+def test_token_bucket_delay_and_debt():
+    bucket = TokenBucket(capacity=10, refill_per_second=10)
+    assert bucket.delay_for(5) == 0.0
+    bucket.consume(15)
+    assert bucket.level < 0
+    assert bucket.delay_for(5) == pytest.approx(1.0, abs=0.05)
+    bucket.refund(100)
+    assert bucket.level == 10
+
+
+def test_estimate_tokens():
+    messages = [{"role": "user", "content": "x" * 40}]
+    assert estimate_tokens(messages, completion_tokens=100) == 4 + 10 + 100
+
+
+@pytest.mark.asyncio
+async def test_unlimited_limiter_grants_immediately():
+    limiter = QuotaLimiter()
+    await asyncio.wait_for(limiter.acquire(10_000), timeout=1)
+    assert limiter.granted["interactive"] == 1
+
+
+@pytest.mark.asyncio
+async def test_interactive_lane_goes_ahead_of_bulk():
+    # 600 RPM refills one request every 0.1s.
+    limiter = QuotaLimiter(requests_per_minute=600)
+    limiter.requests.consume(limiter.requests.capacity)
+    order = []
+
+    async def call(name, lane):
+        await limiter.acquire(1, lane)
+        order.append(name)
+
+    bulk = asyncio.create_task(call("bulk", "bulk"))
+    await asyncio.sleep(0)
+    interactive = asyncio.create_task(call("interactive", "interactive"))
+    await asyncio.wait_for(asyncio.gather(bulk, interactive), timeout=2)
+    assert order == ["interactive", "bulk"]
+
+
+@pytest.mark.asyncio
+async def test_reconcile_refunds_overestimate():
+    limiter = QuotaLimiter(tokens_per_minute=6000)
+    await limiter.acquire(1000)
+    level = limiter.tokens.level
+    limiter.reconcile(estimated_tokens=1000, actual_tokens=200)
+    assert limiter.tokens.level == pytest.approx(level + 800, abs=5)
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_queue():
+    limiter = QuotaLimiter(requests_per_minute=60)
+    limiter.requests.consume(limiter.requests.capacity)
+    task = asyncio.create_task(limiter.acquire(1, "bulk"))
+    await asyncio.sleep(0)
+    assert limiter.queued()["bulk"] == 1
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert limiter.queued()["bulk"] == 0
+
+
+@pytest.mark.asyncio
+async def test_unknown_lane_is_rejected():
+    with pytest.raises(ValueError):
+        await QuotaLimiter().acquire(1, "vip")
+
+
+@pytest.mark.asyncio
+async def test_charge_takes_quota_without_waiting():
+    limiter = QuotaLimiter(tokens_per_minute=6000, requests_per_minute=60)
+    limiter.requests.consume(limiter.requests.capacity)
+    limiter.charge(1000)
+    assert limiter.requests.level == pytest.approx(-1, abs=0.1)
+    assert limiter.tokens.level == pytest.approx(5000, abs=5)
+    # Later callers wait until the debt is repaid
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(limiter.acquire(1), timeout=0.1)
@@ -0,0 +1,197 @@
+import asyncio
+import httpx
+import pytest
+from src.agentic.balancer import Backend, LoadBalancer
+from src.agentic.config import ResilienceSettings
+from src.agentic.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    LatencyTracker,
+    ResilientClient,
+    retry_after,
+)
+
+
+def status_error(code, headers=None):
+    request = httpx.Request("POST", "http://backend/x")
+    response = httpx.Response(code, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError("error", request=request, response=response)
+
+
+def make_client(**overrides):
+    options = {"backoff_base": 0.001, "backoff_max": 0.002, "attempt_timeout": 1.0}
+    settings = ResilienceSettings(**{**options, **overrides})
+    return ResilientClient(settings, total_timeout=5.0)
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_failures():
+    client = make_client(max_retries=3)
+    outcomes = [status_error(503), httpx.ConnectError("refused"), "ok"]
+
+    async def attempt():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    assert await client.call("backend", attempt) == "ok"
+    assert client.retries == 2
+
+
+@pytest.mark.asyncio
+async def test_does_not_retry_client_errors():
+    client = make_client(max_retries=3)
+    calls = 0
+
+    async def attempt():
+        nonlocal calls
+        calls += 1
+        raise status_error(400)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await client.call("backend", attempt)
+    assert calls == 1
+
+
+@pytest.mark.asyncio
+async def test_attempt_timeout_is_retried():
+    client = make_client(max_retries=1, attempt_timeout=0.01)
+    calls = 0
+
+    async def attempt():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(1)
+        return "ok"
+
+    assert await client.call("backend", attempt) == "ok"
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_circuit_opens_and_fails_fast():
+    client = make_client(max_retries=0, breaker_failure_threshold=2)
+
+    async def attempt():
+        raise status_error(500)
+
+    for _ in range(2):
+        with pytest.raises(httpx.HTTPStatusError):
+            await client.call("backend", attempt)
+    with pytest.raises(CircuitOpenError):
+        await client.call("backend", attempt)
+    assert client.breaker("backend").state == "open"
+
+
+def test_circuit_half_open_probe_closes_on_success():
+    breaker = CircuitBreaker("backend", failure_threshold=1, reset_timeout=0.0)
+    breaker.record_failure()
+    assert breaker.state == "half_open"
+    breaker.allow()
+    with pytest.raises(CircuitOpenError):
+        breaker.allow()  # only one probe at a time
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_cancelled_probe_frees_the_half_open_slot():
+    client = make_client(max_retries=0, breaker_failure_threshold=1, breaker_reset_timeout=0.0)
+    client.breaker("backend").record_failure()
+    started = asyncio.Event()
+
+    async def hang():
+        started.set()
+        await asyncio.sleep(10)
+
+    probe = asyncio.create_task(client.call("backend", hang))
+    await started.wait()
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+
+    async def attempt():
+        return "ok"
+
+    # The next call gets to probe, and its success closes the circuit
+    assert await client.call("backend", attempt) == "ok"
+    assert client.breaker("backend").state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_balanced_calls_break_the_circuit_per_backend():
+    client = make_client(max_retries=0, breaker_failure_threshold=1)
+    balancer = LoadBalancer(
+        "test", [Backend("bad", "bad", weight=2.0), Backend("good", "good")], eject_after=100
+    )
+    sent = []
+
+    async def request(backend):
+        sent.append(backend.name)
+        if backend.settings == "bad":
+            raise status_error(503)
+        return backend.name
+
+    # The bad backend is preferred until its circuit opens; calls then keep
+    # succeeding on the healthy one
+    results = []
+    for _ in range(6):
+        try:
+            results.append(await client.call_balanced("pool", balancer, request))
+        except httpx.HTTPStatusError:
+            pass
+    assert sent.count("bad") == 1
+    assert results.count("good") == 5
+    assert client.breaker("bad").state == "open"
+    assert client.breaker("good").state == "closed"
+
+
+@pytest.mark.asyncio
+async def test_balanced_calls_fail_over_from_a_hanging_backend():
+    client = make_client(max_retries=2, attempt_timeout=0.05, breaker_failure_threshold=2)
+    balancer = LoadBalancer(
+        "test", [Backend("slow", "slow", weight=2.0), Backend("fast", "fast")], eject_after=2
+    )
+    sent = []
+
+    async def request(backend):
+        sent.append(backend.name)
+        if backend.settings == "slow":
+            await asyncio.sleep(10)
+        return backend.name
+
+    results = [await client.call_balanced("pool", balancer, request) for _ in range(6)]
+    assert results == ["fast"] * 6
+    # Each timeout counts against the hung backend, which is then avoided
+    assert sent.count("slow") == 2
+    assert client.breaker("slow").state == "open"
+    assert not balancer.backends[0].healthy
+    assert balancer.backends[0].errors == 2
+
+
+@pytest.mark.asyncio
+async def test_hedged_request_wins_over_slow_primary():
+    client = make_client(hedge=True, hedge_min_samples=1)
+    client.latencies["backend"] = LatencyTracker()
+    client.latencies["backend"].record(0.01)
+    calls = 0
+
+    async def attempt():
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            await asyncio.sleep(1)
+            return "slow"
+        return "fast"
+
+    assert await client.call("backend", attempt) == "fast"
+    assert client.hedges == 1
+
+
+def test_retry_after_headers():
+    assert retry_after(status_error(429, {"Retry-After": "3"})) == 3.0
+    assert retry_after(status_error(429, {"retry-after-ms": "250"})) == 0.25
+    assert retry_after(status_error(429)) is None
+    assert retry_after(ValueError()) is None
@@ -0,0 +1,94 @@
+import asyncio
+import pytest
+from src.agentic.models import Message
+from src.agentic.session_cache import SessionCache
+
+
+def messages(*contents):
+    return [Message(role="user", content=c) for c in contents]
+
+
+async def listening(store):
+    store.start()
+    while not store._listening:
+        await asyncio.sleep(0)
+    return store
+
+
+def test_cache_serves_only_windows_it_holds():
+    cache = SessionCache(max_sessions=10, max_messages=2, ttl=60)
+    cache.put("sid", messages("a", "b", "c"), 0, None, ttl=60, epoch=cache.epoch)
+    # Only the last two messages are kept
+    assert cache.get("sid", 2) == (messages("b", "c"), 1, None)
+    assert cache.get("sid", None) is None
+    assert cache.get("sid", 3) is None
+    cache.append("sid", messages("d"))
+    assert cache.get("sid", 1) == (messages("d"), 3, None)
+    assert cache.stats()["hit_rate"] == pytest.approx(2 / 4)
+
+
+def test_cache_skips_reads_that_raced_a_change():
+    cache = SessionCache(max_sessions=10, max_messages=None, ttl=60)
+    epoch = cache.epoch
+    cache.invalidate("sid")
+    cache.put("sid", messages("stale"), 0, None, ttl=60, epoch=epoch)
+    assert cache.get("sid", None) is None
+
+
+def test_cache_is_bounded_and_expires(monkeypatch):
+    cache = SessionCache(max_sessions=1, max_messages=None, ttl=60)
+    cache.put("a", messages("x"), 0, None, ttl=60, epoch=cache.epoch)
+    cache.put("b", messages("y"), 0, None, ttl=60, epoch=cache.epoch)
+    assert cache.get("a", None) is None
+    monkeypatch.setattr("src.agentic.session_cache.time.monotonic", lambda: 1e12)
+    assert cache.get("b", None) is None
+
+
+@pytest.mark.asyncio
+async def test_repeat_reads_skip_redis(fake_redis, make_session_store):
+    store = await listening(make_session_store(cache_size=10))
+    await store.append("sid", *messages("a"))
+    await store.get_window("sid")
+    fake_redis.calls.clear()
+
+    await store.append("sid", *messages("b"))
+    history, offset, _ = await store.get_window("sid")
+    assert [m.content for m in history] == ["a", "b"] and offset == 0
+    # Only the append went to Redis
+    assert fake_redis.calls == ["execute"]
+    assert store.stats()["cache"]["hits"] == 1
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_writes_by_other_workers_invalidate(make_session_store):
+    first = await listening(make_session_store(cache_size=10))
+    second = await listening(make_session_store(cache_size=10))
+    await first.append("sid", *messages("a"))
+    await first.get_window("sid")
+
+    await second.append("sid", *messages("b"))
+    for _ in range(5):
+        await asyncio.sleep(0)
+    history, _, _ = await first.get_window("sid")
+    assert [m.content for m in history] == ["a", "b"]
+    assert first.stats()["cache"]["invalidations"] == 1
+    await first.close()
+    await second.close()
+
+
+@pytest.mark.asyncio
+async def test_cached_sessions_keep_only_recent_messages(fake_redis, make_session_store):
+    store = await listening(make_session_store(cache_size=10, cache_messages=3))
+    await store.append("sid", *messages("a"))
+    await store.get_window("sid", 3)
+    for content in "bcdefgh":
+        await store.append("sid", *messages(content))
+
+    # Appends do not grow the cached entry past cache_messages
+    assert len(store.cache._entries["sid"].messages) == 3
+    fake_redis.calls.clear()
+    history, offset, _ = await store.get_window("sid", 3)
+    assert [m.content for m in history] == ["f", "g", "h"] and offset == 5
+    assert fake_redis.calls == []
+    await store.close()
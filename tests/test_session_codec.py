@@ -0,0 +1,52 @@
+import json
+import pytest
+from src.agentic.session_codec import FORMAT_VERSION, SessionCodec, msgpack, zstandard
+
+CODE = "def handler(request):\n    return process(request.body)\n" * 40
+
+
+def test_small_values_are_stored_uncompressed():
+    codec = SessionCodec(compress_min_bytes=1024)
+    encoded = codec.encode({"role": "user", "content": "hi"})
+    assert encoded[0] == FORMAT_VERSION << 4
+    assert codec.decode(encoded) == {"role": "user", "content": "hi"}
+
+
+def test_large_values_are_compressed_and_reported():
+    codec = SessionCodec(compression="zlib", compress_min_bytes=256)
+    message = {"role": "assistant", "content": CODE}
+    encoded = codec.encode(message)
+    assert encoded[0] & 0b11 == 1
+    assert codec.decode(encoded) == message
+    stats = codec.stats()
+    assert stats["encoded"] == 1
+    assert stats["compression_ratio"] > 3
+
+
+def test_decodes_values_written_with_other_settings():
+    plain = SessionCodec(compression="none").encode({"role": "user", "content": CODE})
+    assert SessionCodec(compression="zlib").decode(plain)["content"] == CODE
+    # Messages written as plain JSON before the codec existed
+    legacy = json.dumps({"role": "user", "content": "old"})
+    assert SessionCodec().decode(legacy) == {"role": "user", "content": "old"}
+    assert SessionCodec().decode(legacy.encode()) == {"role": "user", "content": "old"}
+
+
+def test_rejects_unknown_or_unavailable_formats():
+    with pytest.raises(ValueError):
+        SessionCodec(serializer="pickle")
+    with pytest.raises(ValueError):
+        SessionCodec(compression="lz4")
+    if msgpack is None:
+        with pytest.raises(ValueError):
+            SessionCodec(serializer="msgpack")
+    if zstandard is None:
+        with pytest.raises(ValueError):
+            SessionCodec(compression="zstd")
+
+
+@pytest.mark.skipif(msgpack is None or zstandard is None, reason="optional codecs")
+def test_msgpack_zstd_round_trip():
+    codec = SessionCodec(serializer="msgpack", compression="zstd", compress_min_bytes=0)
+    message = {"role": "assistant", "content": CODE}
+    assert codec.decode(codec.encode(message)) == message
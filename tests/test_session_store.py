@@ -1,20 +1,180 @@
+import json
+import time
 import pytest
+from uuid import uuid4
 from src.agentic.session_store import SessionStore
-from src.agentic.models import Message
+from src.agentic.models import Message, SessionSummary
+
+PREFIX = "agentic:session:"
 
 @pytest.mark.asyncio
-async def test_session_store_get_set(mock_session_store):
+async def test_session_store_get_set(fake_session_store):
     session_id = "testid"
     messages = [Message(role="user", content="hi")]
-    await mock_session_store.set(session_id, messages)
-    mock_session_store._redis.set.assert_called_once()
-    # Simulate get
-    mock_session_store._redis.get.return_value = '[{"role": "user", "content": "hi"}]'
-    result = await mock_session_store.get(session_id)
+    await fake_session_store.set(session_id, messages)
+    result = await fake_session_store.get(session_id)
     assert isinstance(result, list)
     assert result[0].role == "user"
+    assert fake_session_store._redis.ttls[PREFIX + session_id] == 3600
+
+@pytest.mark.asyncio
+async def test_session_store_append_writes_only_new_messages(fake_session_store):
+    redis = fake_session_store._redis
+    await fake_session_store.append("sid", Message(role="user", content="a"))
+    await fake_session_store.append(
+        "sid", Message(role="user", content="b"), Message(role="assistant", content="c")
+    )
+    assert len(redis.data[PREFIX + "sid"]) == 3
+    # Each append is a single pipelined round trip
+    assert redis.calls == ["execute", "execute"]
+    assert [m.content for m in await fake_session_store.get("sid")] == ["a", "b", "c"]
+    assert [m.content for m in await fake_session_store.get("sid", limit=2)] == ["b", "c"]
+
+@pytest.mark.asyncio
+async def test_session_store_keeps_metadata(fake_session_store):
+    before = time.time()
+    await fake_session_store.append("sid", Message(role="user", content="a"))
+    await fake_session_store.append(
+        "sid", Message(role="assistant", content="b"), Message(role="user", content="c")
+    )
+    [[info]] = [batch async for batch in fake_session_store.scan()]
+    assert info.session_id == "sid"
+    assert info.turns == 2
+    assert before <= info.created <= info.last_active
+    assert fake_session_store._redis.ttls[PREFIX + "sid:meta"] == 3600
+
+@pytest.mark.asyncio
+async def test_session_store_adopts_legacy_sessions(fake_session_store):
+    redis = fake_session_store._redis
+    old = str(uuid4())
+    redis.data[old] = json.dumps([{"role": "user", "content": "hi"}])
+    redis.ttls[old] = 120
+    history = await fake_session_store.get(old)
+    assert [m.content for m in history] == ["hi"]
+    assert old not in redis.data
+    assert isinstance(redis.data[PREFIX + old], list)
+    assert redis.ttls[PREFIX + old] == 3600
+    assert await fake_session_store.count() == 1
+
+    # Blobs under the prefixed key are converted on write, too
+    redis.data[PREFIX + "older"] = json.dumps([{"role": "user", "content": "x"}])
+    await fake_session_store.append("older", Message(role="assistant", content="y"))
+    assert [m.content for m in await fake_session_store.get("older")] == ["x", "y"]
+
+@pytest.mark.asyncio
+async def test_session_store_migration_retries_after_a_concurrent_write(fake_session_store):
+    redis = fake_session_store._redis
+    key = PREFIX + "sid"
+    redis.data[key] = json.dumps([{"role": "user", "content": "old"}])
+    get = redis.get
+
+    async def racing_get(k):
+        value = await get(k)
+        # Another worker rewrites the blob after it was read
+        redis.get = get
+        redis.data[key] = json.dumps([{"role": "user", "content": "new"}])
+        return value
+
+    redis.get = racing_get
+    assert [m.content for m in await fake_session_store.get("sid")] == ["new"]
+
+@pytest.mark.asyncio
+async def test_session_store_leaves_foreign_keys_alone(fake_session_store):
+    redis = fake_session_store._redis
+    other = str(uuid4())
+    redis.data[other] = {"field": b"value"}
+    redis.data["cache:page"] = "html"
+    assert await fake_session_store.get(other) == []
+    assert redis.data[other] == {"field": b"value"}
+    await fake_session_store.append("sid", Message(role="user", content="a"))
+    assert await fake_session_store.clear() == 1
+    assert set(redis.data) == {other, "cache:page"}
+
+@pytest.mark.asyncio
+async def test_session_store_purges_idle_sessions(make_session_store, monkeypatch):
+    store = make_session_store(ttl=86400)
+    redis = store._redis
+    now = 10**9
+    monkeypatch.setattr("src.agentic.session_store.time.time", lambda: now)
+    for i in range(5):
+        await store.append(f"old{i}", Message(role="user", content="a"))
+    now += 7200
+    await store.append("new", Message(role="user", content="b"))
+
+    # A session that already expired in Redis is only dropped from the index
+    await redis.delete(*[PREFIX + "old4" + s for s in ("", ":summary", ":meta")])
+    redis.calls.clear()
+    # Sessions are counted in the index until purged, without a scan
+    assert await store.count() == 6
+    assert redis.calls == ["zcount"]
+    redis.calls.clear()
+    assert await store.purge(older_than=3600, batch_size=2) == 4
+    # The idle sessions are looked up in the index instead of scanned
+    assert redis.calls == ["zrangebyscore", "execute"] * 3 + ["zrangebyscore"]
+    assert await store.count() == 1
+    assert not any(key.startswith(PREFIX + "old") for key in redis.data)
+    assert list(redis.data[store.activity_key]) == ["new"]
+
+    exported = [s async for s in store.export()]
+    assert exported[0]["session_id"] == "new"
+    assert exported[0]["messages"] == [{"role": "user", "content": "b"}]
+
+    # The index only keeps sessions active within the TTL
+    now += 86400 + 1
+    assert await store.count() == 0
+    await store.append("later", Message(role="user", content="c"))
+    assert list(redis.data[store.activity_key]) == ["later"]
+
+@pytest.mark.asyncio
+async def test_session_store_get_missing_session(fake_session_store):
+    assert await fake_session_store.get("nope") == []
 
 @pytest.mark.asyncio
 async def test_session_store_close(mock_session_store):
     await mock_session_store.close()
     mock_session_store._redis.close.assert_called_once()
+
+@pytest.mark.asyncio
+async def test_session_store_window_and_summary(fake_session_store):
+    await fake_session_store.append(
+        "sid", *[Message(role="user", content=str(i)) for i in range(5)]
+    )
+    await fake_session_store.set_summary("sid", SessionSummary(content="s", covered=2))
+    messages, offset, summary = await fake_session_store.get_window("sid", limit=2)
+    assert [m.content for m in messages] == ["3", "4"]
+    assert offset == 3
+    assert summary.covered == 2
+    assert [m.content for m in await fake_session_store.get_range("sid", 1, 3)] == ["1", "2"]
+
+    # Rewriting the history drops its summary
+    await fake_session_store.set("sid", [Message(role="user", content="new")])
+    assert (await fake_session_store.get_window("sid"))[2] is None
+
+@pytest.mark.asyncio
+async def test_session_store_get_page(fake_session_store):
+    redis = fake_session_store._redis
+    old = str(uuid4())
+    redis.data[old] = json.dumps([{"role": "user", "content": str(i)} for i in range(5)])
+    messages, total = await fake_session_store.get_page(old, 3, 10)
+    assert [m.content for m in messages] == ["3", "4"]
+    assert total == 5
+    assert old not in redis.data
+    assert await fake_session_store.get_page("nope", 0, 10) == ([], 0)
+
+@pytest.mark.asyncio
+async def test_session_store_background_appends_are_read_in_order(fake_session_store):
+    for i in range(3):
+        fake_session_store.append_in_background("sid", Message(role="user", content=str(i)))
+    # Reads wait for the pending writes of the session
+    assert [m.content for m in await fake_session_store.get("sid")] == ["0", "1", "2"]
+    assert fake_session_store._writes == {}
+
+@pytest.mark.asyncio
+async def test_session_store_background_append_failure_is_logged(fake_session_store, monkeypatch):
+    errors = []
+    monkeypatch.setattr("src.agentic.session_store.logger.error", errors.append)
+    fake_session_store._redis.data[PREFIX + "sid"] = {"not": b"a list"}
+    task = fake_session_store.append_in_background("sid", Message(role="user", content="a"))
+    await fake_session_store.close()
+    assert task.done()
+    assert "Failed to persist session sid" in errors[0]
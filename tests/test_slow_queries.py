@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import pytest
+from unittest.mock import AsyncMock, MagicMock
+
+from src.agentic.config import SlowQuerySettings
+from src.agentic.slow_queries import InstrumentedPool, SlowQueryLog, _seq_scans
+
+SEQ_SCAN_PLAN = [
+    {
+        "Plan": {
+            "Node Type": "Limit",
+            "Plans": [
+                {
+                    "Node Type": "Sort",
+                    "Plans": [{"Node Type": "Seq Scan", "Relation Name": "code_chunks"}],
+                }
+            ],
+        },
+        "Execution Time": 812.5,
+    }
+]
+
+
+def make_pool(plan=SEQ_SCAN_PLAN):
+    pool = MagicMock()
+    pool.fetch = AsyncMock(return_value=[])
+    pool.executemany = AsyncMock()
+    pool.close = AsyncMock()
+    conn = MagicMock()
+    conn.fetchval = AsyncMock(return_value=json.dumps(plan))
+    transaction = MagicMock()
+    transaction.start = AsyncMock()
+    transaction.rollback = AsyncMock()
+    conn.transaction.return_value = transaction
+    pool.acquire.return_value.__aenter__ = AsyncMock(return_value=conn)
+    pool.acquire.return_value.__aexit__ = AsyncMock(return_value=None)
+    return pool, conn, transaction
+
+
+async def settle(pool: InstrumentedPool):
+    while pool._tasks:
+        await asyncio.gather(*pool._tasks)
+
+
+def test_seq_scans_walks_the_plan():
+    assert _seq_scans(SEQ_SCAN_PLAN[0]["Plan"]) == ["code_chunks"]
+    assert _seq_scans({"Node Type": "Index Scan", "Index Name": "idx"}) == []
+
+
+@pytest.mark.asyncio
+async def test_slow_statement_is_explained_and_flagged(tmp_path):
+    raw, conn, transaction = make_pool()
+    log = SlowQueryLog(str(tmp_path / "slow.jsonl"))
+    pool = InstrumentedPool(raw, SlowQuerySettings(threshold_ms=0), log)
+
+    await pool.fetch("SELECT * FROM code_chunks\n  LIMIT $1", 5)
+    await settle(pool)
+
+    assert conn.fetchval.call_args.args == (
+        "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) SELECT * FROM code_chunks\n  LIMIT $1",
+        5,
+    )
+    transaction.rollback.assert_awaited_once()
+    [record] = log.read()
+    assert record["query"] == "SELECT * FROM code_chunks LIMIT $1"
+    assert record["alert"] is True
+    assert record["seq_scans"] == ["code_chunks"]
+    assert record["execution_ms"] == 812.5
+
+
+@pytest.mark.asyncio
+async def test_fast_and_repeated_statements_are_not_explained(tmp_path):
+    raw, conn, _ = make_pool()
+    log = SlowQueryLog(str(tmp_path / "slow.jsonl"))
+    fast = InstrumentedPool(raw, SlowQuerySettings(threshold_ms=60_000), log)
+    await fast.fetch("SELECT 1")
+    await settle(fast)
+    conn.fetchval.assert_not_called()
+
+    slow = InstrumentedPool(raw, SlowQuerySettings(threshold_ms=0), log)
+    await slow.fetch("SELECT 1")
+    await settle(slow)
+    await slow.fetch("SELECT 1")
+    await slow.executemany("INSERT INTO t VALUES ($1)", [(1,), (2,)])
+    await settle(slow)
+    assert conn.fetchval.await_count == 1
+    raw.executemany.assert_awaited_once_with("INSERT INTO t VALUES ($1)", args=[(1,), (2,)])
+
+
+@pytest.mark.asyncio
+async def test_other_pool_attributes_pass_through():
+    raw, _, _ = make_pool()
+    raw.get_size.return_value = 4
+    pool = InstrumentedPool(raw, SlowQuerySettings())
+    assert pool.get_size() == 4
+    await pool.close()
+    raw.close.assert_awaited_once()
+
+
+def test_log_rotates_and_reads_oldest_first(tmp_path):
+    log = SlowQueryLog(str(tmp_path / "slow.jsonl"), max_bytes=60, backups=2)
+    for i in range(4):
+        log.write({"n": i, "padding": "x" * 30})
+    log.close()
+    assert [record["n"] for record in log.read()] == [1, 2, 3]
@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from src.agentic import tracing
+from src.agentic.config import TracingConfig
+
+
+def test_span_is_a_no_op_when_disabled(monkeypatch):
+    monkeypatch.setattr(tracing, "_logfire", None)
+    tracing.setup_tracing(TracingConfig(enabled=False))
+
+    with tracing.span("session load", session_id="abc") as s:
+        s.set_attribute("messages", 3)
+        s.set_attributes({"offset": 0})
+    assert tracing._logfire is None
+
+
+@pytest.mark.asyncio
+async def test_spans_are_exported_to_file_with_task_context(tmp_path, monkeypatch):
+    import asyncio
+    import logfire
+
+    monkeypatch.setattr(tracing, "_logfire", None)
+    path = tmp_path / "traces.jsonl"
+    tracing.setup_tracing(
+        TracingConfig(enabled=True, service_name="agentic-test", file_path=str(path))
+    )
+
+    async def save():
+        with tracing.span("session save", session_id="abc"):
+            await asyncio.sleep(0)
+
+    with tracing.span("chat turn") as turn:
+        turn.set_attribute("session_id", "abc")
+        task = asyncio.create_task(save())
+    await task
+    logfire.force_flush()
+
+    spans = {
+        span["name"]: span
+        for span in map(json.loads, path.read_text().splitlines())
+    }
+    turn, save = spans["chat turn"], spans["session save"]
+    assert turn["attributes"]["session_id"] == "abc"
+    assert turn["resource"]["attributes"]["service.name"] == "agentic-test"
+    # The background write belongs to the trace of the turn that started it.
+    assert save["context"]["trace_id"] == turn["context"]["trace_id"]
+    assert save["parent_id"] == turn["context"]["span_id"]
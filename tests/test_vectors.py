@@ -0,0 +1,31 @@
+import numpy as np
+import pytest
+from pgvector import Vector
+from src.agentic.vectors import decode_vector, encode_vector, loads, to_matrix
+
+
+def test_codec_matches_pgvector_wire_format():
+    values = [0.5, -1.25, 3.0]
+    encoded = encode_vector(np.array(values, dtype=np.float32))
+    assert encoded == Vector(values).to_binary()
+    assert encode_vector(values) == encoded
+
+
+def test_decode_returns_native_float32_array():
+    decoded = decode_vector(Vector([1.0, 2.0]).to_binary())
+    assert decoded.dtype == np.float32
+    assert decoded.dtype.isnative
+    assert decoded.tolist() == [1.0, 2.0]
+
+
+def test_encode_rejects_matrices():
+    with pytest.raises(ValueError):
+        encode_vector(np.zeros((2, 2)))
+
+
+def test_to_matrix_is_read_only_float32():
+    matrix = to_matrix(loads(b'[[1, 2], [3, 4]]'))
+    assert matrix.shape == (2, 2)
+    assert matrix.dtype == np.float32
+    assert not matrix.flags.writeable
+    assert to_matrix([]).shape == (0, 0)